@@ -0,0 +1 @@
+default_app_config = 'ticket_django_13525.apps.URLsConfig'
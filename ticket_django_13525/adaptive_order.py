@@ -0,0 +1,246 @@
+"""
+Traffic-adaptive order in which a resolver tries its urls.
+
+AdaptiveURLResolver counts the matches of each of its urls and, every `reorder_every` resolves, moves the most
+matched urls towards the front of the order it tries them in. A url is only moved in front of urls whose
+languages provably do not overlap with its own, i.e. no path can match both, so that the first url matching any
+path stays the same. Two urls cannot match the same path when their path lengths cannot be equal (see
+`prefilter.route_filter`) or when the characters at some position from the start of the path cannot be equal
+(see `position_classes`).
+
+The urlconf itself is not changed, `reverse()` still sees the urls in their order. Counts are halved after every
+reorder, so that the order follows changes of the traffic.
+
+Use AdaptiveURLResolver directly, or `install()` it for every resolver Django creates
+(see the URL_ADAPTIVE_ORDER setting).
+"""
+from collections import namedtuple
+import re
+import threading
+from sre_constants import ANY, AT, IN, LITERAL, MAX_REPEAT, MIN_REPEAT, NOT_LITERAL, SUBPATTERN
+
+from django.core.urlresolvers import RegexURLResolver, Resolver404, ResolverMatch
+from django.utils.encoding import force_text
+from django.utils.translation import get_language
+
+from .better_regex_parser import ALL_CHARACTERS, CharClass, in_char_class, parse_pattern
+from .master_regex import STOCK_RESOLVE
+from .prefilter import BEGINNING_ANCHORS, route_filter
+
+DEFAULT_REORDER_EVERY = 10000
+# positions compared from the start of the paths
+POSITION_LIMIT = 16
+# urls moved at every reorder
+HOT_ROUTES = 32
+
+ANY_BUT_NEWLINE = ~CharClass.from_chars('\n')
+
+RouteShape = namedtuple('RouteShape', ('min_length', 'max_length', 'classes'))
+RouteShape.__doc__ = """
+Lengths of the paths a url can match and the CharClasses of their first characters.
+"""
+
+
+def position_classes(parse_tree, flags=0, limit=POSITION_LIMIT):
+    """
+    Returns the CharClasses of the first characters of the strings matched by a parse tree, up to the first
+    clause whose length varies or `limit` characters, and whether the whole tree was covered.
+
+    >>> position_classes(parse_pattern(r'ab(c|d)+'))
+    ([CharClass(((97, 97),)), CharClass(((98, 98),)), CharClass(((99, 100),))], False)
+    """
+    classes = []
+    for clause_type, clause_value in parse_tree:
+        if len(classes) >= limit:
+            return classes[:limit], False
+        if clause_type == LITERAL:
+            classes.append(CharClass([(clause_value, clause_value)]))
+        elif clause_type == NOT_LITERAL:
+            classes.append(~CharClass([(clause_value, clause_value)]))
+        elif clause_type == IN:
+            classes.append(in_char_class(clause_value, ascii=bool(flags & re.ASCII)))
+        elif clause_type == ANY:
+            classes.append(ALL_CHARACTERS if flags & re.DOTALL else ANY_BUT_NEWLINE)
+        elif clause_type == SUBPATTERN:
+            subpattern_classes, complete = position_classes(clause_value[1], flags, limit - len(classes))
+            classes.extend(subpattern_classes)
+            if not complete:
+                return classes, False
+        elif clause_type == MAX_REPEAT or clause_type == MIN_REPEAT:
+            min_repeat, max_repeat, subpattern = clause_value
+            for _ in range(min_repeat):
+                subpattern_classes, complete = position_classes(subpattern, flags, limit - len(classes))
+                classes.extend(subpattern_classes)
+                if not complete or len(classes) >= limit:
+                    return classes[:limit], False
+            if max_repeat != min_repeat:
+                return classes, False
+        elif clause_type != AT:
+            # alternatives, lookarounds, backreferences
+            return classes, False
+    return classes, True
+
+
+def route_shape(url_pattern):
+    """
+    Returns the RouteShape of a url or include, or None for an include that cannot match anything.
+    """
+    filter_ = route_filter(url_pattern)
+    if filter_ is None:
+        return None
+    parse_tree = parse_pattern(url_pattern.regex.pattern)
+    classes = []
+    if parse_tree and parse_tree[0] in BEGINNING_ANCHORS and \
+            not parse_tree.pattern.flags & (re.IGNORECASE | re.LOCALE):
+        classes, _ = position_classes(parse_tree, parse_tree.pattern.flags)
+    return RouteShape(filter_.min_length, filter_.max_length, classes)
+
+
+def disjoint(shape, other):
+    """
+    Whether no path can match both urls.
+    """
+    if shape is None or other is None:
+        # includes without urls never match
+        return True
+    if shape.max_length is not None and shape.max_length < other.min_length or \
+            other.max_length is not None and other.max_length < shape.min_length:
+        return True
+    return any(not char_class & other_class for char_class, other_class in zip(shape.classes, other.classes))
+
+
+def reorder(order, counts, shapes, hot_routes=HOT_ROUTES):
+    """
+    Returns a new order of the url indexes of `order`, the `hot_routes` most matched urls moved in front of the
+    less matched urls they are disjoint with.
+    """
+    order = list(order)
+    hot = sorted((index for index in order if counts[index]), key=lambda index: -counts[index])[:hot_routes]
+    for index in hot:
+        position = order.index(index)
+        target = position
+        while target > 0:
+            previous = order[target - 1]
+            if counts[previous] >= counts[index] or not disjoint(shapes[index], shapes[previous]):
+                break
+            target -= 1
+        if target < position:
+            del order[position]
+            order.insert(target, index)
+    return order
+
+
+class ScanOrder:
+    """
+    Match counts of the urls of a resolver and the order they are tried in.
+    """
+
+    def __init__(self, url_patterns, reorder_every=DEFAULT_REORDER_EVERY):
+        self.url_patterns = list(url_patterns)
+        self.reorder_every = reorder_every
+        self.counts = [0] * len(self.url_patterns)
+        self.order = list(range(len(self.url_patterns)))
+        self.resolves = 0
+        self.shapes = None
+        self.lock = threading.Lock()
+
+    def patterns(self):
+        """
+        Yields the (index, url) pairs in the current order.
+        """
+        url_patterns = self.url_patterns
+        for index in self.order:
+            yield index, url_patterns[index]
+
+    def record(self, index):
+        # counts are approximate, concurrent increments may be lost
+        self.counts[index] += 1
+        self.resolves += 1
+        if self.resolves >= self.reorder_every:
+            self.reorder()
+
+    def reorder(self):
+        if not self.lock.acquire(False):
+            # another thread is reordering
+            return
+        try:
+            if self.shapes is None:
+                self.shapes = [route_shape(url_pattern) for url_pattern in self.url_patterns]
+            self.order = reorder(self.order, self.counts, self.shapes)
+            self.counts = [count // 2 for count in self.counts]
+            self.resolves = 0
+        finally:
+            self.lock.release()
+
+
+def scan_order(resolver):
+    """
+    The ScanOrder of the urls of `resolver`, one per language.
+    """
+    language_code = get_language()
+    orders = resolver.__dict__.setdefault('_scan_order_dict', {})
+    if language_code not in orders:
+        orders[language_code] = ScanOrder(resolver.url_patterns, getattr(resolver, 'reorder_every',
+                                                                         DEFAULT_REORDER_EVERY))
+    return orders[language_code]
+
+
+class AdaptiveURLResolver(RegexURLResolver):
+    """
+    RegexURLResolver trying its most matched urls first, when that cannot change the url a path resolves to.
+    """
+
+    reorder_every = DEFAULT_REORDER_EVERY
+
+    def resolve(self, path):
+        path = force_text(path)  # path may be a reverse_lazy object
+        tried = []
+        match = self.regex.search(path)
+        if match:
+            new_path = path[match.end():]
+            order = scan_order(self)
+            for index, pattern in order.patterns():
+                try:
+                    sub_match = pattern.resolve(new_path)
+                except Resolver404 as e:
+                    sub_tried = e.args[0].get('tried')
+                    if sub_tried is not None:
+                        tried.extend([pattern] + t for t in sub_tried)
+                    else:
+                        tried.append([pattern])
+                else:
+                    if sub_match:
+                        order.record(index)
+                        sub_match_dict = dict(match.groupdict(), **self.default_kwargs)
+                        sub_match_dict.update(sub_match.kwargs)
+                        return ResolverMatch(
+                            sub_match.func,
+                            sub_match.args,
+                            sub_match_dict,
+                            sub_match.url_name,
+                            self.app_name or sub_match.app_name,
+                            [self.namespace] + sub_match.namespaces
+                        )
+                    tried.append([pattern])
+            raise Resolver404({'tried': tried, 'path': new_path})
+        raise Resolver404({'path': path})
+
+
+def install(resolver_class=None, reorder_every=DEFAULT_REORDER_EVERY):
+    """
+    Makes `resolver_class` (RegexURLResolver by default, so every resolver Django creates)
+    try its urls in a traffic-adaptive order, reordered every `reorder_every` resolves.
+    """
+    if resolver_class is None:
+        resolver_class = RegexURLResolver
+    resolver_class.resolve = AdaptiveURLResolver.resolve
+    resolver_class.reorder_every = reorder_every
+
+
+def uninstall(resolver_class=None):
+    """
+    Restores the stock `resolve` of `resolver_class`.
+    """
+    if resolver_class is None:
+        resolver_class = RegexURLResolver
+    resolver_class.resolve = STOCK_RESOLVE
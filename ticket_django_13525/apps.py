@@ -0,0 +1,46 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class URLsConfig(AppConfig):
+    name = 'ticket_django_13525'
+
+    def ready(self):
+        from . import checks  # registers the system checks
+
+        if getattr(settings, 'URL_BETTER_RESOLVER', False):
+            from . import resolvers
+
+            resolvers.install(normalization_table=getattr(settings, 'URL_NORMALIZATION_TABLE', None))
+
+        if getattr(settings, 'URL_PREFILTER', False):
+            from . import prefilter
+
+            prefilter.install()
+
+        # replaces the pre-filtered resolve() when both are enabled
+        adaptive_order_every = getattr(settings, 'URL_ADAPTIVE_ORDER', 0)
+        if adaptive_order_every:
+            from . import adaptive_order
+
+            adaptive_order.install(reorder_every=adaptive_order_every)
+
+        # replaces the other resolve() engines when enabled with them
+        if getattr(settings, 'URL_MASTER_REGEX', False):
+            from . import master_regex
+
+            master_regex.install()
+
+        negative_cache_size = getattr(settings, 'URL_NEGATIVE_CACHE_SIZE', 0)
+        if negative_cache_size:
+            from . import negative_cache
+
+            negative_cache.install(size=negative_cache_size)
+
+        reverse_cache_size = getattr(settings, 'URL_REVERSE_CACHE_SIZE', 0)
+        if reverse_cache_size:
+            from . import reverse_cache
+
+            reverse_cache.install(size=reverse_cache_size,
+                                  max_values=getattr(settings, 'URL_REVERSE_CACHE_MAX_VALUES',
+                                                     reverse_cache.DEFAULT_MAX_VALUES))
@@ -1,27 +1,318 @@
+from array import array
+from bisect import bisect_right
 from collections import OrderedDict, namedtuple
 from itertools import product
 import re
 from sre_constants import CATEGORY_DIGIT, CATEGORY_NOT_DIGIT, CATEGORY_SPACE, CATEGORY_NOT_SPACE, CATEGORY, NEGATE, \
-    RANGE, LITERAL, IN, MAX_REPEAT, AT, SUBPATTERN, GROUPREF, BRANCH, ANY, NOT_LITERAL, CATEGORY_WORD, CATEGORY_NOT_WORD
-from sre_parse import DIGITS, WHITESPACE
+    RANGE, LITERAL, IN, MAX_REPEAT, AT, SUBPATTERN, GROUPREF, BRANCH, ANY, NOT_LITERAL, CATEGORY_WORD, CATEGORY_NOT_WORD, \
+    MIN_REPEAT, ASSERT, ASSERT_NOT
 import string
+import sys
 
-ALLOWED_URL_CHARACTERS = set(string.digits + string.ascii_letters + string.punctuation)
+MAX_CODE_POINT = sys.maxunicode
 
-Category = namedtuple('Category', ('char_set', 'default_mapping'))
+
+class CharClass:
+    """
+    Set of code points kept as a sorted tuple of disjoint, non-adjacent (first, last) intervals,
+    so that complement, intersection and the minimum member never materialize the code points.
+    """
+
+    def __init__(self, intervals=()):
+        self.intervals = self._merge(sorted(intervals))
+
+    @staticmethod
+    def _merge(intervals):
+        merged = []
+        for first, last in intervals:
+            if merged and first <= merged[-1][1] + 1:
+                if last > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], last)
+            else:
+                merged.append((first, last))
+        return tuple(merged)
+
+    @classmethod
+    def from_chars(cls, chars):
+        return cls((ord(c), ord(c)) for c in chars)
+
+    def __repr__(self):
+        return 'CharClass(%r)' % (self.intervals,)
+
+    def __eq__(self, other):
+        return isinstance(other, CharClass) and self.intervals == other.intervals
+
+    def __hash__(self):
+        return hash(self.intervals)
+
+    def __bool__(self):
+        return bool(self.intervals)
+
+    def __len__(self):
+        return sum(last - first + 1 for first, last in self.intervals)
+
+    def __contains__(self, char):
+        code_point = ord(char) if isinstance(char, str) else char
+        intervals = self.intervals
+        position = bisect_right(intervals, (code_point, MAX_CODE_POINT + 1))
+        return position > 0 and intervals[position - 1][1] >= code_point
+
+    def __or__(self, other):
+        return CharClass(self.intervals + other.intervals)
+
+    def __invert__(self):
+        complement = []
+        start = 0
+        for first, last in self.intervals:
+            if first > start:
+                complement.append((start, first - 1))
+            start = last + 1
+        if start <= MAX_CODE_POINT:
+            complement.append((start, MAX_CODE_POINT))
+        return CharClass(complement)
+
+    def __and__(self, other):
+        # walk the intervals of the smaller class and bisect into the larger one
+        small, large = sorted((self.intervals, other.intervals), key=len)
+        intersection = []
+        for first, last in small:
+            position = max(bisect_right(large, (first, MAX_CODE_POINT + 1)) - 1, 0)
+            while position < len(large) and large[position][0] <= last:
+                overlap_first = max(first, large[position][0])
+                overlap_last = min(last, large[position][1])
+                if overlap_first <= overlap_last:
+                    intersection.append((overlap_first, overlap_last))
+                position += 1
+        return CharClass(intersection)
+
+    def __sub__(self, other):
+        return self & ~other
+
+    def min(self):
+        if not self.intervals:
+            raise ValueError('Character class is empty.')
+        return chr(self.intervals[0][0])
+
+
+class LazyCharClass(CharClass):
+    """
+    CharClass built on first use, scanning the Unicode categories takes a while.
+    """
+
+    def __init__(self, build):
+        self._build = build
+
+    @property
+    def intervals(self):
+        if self._build is not None:
+            self._intervals = self._build().intervals
+            self._build = None
+        return self._intervals
+
+
+_UTF32 = 'utf-32-le' if sys.byteorder == 'little' else 'utf-32-be'
+_SCAN_CHUNK = 1 << 16
+
+
+def category_char_class(regex):
+    """
+    Returns a CharClass of all code points matched by the single-character `regex`, as `re` sees them.
+    """
+    compiled = re.compile('(?:%s)+' % regex)
+    intervals = []
+    for base in range(0, MAX_CODE_POINT + 1, _SCAN_CHUNK):
+        code_points = array('I', range(base, min(base + _SCAN_CHUNK, MAX_CODE_POINT + 1)))
+        chunk = code_points.tobytes().decode(_UTF32, 'surrogatepass')
+        for match in compiled.finditer(chunk):
+            intervals.append((base + match.start(), base + match.end() - 1))
+    return CharClass(intervals)
+
+
+ALLOWED_URL_CHARACTERS = CharClass.from_chars(string.digits + string.ascii_letters + string.punctuation)
+# characters `reverse()` leaves unquoted
+URL_SAFE_CHARACTERS = CharClass.from_chars(string.digits + string.ascii_letters + '_.-' + "!$&'()*+,;=" + '/~:@')
+ALL_CHARACTERS = CharClass([(0, MAX_CODE_POINT)])
+
+Category = namedtuple('Category', ('char_class', 'default_mapping'))
 
 Context = namedtuple('Context', ('pattern_reverse_groupdict', 'in_unnamed_group'))
 
+DIGIT = LazyCharClass(lambda: category_char_class(r'\d'))
+SPACE = LazyCharClass(lambda: category_char_class(r'\s'))
+WORD = LazyCharClass(lambda: category_char_class(r'\w'))
+
 CATEGORY_MAP = {
-    CATEGORY_DIGIT: Category(DIGITS, '0'),
-    CATEGORY_NOT_DIGIT: Category(ALLOWED_URL_CHARACTERS - DIGITS, 'x'),
-    CATEGORY_SPACE: Category(WHITESPACE, ' '),
-    CATEGORY_NOT_SPACE: Category(ALLOWED_URL_CHARACTERS - WHITESPACE, 'x'),
-    CATEGORY_WORD: Category(set(string.ascii_letters + string.digits + '_'), 'x'),
-    CATEGORY_NOT_WORD: Category(set(string.ascii_letters + string.digits + '_'), '!'),
+    CATEGORY_DIGIT: Category(DIGIT, '0'),
+    CATEGORY_NOT_DIGIT: Category(LazyCharClass(lambda: ~DIGIT), 'x'),
+    CATEGORY_SPACE: Category(SPACE, ' '),
+    CATEGORY_NOT_SPACE: Category(LazyCharClass(lambda: ~SPACE), 'x'),
+    CATEGORY_WORD: Category(WORD, 'x'),
+    CATEGORY_NOT_WORD: Category(LazyCharClass(lambda: ~WORD), '!'),
+}
+
+_ASCII_DIGIT = CharClass.from_chars(string.digits)
+_ASCII_SPACE = CharClass.from_chars(' \t\n\r\f\v')
+_ASCII_WORD = CharClass.from_chars(string.ascii_letters + string.digits + '_')
+
+# character classes of the categories under the ASCII flag
+ASCII_CATEGORIES = {
+    CATEGORY_DIGIT: _ASCII_DIGIT,
+    CATEGORY_NOT_DIGIT: ~_ASCII_DIGIT,
+    CATEGORY_SPACE: _ASCII_SPACE,
+    CATEGORY_NOT_SPACE: ~_ASCII_SPACE,
+    CATEGORY_WORD: _ASCII_WORD,
+    CATEGORY_NOT_WORD: ~_ASCII_WORD,
 }
 
 
+# Candidates are built as immutable segments shared between candidates with common parts,
+# a segment is a literal str, an argument Slot, a Concat of segments or a Repeat of a segment.
+# They are flattened to a format string only once, when the caller asks for it.
+class Slot(str):
+    """
+    Argument slot, the `%(name)s` placeholder of the format string.
+    """
+
+    def __new__(cls, name):
+        slot = super().__new__(cls, '%%(%s)s' % name)
+        slot.name = name
+        return slot
+
+
+Concat = namedtuple('Concat', ('parts',))
+Repeat = namedtuple('Repeat', ('part', 'count'))
+
+# repeats of short strings are cheaper to build right away
+REPEAT_INLINE_LIMIT = 1024
+
+
+def concat(parts):
+    parts = tuple(parts)
+    try:
+        # literals and slots only, joining them right away is cheaper than flattening later
+        return ''.join(parts)
+    except TypeError:
+        return Concat(tuple(part for part in parts if part != ''))
+
+
+def repeat(part, count):
+    if count == 1 or part == '':
+        return part
+    if isinstance(part, str) and len(part) * count <= REPEAT_INLINE_LIMIT:
+        return part * count
+    return Repeat(part, count)
+
+
+def flatten(segment, cache=None):
+    """
+    Returns the format string of a segment.
+
+    `cache` keeps flattened repeats, pass the same dict when flattening segments sharing parts.
+    """
+    if isinstance(segment, str):
+        return str(segment)
+    chunks = []
+    _flatten((segment,), chunks, {} if cache is None else cache)
+    return ''.join(chunks)
+
+
+def _flatten(parts, chunks, cache):
+    for part in parts:
+        if isinstance(part, str):
+            chunks.append(part)
+        elif isinstance(part, Concat):
+            _flatten(part.parts, chunks, cache)
+        else:
+            try:
+                chunks.append(cache[id(part)][1])
+            except KeyError:
+                # the segment is kept in the cache so that its id cannot be reused
+                flattened = flatten(part.part, cache) * part.count
+                cache[id(part)] = part, flattened
+                chunks.append(flattened)
+
+
+def in_char_class(clause, within=None, ascii=False):
+    """
+    Returns the CharClass matched by an `in` clause, restricted to `within` when given.
+    Categories match ASCII characters only when `ascii` is set, as with the ASCII flag.
+
+    Restricting the members before they are combined keeps negated Unicode categories
+    (e.g. `[^\\W\\d]`) down to a few intervals.
+    """
+    char_class = CharClass()
+    negate = False
+    for in_clause_type, in_clause_value in clause:
+        if in_clause_type == NEGATE:
+            negate = True
+            continue
+        if in_clause_type == RANGE:
+            member = CharClass([in_clause_value])
+        elif in_clause_type == CATEGORY:
+            try:
+                member = ASCII_CATEGORIES[in_clause_value] if ascii else CATEGORY_MAP[in_clause_value].char_class
+            except KeyError:
+                raise NotImplementedError('%s category is not supported in character classes.' % in_clause_value)
+        else:
+            assert in_clause_type == LITERAL
+            member = CharClass([(in_clause_value, in_clause_value)])
+        char_class |= member if within is None else member & within
+    if negate:
+        return ~char_class if within is None else within - char_class
+    return char_class
+
+
+def min_url_character(clause):
+    """
+    Returns the smallest character matched by an `in` clause, preferring ALLOWED_URL_CHARACTERS.
+    """
+    return (in_char_class(clause, ALLOWED_URL_CHARACTERS) or in_char_class(clause)).min()
+
+
+def matched_char_class(parse_tree, flags=0):
+    """
+    Returns the CharClass of all characters in strings matched by a parse tree, or None when it cannot be told
+    from the tree alone (backreferences, case-insensitive matching).
+    """
+    if flags & (re.IGNORECASE | re.LOCALE):
+        return None
+    char_class = CharClass()
+    for clause_type, clause_value, _ in iter_clauses(parse_tree):
+        if clause_type == LITERAL:
+            char_class |= CharClass([(clause_value, clause_value)])
+        elif clause_type == NOT_LITERAL:
+            char_class |= ~CharClass([(clause_value, clause_value)])
+        elif clause_type == IN:
+            char_class |= in_char_class(clause_value, ascii=bool(flags & re.ASCII))
+        elif clause_type == ANY:
+            char_class = ALL_CHARACTERS
+        elif clause_type == GROUPREF:
+            return None
+    return char_class
+
+
+def quote_free_args(pattern):
+    """
+    Names of the arguments of `pattern` whose values never need quoting, because their group only matches
+    URL_SAFE_CHARACTERS. `\\d` and `\\w` match non-ASCII digits and letters unless the ASCII flag is set.
+
+    >>> sorted(quote_free_args('^(?P<year>[0-9]{4})/(?P<slug>[-a-z]+)/(?P<title>.+)$'))
+    ['slug', 'year']
+    """
+    pattern_parse_tree = parse_pattern(pattern)
+    flags = pattern_parse_tree.pattern.flags
+    pattern_reverse_groupdict = reverse_groupdict(pattern_parse_tree.pattern.groupdict)
+    args = set()
+    for clause_type, clause_value, _ in iter_clauses(pattern_parse_tree):
+        if clause_type != SUBPATTERN or clause_value[0] is None:
+            continue
+        group_id, subpattern = clause_value
+        char_class = matched_char_class(subpattern, flags)
+        if char_class is not None and not char_class - URL_SAFE_CHARACTERS:
+            args.add(pattern_reverse_groupdict.get(group_id, '_%d' % (group_id - 1)))
+    return frozenset(args)
+
+
 def parse_at(clause, context):
     """
     >>> re.sre_parse.parse('^$')
@@ -30,6 +321,16 @@ def parse_at(clause, context):
     yield '', [], []
 
 
+def parse_assert(clause, context):
+    """
+    Lookarounds do not consume anything, like Django's `regex_helper.normalize` they are ignored.
+
+    >>> re.sre_parse.parse('(?!a)')
+    [('assert_not', (1, [('literal', 97)]))]
+    """
+    yield '', [], []
+
+
 def parse_any(clause, context):
     """
     >>> re.sre_parse.parse('.')
@@ -47,7 +348,7 @@ def parse_branch(clause, context):
 def parse_groupref(clause, context):
     group_id = clause
     group_name = context.pattern_reverse_groupdict.get(group_id, '_%d' % (group_id - 1))
-    yield '%%(%s)s' % group_name, [], [group_name]
+    yield Slot(group_name), [], [group_name]
 
 
 def parse_in(clause, context):
@@ -59,20 +360,7 @@ def parse_in(clause, context):
     in_clause_type, in_clause_value = clause[0]
     if in_clause_type == NEGATE:
         # e.g. ('negate', None)
-        candidate_ascii = set(ALLOWED_URL_CHARACTERS)
-        for in_clause_type, in_clause_value in clause[1:]:
-            if in_clause_type == RANGE:
-                candidate_ascii -= set(map(chr, range(in_clause_value[0], in_clause_value[1] + 1)))
-            elif in_clause_type == CATEGORY:
-                try:
-                    candidate_ascii -= CATEGORY_MAP[in_clause_value].char_set
-                except KeyError:
-                    raise NotImplementedError(
-                        '%s category is not supported in character classes.' % in_clause_value)
-            else:
-                assert in_clause_type == 'literal'
-                candidate_ascii.discard(chr(in_clause_value))
-        yield min(candidate_ascii), [], []
+        yield min_url_character(clause), [], []
     elif in_clause_type == LITERAL:
         # e.g. ('literal', 97)
         yield from parse_literal(in_clause_value, context)
@@ -99,9 +387,7 @@ def parse_not_literal(clause, context):
     >>> re.sre_parse.parse('[^a]')
     [('not_literal', 97)]
     """
-    candidate_ascii = set(ALLOWED_URL_CHARACTERS)
-    candidate_ascii.discard(chr(clause))
-    yield min(candidate_ascii), [], []
+    yield min_url_character([(NEGATE, None), (LITERAL, clause)]), [], []
 
 
 def parse_max_repeat(clause, context):
@@ -110,14 +396,14 @@ def parse_max_repeat(clause, context):
     [('max_repeat', (3, 5, [('literal', 97)]))]
     """
     min_repeat, max_repeat, subpattern = clause
-    repeat = min_repeat
-    if repeat == 0:
+    count = min_repeat
+    if count == 0:
         yield '', [], []
         assert max_repeat > 0
-        repeat = 1
-    for format_string, args, refs in _normalize(subpattern, context):
+        count = 1
+    for segment, args, refs in _normalize(subpattern, context):
         if not min_repeat == 0 or args or refs:
-            yield format_string * repeat, args, refs
+            yield repeat(segment, count), args, refs
 
 
 def parse_subpattern(clause, context):
@@ -134,7 +420,7 @@ def parse_subpattern(clause, context):
             group_name = context.pattern_reverse_groupdict[group_id]
             if group_name[0] == '_' and group_name[1:].isdigit():
                 raise ValueError('Group name cannot have format `_\\d+`')
-            yield '%%(%s)s' % group_name, [group_name], []
+            yield Slot(group_name), [group_name], []
         elif not context.in_unnamed_group:
             # unnamed groups not inside another unnamed group
             # format strings cannot have unnamed groups nested because there is no way to provide
@@ -142,7 +428,7 @@ def parse_subpattern(clause, context):
 
             group_name = '_%d' % (group_id - 1)  # unnamed groups are counted from 0 rather then 1
             context = context._replace(in_unnamed_group=True)
-            yield '%%(%s)s' % group_name, [group_name], []
+            yield Slot(group_name), [group_name], []
 
     for format_strings, args, refs in _normalize(subpattern, context):
         if args or group_id is None:
@@ -151,6 +437,8 @@ def parse_subpattern(clause, context):
 
 DISPATCH_TABLE = {
     ANY: parse_any,
+    ASSERT: parse_assert,
+    ASSERT_NOT: parse_assert,
     AT: parse_at,
     BRANCH: parse_branch,
     GROUPREF: parse_groupref,
@@ -181,16 +469,25 @@ def normalize_list(pattern):
 
 
 def normalize(pattern):
-    pattern_parse_tree = re.sre_parse.parse(pattern)
+    cache = {}
+    for segment, args in normalize_segments(pattern):
+        yield flatten(segment, cache), args
+
+
+def normalize_segments(pattern):
+    """
+    Like `normalize`, but yields candidates as segments instead of format strings.
+    """
+    pattern_parse_tree = parse_pattern(pattern)
     pattern_groupdict = pattern_parse_tree.pattern.groupdict
     pattern_reverse_groupdict = reverse_groupdict(pattern_groupdict)
-    for format_string, args, refs in _normalize(pattern_parse_tree,
-                                                Context(pattern_reverse_groupdict, False)):
+    for segment, args, refs in _normalize(pattern_parse_tree,
+                                          Context(pattern_reverse_groupdict, False)):
         unresolved_refs = set(refs)
         for arg in args:
             unresolved_refs.discard(arg)
         if not unresolved_refs:
-            yield format_string, args
+            yield segment, args
 
 
 def _normalize(pattern_parse_tree, context):
@@ -200,7 +497,7 @@ def _normalize(pattern_parse_tree, context):
         args = unique_list(args)
         refs = sum((f[2] for f in format_strings), [])
         refs = list(set(refs))
-        yield ''.join(f[0] for f in format_strings), args, refs
+        yield concat(f[0] for f in format_strings), args, refs
 
 
 def dispatch_clause(clause, context):
@@ -210,3 +507,137 @@ def dispatch_clause(clause, context):
     clause_type, clause_value = clause
     yield from DISPATCH_TABLE[clause_type](clause_value, context)
 
+
+
+# Clauses matching exactly one string, they can be factored out of alternatives without reordering candidates.
+SINGLE_STRING_CLAUSES = {ANY, AT, IN, LITERAL, NOT_LITERAL}
+
+
+def parse_pattern(pattern):
+    """
+    Parses `pattern` and returns its simplified parse tree.
+    """
+    pattern_parse_tree, _ = simplify(re.sre_parse.parse(pattern))
+    return pattern_parse_tree
+
+
+def simplify(pattern_parse_tree):
+    """
+    Rewrites a parse tree into an equivalent tree without redundant clauses.
+
+    Non-capturing groups and `{1}` repeats are spliced into the enclosing clauses, single character classes
+    become literals, repeated anchors are dropped and clauses shared by the start of all alternatives are moved
+    in front of the branch. Returns the new tree and the number of nodes removed.
+
+    >>> simplify(re.sre_parse.parse('(?:[a]){1}b|ac'))
+    ([('literal', 97), ('branch', (None, [[('literal', 98)], [('literal', 99)]]))], 3)
+    """
+    simplified = _subpattern(pattern_parse_tree, _simplify(pattern_parse_tree, pattern_parse_tree))
+    return simplified, count_nodes(pattern_parse_tree) - count_nodes(simplified)
+
+
+def count_nodes(parse_tree):
+    """
+    Counts the clauses of a parse tree, including nested ones and the members of character classes.
+    """
+    count = 0
+    for clause_type, clause_value in parse_tree:
+        count += 1
+        if clause_type == IN:
+            count += len(clause_value)
+        for subpattern in _subpatterns(clause_type, clause_value):
+            count += count_nodes(subpattern)
+    return count
+
+
+def iter_clauses(parse_tree, depth=0):
+    """
+    Yields (clause_type, clause_value, depth) for every clause of a parse tree, depth first.
+    `depth` is the number of groups the clause is nested in.
+    """
+    for clause_type, clause_value in parse_tree:
+        yield clause_type, clause_value, depth
+        for subpattern in _subpatterns(clause_type, clause_value):
+            yield from iter_clauses(subpattern, depth + 1 if clause_type == SUBPATTERN else depth)
+
+
+def _subpatterns(clause_type, clause_value):
+    if clause_type == SUBPATTERN or clause_type == ASSERT or clause_type == ASSERT_NOT:
+        return [clause_value[1]]
+    if clause_type == MAX_REPEAT or clause_type == MIN_REPEAT:
+        return [clause_value[2]]
+    if clause_type == BRANCH:
+        return clause_value[1]
+    return []
+
+
+def _subpattern(pattern_parse_tree, data):
+    return type(pattern_parse_tree)(pattern_parse_tree.pattern, data)
+
+
+def _append(simplified, clause):
+    if clause[0] == AT and simplified and simplified[-1] == clause:
+        # anchors do not consume anything, the same anchor twice in a row is always redundant
+        return
+    simplified.append(clause)
+
+
+def _simplify(parse_tree, root):
+    simplified = []
+    for clause_type, clause_value in parse_tree:
+        if clause_type == SUBPATTERN:
+            group_id, subpattern = clause_value
+            subpattern = _simplify(subpattern, root)
+            if group_id is None:
+                for clause in subpattern:
+                    _append(simplified, clause)
+                continue
+            clause_value = group_id, _subpattern(root, subpattern)
+        elif clause_type == MAX_REPEAT or clause_type == MIN_REPEAT:
+            min_repeat, max_repeat, subpattern = clause_value
+            subpattern = _simplify(subpattern, root)
+            if min_repeat == max_repeat == 1:
+                for clause in subpattern:
+                    _append(simplified, clause)
+                continue
+            clause_value = min_repeat, max_repeat, _subpattern(root, subpattern)
+        elif clause_type == ASSERT or clause_type == ASSERT_NOT:
+            direction, subpattern = clause_value
+            clause_value = direction, _subpattern(root, _simplify(subpattern, root))
+        elif clause_type == IN:
+            clause_type, clause_value = _simplify_in(clause_value)
+        elif clause_type == BRANCH:
+            _, subpatterns = clause_value
+            subpatterns = [_simplify(subpattern, root) for subpattern in subpatterns]
+            for clause in _common_prefix(subpatterns):
+                _append(simplified, clause)
+            clause_value = None, [_subpattern(root, subpattern) for subpattern in subpatterns]
+        _append(simplified, (clause_type, clause_value))
+    return simplified
+
+
+def _simplify_in(clause):
+    if len(clause) == 1:
+        in_clause_type, in_clause_value = clause[0]
+        if in_clause_type == LITERAL:
+            return LITERAL, in_clause_value
+        if in_clause_type == RANGE and in_clause_value[0] == in_clause_value[1]:
+            return LITERAL, in_clause_value[0]
+    elif len(clause) == 2 and clause[0][0] == NEGATE and clause[1][0] == LITERAL:
+        return NOT_LITERAL, clause[1][1]
+    return IN, clause
+
+
+def _common_prefix(subpatterns):
+    """
+    Removes the clauses all `subpatterns` start with and returns them.
+    """
+    prefix = []
+    while all(subpatterns):
+        clause = subpatterns[0][0]
+        if clause[0] not in SINGLE_STRING_CLAUSES or any(subpattern[0] != clause for subpattern in subpatterns):
+            break
+        prefix.append(clause)
+        for subpattern in subpatterns:
+            del subpattern[0]
+    return prefix
@@ -0,0 +1,276 @@
+"""
+Resolve of many paths at once, e.g. to count the requests of every url in access logs.
+
+Paths are resolved in chunks by a pool of processes, each with a PrefixTable of the urlconf built before the pool
+forks. The PrefixTable keeps every url reachable from the root resolver with the literal prefix all its paths
+start with, so a path is only matched against the urls whose prefix it starts with, level by level like the
+resolvers do, in urlconf order. Paths repeat a lot in access logs, the results of the most recently seen paths are
+kept in an LRUCache and only the other paths are sent to the pool.
+
+    resolver = BulkResolver(processes=8)
+    counts = RouteCounts()
+    with open('paths.txt', encoding='utf-8') as f:
+        for path, resolution in resolver.resolve_paths(read_paths(f)):
+            counts.add(resolution)
+
+    python manage.py bulk_resolve paths.txt --processes 8 > routes.jsonl
+"""
+from collections import deque, namedtuple
+import heapq
+from multiprocessing import Pool
+import os
+import re
+from urllib.parse import unquote
+
+from django.core.urlresolvers import RegexURLResolver, get_resolver
+
+from .adaptive_order import position_classes
+from .better_regex_parser import parse_pattern
+from .bulk_reverse import batches
+from .lru import LRUCache
+from .master_regex import MasterRoute, resolve_route
+from .prefilter import BEGINNING_ANCHORS
+
+DEFAULT_CACHE_SIZE = 65536
+DEFAULT_CHUNK_SIZE = 4096
+DEFAULT_MAX_VALUES = 100
+# chunks sent to the pool ahead of the results written, per process
+PENDING_CHUNKS = 2
+MAX_PREFIX = 64
+
+Resolution = namedtuple('Resolution', ('view_name', 'args', 'kwargs'))
+Resolution.__doc__ = """
+The `view_name` (`namespace:name`, or the dotted path of the view for urls without a name), args and kwargs of
+a resolved path.
+"""
+
+# cached result of the paths that do not resolve
+NOT_FOUND = False
+
+
+def read_paths(lines):
+    """
+    Yields the path of every non-empty line of `lines`, without query string and unquoted like PATH_INFO.
+    """
+    for line in lines:
+        path = line.strip()
+        if path:
+            yield unquote(path.split('?', 1)[0])
+
+
+def literal_prefix(pattern, limit=MAX_PREFIX):
+    """
+    Returns the characters every match of `pattern` starts with, and whether the match is always exactly them.
+
+    >>> literal_prefix(r'^blog/(?P<slug>[-\\w]+)/$')
+    ('blog/', False)
+    """
+    parse_tree = parse_pattern(pattern)
+    if not parse_tree or parse_tree[0] not in BEGINNING_ANCHORS or \
+            parse_tree.pattern.flags & (re.IGNORECASE | re.LOCALE | re.MULTILINE):
+        return '', False
+    classes, complete = position_classes(parse_tree, parse_tree.pattern.flags, limit)
+    chars = []
+    for char_class in classes:
+        intervals = char_class.intervals
+        if len(intervals) != 1 or intervals[0][0] != intervals[0][1]:
+            return ''.join(chars), False
+        chars.append(chr(intervals[0][0]))
+    return ''.join(chars), complete
+
+
+def route_prefix(resolvers, url_pattern):
+    """
+    Returns the characters every path matched by `url_pattern`, reached through the includes `resolvers`, starts
+    with.
+    """
+    chunks = []
+    for level in resolvers + [url_pattern]:
+        prefix, complete = literal_prefix(level.regex.pattern)
+        chunks.append(prefix)
+        if not complete:
+            break
+    return ''.join(chunks)
+
+
+def _chains(url_patterns, resolvers):
+    for url_pattern in url_patterns:
+        if isinstance(url_pattern, RegexURLResolver):
+            yield from _chains(url_pattern.url_patterns, resolvers + [url_pattern])
+        else:
+            yield resolvers, url_pattern
+
+
+class PrefixTable:
+    """
+    The urls reachable from `resolver` by the literal prefix of their paths.
+    """
+
+    def __init__(self, resolver):
+        self.routes = []
+        # positions of the urls in self.routes by literal prefix
+        self.by_prefix = {}
+        for resolvers, url_pattern in _chains(resolver.url_patterns, [resolver]):
+            try:
+                prefix = route_prefix(resolvers, url_pattern)
+            except (re.error, NotImplementedError):
+                # invalid patterns fail when they are matched, like with the resolvers
+                prefix = ''
+            self.by_prefix.setdefault(prefix, []).append(len(self.routes))
+            # compile the regexes now, so that the processes of a pool share them
+            for level in resolvers + [url_pattern]:
+                level.regex
+            self.routes.append(MasterRoute(url_pattern, resolvers, None))
+        self.max_prefix = max(len(prefix) for prefix in self.by_prefix) if self.by_prefix else 0
+
+    def candidates(self, path):
+        """
+        Yields the positions of the urls whose literal prefix starts `path`, in urlconf order.
+        """
+        by_prefix = self.by_prefix
+        positions = [by_prefix[path[:length]] for length in range(min(len(path), self.max_prefix) + 1)
+                     if path[:length] in by_prefix]
+        return positions[0] if len(positions) == 1 else heapq.merge(*positions)
+
+    def resolve(self, path):
+        """
+        Returns the ResolverMatch of the first url matching `path`, or None.
+        """
+        routes = self.routes
+        for position in self.candidates(path):
+            resolver_match = resolve_route(routes[position], path)
+            if resolver_match is not None:
+                return resolver_match
+        return None
+
+
+# PrefixTable of the pool processes, inherited from the parent process when it forks
+_table = None
+
+
+def _init_process(urlconf):
+    global _table
+    if _table is None:
+        _table = PrefixTable(get_resolver(urlconf))
+
+
+def _resolution(resolver_match):
+    if resolver_match is None:
+        return None
+    return Resolution(resolver_match.view_name, resolver_match.args, resolver_match.kwargs)
+
+
+def _resolve_chunk(paths):
+    resolve = _table.resolve
+    return [_resolution(resolve(path)) for path in paths]
+
+
+class BulkResolver:
+    """
+    Resolves paths against `urlconf` (ROOT_URLCONF by default) with `processes` processes (as many as CPUs when
+    None, none but the current one when 1), remembering the results of the last `cache_size` distinct paths.
+    """
+
+    def __init__(self, urlconf=None, processes=None, cache_size=DEFAULT_CACHE_SIZE, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.urlconf = urlconf
+        self.processes = processes
+        self.cache = LRUCache(cache_size)
+        self.chunk_size = chunk_size
+        self.hits = 0
+        self.misses = 0
+
+    def _prepare(self, chunk):
+        """
+        Returns the results of the paths of `chunk` found in the cache and the distinct other paths.
+        """
+        known = {}
+        unknown = []
+        for path in chunk:
+            if path in known:
+                self.hits += 1
+                continue
+            resolution = self.cache.get(path)
+            if resolution is None:
+                self.misses += 1
+                known[path] = None
+                unknown.append(path)
+            else:
+                self.hits += 1
+                known[path] = resolution
+        return known, unknown
+
+    def _finish(self, chunk, known, unknown, resolutions):
+        for path, resolution in zip(unknown, resolutions):
+            self.cache.add(path, NOT_FOUND if resolution is None else resolution)
+            known[path] = resolution
+        for path in chunk:
+            resolution = known[path]
+            yield path, None if resolution is NOT_FOUND else resolution
+
+    def resolve_paths(self, paths):
+        """
+        Yields (path, Resolution or None) for every path of `paths`, in order.
+        """
+        global _table
+        _table = PrefixTable(get_resolver(self.urlconf))
+        chunks = batches(paths, self.chunk_size)
+        if self.processes == 1:
+            for chunk in chunks:
+                known, unknown = self._prepare(chunk)
+                yield from self._finish(chunk, known, unknown, _resolve_chunk(unknown))
+            return
+
+        processes = self.processes or os.cpu_count() or 1
+        with Pool(processes, _init_process, (self.urlconf,)) as pool:
+            pending = deque()
+            max_pending = PENDING_CHUNKS * processes
+            for chunk in chunks:
+                known, unknown = self._prepare(chunk)
+                pending.append((chunk, known, unknown, pool.apply_async(_resolve_chunk, (unknown,))))
+                if len(pending) >= max_pending:
+                    chunk, known, unknown, result = pending.popleft()
+                    yield from self._finish(chunk, known, unknown, result.get())
+            while pending:
+                chunk, known, unknown, result = pending.popleft()
+                yield from self._finish(chunk, known, unknown, result.get())
+
+
+class RouteCounts:
+    """
+    Number of paths resolved to every url, and of every value of their kwargs, up to `max_values` distinct values
+    per argument.
+    """
+
+    def __init__(self, max_values=DEFAULT_MAX_VALUES):
+        self.max_values = max_values
+        self.counts = {}
+        self.values = {}
+        self.dropped = {}
+
+    def add(self, resolution):
+        view_name = None if resolution is None else resolution.view_name
+        self.counts[view_name] = self.counts.get(view_name, 0) + 1
+        if resolution is None:
+            return
+        route_values = self.values.setdefault(view_name, {})
+        for name, value in resolution.kwargs.items():
+            # extra arguments of the url can be of any type
+            value = value if isinstance(value, str) else repr(value)
+            values = route_values.setdefault(name, {})
+            if value in values or len(values) < self.max_values:
+                values[value] = values.get(value, 0) + 1
+            else:
+                dropped = self.dropped.setdefault(view_name, {})
+                dropped[name] = dropped.get(name, 0) + 1
+
+    def records(self):
+        """
+        Yields a dict per url, the most requested first, `route` is None for the paths that do not resolve.
+        """
+        for view_name, count in sorted(self.counts.items(), key=lambda item: (-item[1], item[0] or '')):
+            yield {
+                'route': view_name,
+                'count': count,
+                'kwargs': self.values.get(view_name, {}),
+                'dropped': self.dropped.get(view_name, {}),
+            }
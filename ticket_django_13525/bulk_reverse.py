@@ -0,0 +1,176 @@
+"""
+Reverse of one url pattern for many sets of arguments, e.g. for sitemaps and feeds.
+
+`reverse()` looks up the candidates of the pattern and checks their arguments on every call. Which candidates
+can be used only depends on the names of the arguments, so here they are selected once per distinct set of names
+and every url only has to be formatted and, like `reverse()` does, checked against the pattern. The values of the
+`delimited_groups` are checked one by one by their `argument_validators` first, so that bad values are rejected
+without formatting the url, and the values of the `quote_free_args` they validate, like int values, are not quoted.
+
+    reverser = BulkReverser.for_url_name('article')
+    with open('sitemap.txt', 'w') as f:
+        write_urls(f, reverser.reverse_columns({'year': years, 'slug': slugs}))
+"""
+from collections import namedtuple
+from itertools import islice
+import re
+from urllib.parse import quote
+
+from django.core.urlresolvers import NoReverseMatch
+
+from .better_regex_parser import normalize_list, parse_pattern, quote_free_args
+from .url_corpus import SAFE_CHARACTERS, WRITE_BATCH, write_urls
+from .validators import argument_validators, delimited_groups
+
+# candidates usable for a set of argument names, as (format string, checks, quoted arguments, url format string,
+# arguments) where checks are the (argument, validator, stop character) of the delimited groups and the url format
+# string has its literal text quoted, and the defaults that must not be overridden
+Selection = namedtuple('Selection', ('candidates', 'defaults'))
+
+PLACEHOLDER = re.compile(r'(%\(\w+\)s)')
+
+
+def quote_literals(format_string):
+    """
+    Quotes the text of `format_string` around its `%(name)s` placeholders, like `reverse()` quotes the whole url.
+
+    >>> quote_literals('zażółć/%(x)s')
+    'za%%C5%%BC%%C3%%B3%%C5%%82%%C4%%87/%(x)s'
+    """
+    return ''.join(chunk if i % 2 else quote(chunk, SAFE_CHARACTERS).replace('%', '%%')
+                   for i, chunk in enumerate(PLACEHOLDER.split(format_string)))
+
+
+class BulkReverser:
+    """
+    Reverses `pattern` for many kwargs dicts.
+
+    `candidates` is the output of `normalize(pattern)`, computed when not given. Without `pattern`
+    the urls are not checked against it, which is faster but lets through arguments the pattern does not match.
+    `defaults` are the extra arguments of the url, as in `url(pattern, view, defaults)`.
+    """
+
+    def __init__(self, pattern=None, candidates=None, defaults=None, prefix='/'):
+        if candidates is None:
+            if pattern is None:
+                raise ValueError('Either a pattern or its candidates are needed.')
+            candidates = normalize_list(pattern)
+        self.pattern = pattern
+        self.candidates = [(format_string, frozenset(args)) for format_string, args in candidates]
+        self.defaults = defaults or {}
+        self.prefix = quote(prefix, SAFE_CHARACTERS)
+        self.regex = re.compile('^%s' % pattern, re.UNICODE) if pattern is not None else None
+        self.checks = []
+        self.quote_free = frozenset()
+        if pattern is not None:
+            validators = argument_validators(pattern)
+            for arg, stop in delimited_groups(parse_pattern(pattern)):
+                if arg not in validators:
+                    break
+                self.checks.append((arg, validators[arg], stop))
+            self.quote_free = quote_free_args(pattern)
+        self.selections = {}
+
+    @classmethod
+    def for_url_name(cls, name, urlconf=None):
+        """
+        Reverser for the url named `name` in `urlconf` (ROOT_URLCONF by default), under the current script prefix.
+        """
+        from django.core.urlresolvers import get_script_prefix
+
+        from .urlconf import root_routes
+
+        for route in root_routes(urlconf):
+            if route.name == name:
+                return cls(route.pattern, defaults=route.default_args, prefix=get_script_prefix())
+        raise NoReverseMatch("Reverse for '%s' not found." % name)
+
+    def select(self, keys):
+        """
+        Returns the Selection for the argument names `keys`, a frozenset.
+        """
+        try:
+            return self.selections[keys]
+        except KeyError:
+            pass
+        default_keys = frozenset(self.defaults)
+        candidates = [self._candidate(format_string, args) for format_string, args in self.candidates
+                      if keys | default_keys == args | default_keys]
+        selection = self.selections[keys] = Selection(
+            candidates, [(key, value) for key, value in self.defaults.items() if key in keys])
+        return selection
+
+    def _candidate(self, format_string, args):
+        url_format = quote_literals(format_string)
+        all_args = tuple(sorted(args))
+        checks = tuple(check for check in self.checks if check[0] in args)
+        checked = frozenset(arg for arg, _, _ in checks)
+        # validated values of quote free arguments only have characters quote() keeps
+        quoted = tuple(arg for arg in all_args if arg not in checked or arg not in self.quote_free)
+        return format_string, checks, quoted, url_format, all_args
+
+    def _reverse(self, selection, kwargs):
+        for key, value in selection.defaults:
+            if kwargs[key] != value:
+                break
+        else:
+            text_kwargs = {key: str(value) for key, value in kwargs.items()}
+            for format_string, checks, quoted, url_format, args in selection.candidates:
+                # fail on the first bad value
+                rejected = False
+                for arg, validator, stop in checks:
+                    value = text_kwargs[arg]
+                    if stop is not None and stop in value:
+                        # the group may only match the start of the value, the whole url tells
+                        quoted = args
+                        break
+                    if not validator(value):
+                        rejected = True
+                        break
+                if rejected or self.regex is not None and not self.regex.search(format_string % text_kwargs):
+                    continue
+                values = dict(text_kwargs)
+                for arg in quoted:
+                    # str() of an int is made of digits and `-`
+                    if type(kwargs[arg]) is not int:
+                        values[arg] = quote(values[arg], SAFE_CHARACTERS)
+                url = self.prefix + url_format % values
+                # scheme relative urls are not allowed
+                if url.startswith('//'):
+                    url = '/%%2F%s' % url[2:]
+                return url
+        raise NoReverseMatch("Reverse for %r with keyword arguments '%s' not found." % (self.pattern, kwargs))
+
+    def reverse(self, kwargs):
+        return self._reverse(self.select(frozenset(kwargs)), kwargs)
+
+    def reverse_all(self, kwargs_iterable):
+        """
+        Yields the url of every kwargs dict.
+        """
+        selections = self.selections
+        for kwargs in kwargs_iterable:
+            keys = frozenset(kwargs)
+            selection = selections.get(keys) or self.select(keys)
+            yield self._reverse(selection, kwargs)
+
+    def reverse_columns(self, columns):
+        """
+        Yields the url of every row of `columns`, a dict of equally long sequences keyed by argument name.
+        """
+        names = list(columns)
+        selection = self.select(frozenset(names))
+        for row in zip(*[columns[name] for name in names]):
+            yield self._reverse(selection, dict(zip(names, row)))
+
+
+def batches(urls, size=WRITE_BATCH):
+    """
+    Yields lists of at most `size` urls.
+    """
+    urls = iter(urls)
+    while True:
+        batch = list(islice(urls, size))
+        if not batch:
+            return
+        yield batch
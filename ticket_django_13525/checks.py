@@ -0,0 +1,70 @@
+"""
+System checks for the urlconf, run by `manage.py check` and on startup.
+"""
+import re
+
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+
+from .estimate import estimate
+from .shadowing import shadowed_routes
+from .urlconf import root_routes
+
+# (candidates, cost) above which a pattern gets a warning or an error
+DEFAULT_NORMALIZATION_WARNING = (1024, 10 ** 5)
+DEFAULT_NORMALIZATION_ERROR = (65536, 10 ** 7)
+# searches timed per example path for the wasted time of a dead url
+SHADOWED_REPEAT = 10
+
+
+def _thresholds():
+    return (getattr(settings, 'URL_NORMALIZATION_WARNING', DEFAULT_NORMALIZATION_WARNING),
+            getattr(settings, 'URL_NORMALIZATION_ERROR', DEFAULT_NORMALIZATION_ERROR))
+
+
+@register('urls')
+def check_normalization_cost(app_configs=None, **kwargs):
+    """
+    Flags the patterns whose estimated normalization cost is above the URL_NORMALIZATION_WARNING or
+    URL_NORMALIZATION_ERROR (candidates, cost) thresholds.
+    """
+    warning, error = _thresholds()
+    messages = []
+    for route in root_routes():
+        try:
+            route_estimate = estimate(route.pattern)
+        except (re.error, RuntimeError):
+            # invalid patterns are reported by Django itself
+            continue
+        if route_estimate.candidates > error[0] or route_estimate.cost > error[1]:
+            message_class, message_id = Error, 'ticket_django_13525.E001'
+        elif route_estimate.candidates > warning[0] or route_estimate.cost > warning[1]:
+            message_class, message_id = Warning, 'ticket_django_13525.W001'
+        else:
+            continue
+        messages.append(message_class(
+            'Pattern %r (url %r) normalizes to up to %d candidates, at a cost of %d clause expansions.'
+            % (route.pattern, route.name, route_estimate.candidates, route_estimate.cost),
+            hint='Most candidates come from %s, one of %d clauses multiplying them. '
+                 'Optional groups multiply the candidates, consider splitting the url.'
+                 % (route_estimate.offender, route_estimate.factors),
+            obj=route.pattern,
+            id=message_id,
+        ))
+    return messages
+
+
+@register('urls')
+def check_shadowed_routes(app_configs=None, **kwargs):
+    """
+    Flags the urls that can never match because an earlier url matches all their paths.
+    """
+    return [Warning(
+        'Url %r (pattern %r) can never match, every path it matches is matched first by url %r (pattern %r).'
+        % (shadowed.route.name, shadowed.route.pattern, shadowed.shadowed_by.name, shadowed.shadowed_by.pattern),
+        hint='Its regex still runs on every request reaching it, about %.2f us each. '
+             'Remove the url or move it before %r.'
+             % (shadowed.wasted_seconds * 10 ** 6, shadowed.shadowed_by.name),
+        obj=shadowed.route.pattern,
+        id='ticket_django_13525.W002',
+    ) for shadowed in shadowed_routes(repeat=SHADOWED_REPEAT)]
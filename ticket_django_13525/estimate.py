@@ -0,0 +1,128 @@
+"""
+Static estimate of the cost of normalizing a pattern, computed from its parse tree without expanding it.
+
+The candidate count follows the rules `normalize` expands clauses with: the candidates of a sequence are
+multiplied, those of alternatives are added, an optional subpattern or a group adds the candidates of its
+content that have arguments. Inner candidates dropped by `normalize` for other reasons are still counted,
+so the estimate is an upper bound.
+"""
+from collections import namedtuple
+from sre_constants import BRANCH, GROUPREF, MAX_REPEAT, MAXREPEAT, MIN_REPEAT, SUBPATTERN
+
+from .better_regex_parser import count_nodes, iter_clauses, parse_pattern, reverse_groupdict
+from .group_index import GroupSpanIndex
+
+Estimate = namedtuple('Estimate', ('candidates', 'cost', 'offender', 'factors'))
+Estimate.__doc__ = """
+`cost` is the number of clause expansions (candidates times clauses), `offender` describes the clause that
+multiplies the candidates the most and `factors` is the number of clauses multiplying them next to it.
+"""
+
+
+def _estimate(parse_tree, named_groups, in_unnamed_group):
+    """
+    Returns (candidates, has arguments) of a parse tree.
+    """
+    candidates = 1
+    has_args = False
+    for clause_type, clause_value in parse_tree:
+        clause_candidates, clause_has_args = _estimate_clause(clause_type, clause_value, named_groups,
+                                                              in_unnamed_group)
+        candidates *= clause_candidates
+        has_args = has_args or clause_has_args
+    return candidates, has_args
+
+
+def _estimate_clause(clause_type, clause_value, named_groups, in_unnamed_group):
+    if clause_type == BRANCH:
+        candidates, has_args = 0, False
+        for subpattern in clause_value[1]:
+            subpattern_candidates, subpattern_has_args = _estimate(subpattern, named_groups, in_unnamed_group)
+            candidates += subpattern_candidates
+            has_args = has_args or subpattern_has_args
+        return candidates, has_args
+    if clause_type == MAX_REPEAT or clause_type == MIN_REPEAT:
+        min_repeat, _, subpattern = clause_value
+        candidates, has_args = _estimate(subpattern, named_groups, in_unnamed_group)
+        if min_repeat == 0:
+            # the empty string, and the candidates with arguments
+            return 1 + (candidates if has_args else 0), has_args
+        return candidates, has_args
+    if clause_type == SUBPATTERN:
+        group_id, subpattern = clause_value
+        if group_id is None:
+            return _estimate(subpattern, named_groups, in_unnamed_group)
+        slot = group_id in named_groups or not in_unnamed_group
+        candidates, has_args = _estimate(subpattern, named_groups,
+                                         in_unnamed_group or group_id not in named_groups)
+        # the argument itself, and the candidates of its content that have arguments
+        return int(slot) + (candidates if has_args else 0), slot or has_args
+    if clause_type == GROUPREF:
+        return 1, True
+    return 1, False
+
+
+def _quantifier(min_repeat, max_repeat):
+    if max_repeat == MAXREPEAT:
+        return {0: '*', 1: '+'}.get(min_repeat, '{%d,}' % min_repeat)
+    if (min_repeat, max_repeat) == (0, 1):
+        return '?'
+    return '{%d,%d}' % (min_repeat, max_repeat)
+
+
+def describe_clause(clause_type, clause_value, index):
+    """
+    Short description of a clause, quoting the pattern text of the first group it contains.
+    """
+    group_text = None
+    for inner_type, inner_value, _ in iter_clauses([(clause_type, clause_value)]):
+        if inner_type == SUBPATTERN and inner_value[0] in index.by_number:
+            group_text = index.text(index.by_number[inner_value[0]])
+            break
+    if clause_type == BRANCH:
+        description = 'alternation of %d branches' % len(clause_value[1])
+        return description + (' containing `%s`' % group_text if group_text else '')
+    if clause_type == MAX_REPEAT or clause_type == MIN_REPEAT:
+        quantifier = _quantifier(clause_value[0], clause_value[1])
+        if group_text:
+            return '`%s%s`' % (group_text, quantifier) if len(clause_value[2]) == 1 else \
+                'repeat%s containing `%s`' % (quantifier, group_text)
+        return 'repeat%s' % quantifier
+    if group_text:
+        return '`%s`' % group_text
+    return str(clause_type).lower()
+
+
+def _offender(parse_tree, named_groups, in_unnamed_group):
+    """
+    Returns the clause multiplying the candidates of `parse_tree` the most and the number of clauses that
+    multiply them, descending into groups and repeats that hold all of them.
+    """
+    while True:
+        factors = [(_estimate_clause(clause_type, clause_value, named_groups, in_unnamed_group)[0],
+                    (clause_type, clause_value)) for clause_type, clause_value in parse_tree]
+        factors = [(factor, clause) for factor, clause in factors if factor > 1]
+        if not factors:
+            return None, 0
+        factor, (clause_type, clause_value) = max(factors, key=lambda item: item[0])
+        if len(factors) == 1 and clause_type == SUBPATTERN and clause_value[0] is None:
+            parse_tree = clause_value[1]
+        elif len(factors) == 1 and clause_type in (SUBPATTERN, MAX_REPEAT, MIN_REPEAT) and \
+                _estimate(clause_value[-1], named_groups, in_unnamed_group)[0] > 1:
+            if clause_type == SUBPATTERN:
+                in_unnamed_group = in_unnamed_group or clause_value[0] not in named_groups
+            parse_tree = clause_value[-1]
+        else:
+            return (clause_type, clause_value), len(factors)
+
+
+def estimate(pattern):
+    """
+    Returns the Estimate of normalizing `pattern`.
+    """
+    pattern_parse_tree = parse_pattern(pattern)
+    named_groups = reverse_groupdict(pattern_parse_tree.pattern.groupdict)
+    candidates, _ = _estimate(pattern_parse_tree, named_groups, False)
+    clause, factors = _offender(pattern_parse_tree, named_groups, False)
+    offender = describe_clause(clause[0], clause[1], GroupSpanIndex(pattern)) if clause is not None else None
+    return Estimate(candidates, candidates * max(count_nodes(pattern_parse_tree), 1), offender, factors)
@@ -0,0 +1,195 @@
+"""
+Single-pass index of the groups of a regular expression.
+
+Both the prototype grouping code and `regex_parser.GroupNode` need to know where a group starts and ends.
+Instead of re-scanning and slicing the pattern at every nesting level, the pattern is scanned once and
+every group is recorded with its offsets, so that slicing a group or walking its nesting is O(1).
+"""
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+
+CAPTURING = 'capturing'
+NAMED = 'named'
+NON_CAPTURING = 'non-capturing'
+BACKREFERENCE = 'backreference'
+LOOKAHEAD = 'lookahead'
+NEGATIVE_LOOKAHEAD = 'negative-lookahead'
+LOOKBEHIND = 'lookbehind'
+NEGATIVE_LOOKBEHIND = 'negative-lookbehind'
+CONDITIONAL = 'conditional'
+FLAGS = 'flags'
+COMMENT = 'comment'
+
+GroupSpan = namedtuple('GroupSpan', ('start', 'body_start', 'end', 'depth', 'parent', 'name', 'kind', 'number'))
+GroupSpan.__doc__ = """
+A group of the pattern. `start` is the offset of the opening parenthesis, `end` the offset of the closing one
+and `body_start` the offset right after the group prefix (e.g. after `(?P<name>`), so the group body is
+`pattern[body_start:end]`. `parent` is the index of the enclosing group in `GroupSpanIndex.spans` (or None),
+`number` is the capturing group number (or None for groups that do not capture).
+"""
+
+_PREFIX_KINDS = {
+    ':': NON_CAPTURING,
+    '=': LOOKAHEAD,
+    '!': NEGATIVE_LOOKAHEAD,
+    '#': COMMENT,
+}
+
+
+def _group_prefix(pattern, start):
+    """
+    Returns (kind, name, body_start) for the group opened at `start`.
+    """
+    if not pattern.startswith('?', start + 1):
+        return CAPTURING, None, start + 1
+    marker = pattern[start + 2:start + 3]
+    if marker in _PREFIX_KINDS:
+        return _PREFIX_KINDS[marker], None, start + 3
+    if marker == '(':
+        condition_end = pattern.find(')', start + 3)
+        if condition_end == -1:
+            condition_end = len(pattern)
+        return CONDITIONAL, pattern[start + 3:condition_end], condition_end + 1
+    if marker == '<':
+        if pattern.startswith('=', start + 3):
+            return LOOKBEHIND, None, start + 4
+        return NEGATIVE_LOOKBEHIND, None, start + 4
+    if marker == 'P':
+        close = '>' if pattern.startswith('<', start + 3) else ')'
+        name_end = pattern.find(close, start + 4)
+        if name_end == -1:
+            name_end = len(pattern)
+        if close == '>':
+            return NAMED, pattern[start + 4:name_end], name_end + 1
+        return BACKREFERENCE, pattern[start + 4:name_end], name_end
+    return FLAGS, None, start + 2
+
+
+class GroupSpanIndex:
+    """
+    Groups of `pattern` in order of their opening parenthesis.
+
+    Escaped parentheses and parentheses inside character classes are not groups. A closing parenthesis
+    without an opening one (e.g. when indexing the rest of a pattern after a group was opened) is recorded
+    in `unbalanced` rather than treated as an error.
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.spans = []
+        self.children = []
+        self.roots = []
+        self.unbalanced = []
+        self.by_number = {}
+        self.by_name = {}
+        # index of the innermost group containing each offset, -1 outside of any group
+        self._owner = array('l', [-1]) * (len(pattern) + 1)
+        self._scan()
+
+    def _scan(self):
+        pattern = self.pattern
+        length = len(pattern)
+        owner = self._owner
+        stack = []
+        open_spans = {}
+        group_number = 0
+        class_start = None
+        i = 0
+        while i < length:
+            ch = pattern[i]
+            innermost = stack[-1] if stack else -1
+            owner[i] = innermost
+            if ch == '\\':
+                i += 1
+                if i < length:
+                    owner[i] = innermost
+            elif class_start is not None:
+                # `]` right after `[` or `[^` is a literal
+                if ch == ']' and i > class_start:
+                    class_start = None
+            elif ch == '[':
+                class_start = i + 2 if pattern.startswith('^', i + 1) else i + 1
+            elif ch == '(':
+                kind, name, body_start = _group_prefix(pattern, i)
+                number = None
+                if kind in (CAPTURING, NAMED):
+                    group_number += 1
+                    number = group_number
+                index = len(self.spans)
+                open_spans[index] = (i, body_start, len(stack), innermost if stack else None, name, kind, number)
+                self.spans.append(None)
+                self.children.append([])
+                if stack:
+                    self.children[innermost].append(index)
+                else:
+                    self.roots.append(index)
+                stack.append(index)
+                if kind == COMMENT:
+                    # comments are not parsed, skip right to their end
+                    close = pattern.find(')', i)
+                    body_start = close if close != -1 else length
+                # the group prefix cannot contain groups, skip it
+                for j in range(i, min(body_start, length)):
+                    owner[j] = index
+                i = body_start - 1
+            elif ch == ')':
+                if stack:
+                    self._close(stack.pop(), open_spans, i)
+                else:
+                    self.unbalanced.append(i)
+            i += 1
+        while stack:
+            # unterminated groups extend to the end of the pattern
+            self._close(stack.pop(), open_spans, length)
+
+    def _close(self, index, open_spans, end):
+        start, body_start, depth, parent, name, kind, number = open_spans.pop(index)
+        span = self.spans[index] = GroupSpan(start, body_start, end, depth, parent, name, kind, number)
+        if span.number is not None:
+            self.by_number[span.number] = index
+        if span.kind == NAMED:
+            self.by_name[span.name] = index
+
+    def __len__(self):
+        return len(self.spans)
+
+    def __iter__(self):
+        return iter(self.spans)
+
+    def __getitem__(self, index):
+        return self.spans[index]
+
+    def body(self, index):
+        span = self.spans[index]
+        return self.pattern[span.body_start:span.end]
+
+    def text(self, index):
+        """
+        The whole group including its parentheses.
+        """
+        span = self.spans[index]
+        return self.pattern[span.start:span.end + 1]
+
+    def innermost(self, offset):
+        """
+        Index of the innermost group containing `offset`, or None.
+        """
+        index = self._owner[offset]
+        return None if index == -1 else index
+
+    def closing(self, offset):
+        """
+        Offset of the parenthesis that closes the group `offset` is in, or None if it is never closed.
+
+        Outside of any indexed group the first unbalanced closing parenthesis after `offset` is used,
+        which is where a group opened before the indexed text ends.
+        """
+        index = self.innermost(offset)
+        if index is not None:
+            end = self.spans[index].end
+            return end if end < len(self.pattern) else None
+        position = bisect_left(self.unbalanced, offset)
+        if position < len(self.unbalanced):
+            return self.unbalanced[position]
+        return None
@@ -0,0 +1,24 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from ticket_django_13525.resolver_benchmark import compare, compare_resolve, format_resolve_results, format_results
+
+
+class Command(BaseCommand):
+    help = ('Compares populate time and reverse() latency of the stock resolver and BetterRegexURLResolver, '
+            'or with --resolve the resolve() latency of the stock resolver, MasterRegexURLResolver and '
+            'PrefilterURLResolver.')
+
+    option_list = BaseCommand.option_list + (
+        make_option('--routes', default='100,1000,10000', help='Comma separated urlconf sizes.'),
+        make_option('--repeat', type='int', default=3, help='Reverses or resolves of every route.'),
+        make_option('--resolve', action='store_true', default=False, help='Benchmark resolve() instead.'),
+    )
+
+    def handle(self, *args, **options):
+        route_counts = [int(count) for count in options['routes'].split(',')]
+        if options['resolve']:
+            self.stdout.write(format_resolve_results(compare_resolve(route_counts, options['repeat'])))
+        else:
+            self.stdout.write(format_results(compare(route_counts, options['repeat'])))
@@ -0,0 +1,55 @@
+import json
+from optparse import make_option
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ticket_django_13525.bulk_resolve import DEFAULT_CACHE_SIZE, DEFAULT_CHUNK_SIZE, DEFAULT_MAX_VALUES, \
+    BulkResolver, RouteCounts, read_paths
+from ticket_django_13525.url_corpus import write_urls
+
+
+class Command(BaseCommand):
+    args = '<paths file or ->'
+    help = ('Resolves the paths of a file (or stdin), one per line, and writes the number of paths and kwargs values '
+            'of every url of ROOT_URLCONF as JSON lines.')
+
+    option_list = BaseCommand.option_list + (
+        make_option('--processes', type='int', default=None, help='Resolving processes (as many as CPUs by default).'),
+        make_option('--chunk-size', type='int', default=DEFAULT_CHUNK_SIZE, help='Paths sent to a process at once.'),
+        make_option('--cache-size', type='int', default=DEFAULT_CACHE_SIZE,
+                    help='Distinct paths whose results are remembered.'),
+        make_option('--max-values', type='int', default=DEFAULT_MAX_VALUES,
+                    help='Distinct values counted per argument of a url.'),
+        make_option('--paths', action='store_true', default=False,
+                    help='Write the url and arguments of every path instead, as they are resolved.'),
+        make_option('--urlconf', default=None, help='Urlconf module (ROOT_URLCONF by default).'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError('Usage: bulk_resolve %s' % self.args)
+        resolver = BulkResolver(options['urlconf'], options['processes'], options['cache_size'],
+                                options['chunk_size'])
+        if args[0] == '-':
+            self._write(resolver, read_paths(sys.stdin), options)
+        else:
+            with open(args[0], encoding='utf-8', errors='replace') as f:
+                self._write(resolver, read_paths(f), options)
+
+    def _write(self, resolver, paths, options):
+        resolutions = resolver.resolve_paths(paths)
+        if options['paths']:
+            records = ({
+                'path': path,
+                'route': None if resolution is None else resolution.view_name,
+                'args': [] if resolution is None else resolution.args,
+                'kwargs': {} if resolution is None else resolution.kwargs,
+            } for path, resolution in resolutions)
+        else:
+            counts = RouteCounts(options['max_values'])
+            for _, resolution in resolutions:
+                counts.add(resolution)
+            records = counts.records()
+        write_urls(self.stdout, (json.dumps(record, default=repr) for record in records))
+        self.stderr.write('%d paths resolved, %d from the cache.' % (resolver.hits + resolver.misses, resolver.hits))
@@ -0,0 +1,29 @@
+import json
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from ticket_django_13525.url_profile import format_table, profile_routes
+from ticket_django_13525.urlconf import root_routes
+
+
+class Command(BaseCommand):
+    help = 'Normalizes every pattern of ROOT_URLCONF and prints the routes sorted by normalization time.'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--json', action='store_true', default=False, help='Print the profiles as JSON.'),
+        make_option('--compare-django', action='store_true', default=False,
+                    help="Also time Django's regex_helper.normalize."),
+        make_option('--repeat', type='int', default=3, help='Runs per pattern, the best time is kept.'),
+        make_option('--limit', type='int', default=None, help='Only show the most expensive routes.'),
+        make_option('--urlconf', default=None, help='Urlconf module (ROOT_URLCONF by default).'),
+    )
+
+    def handle(self, *args, **options):
+        profiles = profile_routes(root_routes(options['urlconf']), options['repeat'], options['compare_django'])
+        if options['limit'] is not None:
+            profiles = profiles[:options['limit']]
+        if options['json']:
+            self.stdout.write(json.dumps([profile._asdict() for profile in profiles], indent=2))
+        else:
+            self.stdout.write(format_table(profiles, options['compare_django']))
@@ -0,0 +1,38 @@
+import json
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from ticket_django_13525.shadowing import DEFAULT_REPEAT, shadowed_routes
+
+
+class Command(BaseCommand):
+    help = 'Lists the urls of ROOT_URLCONF that can never match because an earlier url matches all their paths.'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--json', action='store_true', default=False, help='Print the dead urls as JSON.'),
+        make_option('--repeat', type='int', default=DEFAULT_REPEAT,
+                    help='Searches timed per example path, for the wasted time estimates.'),
+        make_option('--urlconf', default=None, help='Urlconf module (ROOT_URLCONF by default).'),
+    )
+
+    def handle(self, *args, **options):
+        shadowed = shadowed_routes(options['urlconf'], options['repeat'])
+        if options['json']:
+            self.stdout.write(json.dumps([{
+                'name': dead.route.name,
+                'pattern': dead.route.pattern,
+                'shadowed_by': dead.shadowed_by.name,
+                'shadowed_by_pattern': dead.shadowed_by.pattern,
+                'wasted_seconds': dead.wasted_seconds,
+            } for dead in shadowed], indent=2))
+            return
+        if not shadowed:
+            self.stdout.write('No dead urls.')
+            return
+        lines = ['%-40s  %-40s  %16s' % ('dead url', 'matched first by', 'wasted us/request')]
+        for dead in shadowed:
+            lines.append('%-40s  %-40s  %16.2f' % ('%s %s' % (dead.route.name, dead.route.pattern),
+                                                    '%s %s' % (dead.shadowed_by.name, dead.shadowed_by.pattern),
+                                                    dead.wasted_seconds * 10 ** 6))
+        self.stdout.write('\n'.join(lines))
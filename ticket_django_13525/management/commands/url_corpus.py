@@ -0,0 +1,53 @@
+from optparse import make_option
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ticket_django_13525.url_corpus import STRATEGIES, SampleValues, generate_urls, route_plans, write_urls
+from ticket_django_13525.urlconf import root_routes
+
+
+class Command(BaseCommand):
+    args = '<output file>'
+    help = 'Writes example urls for every route of ROOT_URLCONF, one per line, for load testing.'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--count', type='int', default=1000000, help='Number of urls to write.'),
+        make_option('--strategy', choices=sorted(STRATEGIES), default='minimal',
+                    help='How argument values are chosen: minimal, random or samples.'),
+        make_option('--samples', help='File with one `name<TAB>value` line per value, for --strategy samples.'),
+        make_option('--seed', type='int', default=None, help='Random seed, for reproducible corpora.'),
+        make_option('--prefix', default='/', help='Script prefix of the urls.'),
+        make_option('--urlconf', default=None, help='Urlconf module (ROOT_URLCONF by default).'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError('Usage: url_corpus %s' % self.args)
+        strategy = options['strategy']
+        if strategy == 'samples':
+            if not options['samples']:
+                raise CommandError('--strategy samples needs a --samples file.')
+            with open(options['samples'], encoding='utf-8') as f:
+                values = SampleValues.from_file(f, options['seed'])
+        elif strategy == 'random':
+            values = STRATEGIES[strategy](options['seed'])
+        else:
+            values = STRATEGIES[strategy]()
+
+        started = time.perf_counter()
+        plans, skipped = route_plans(root_routes(options['urlconf']), values)
+        for route, error in skipped:
+            self.stderr.write('Skipped %s %r: %s' % (route.name, route.pattern, error))
+        if not plans:
+            raise CommandError('No route can be generated.')
+
+        urls = generate_urls(plans, options['count'], options['prefix'])
+        if args[0] == '-':
+            written = write_urls(sys.stdout, urls)
+        else:
+            with open(args[0], 'w', encoding='utf-8') as f:
+                written = write_urls(f, urls)
+        self.stderr.write('%d urls for %d routes written in %.1fs.'
+                          % (written, len(plans), time.perf_counter() - started))
@@ -0,0 +1,323 @@
+"""
+Forward resolution with one combined regex for a whole urlconf.
+
+`RegexURLResolver.resolve` tries the patterns one by one in Python. Here every url reachable from the resolver is
+joined with the patterns of the includes it is reached through and wrapped in a group named after its position,
+`(?P<r0>...)|(?P<r1>...)|...`, so that a single `match()` finds the first url matching the path, like the loop
+does, and `lastgroup` tells which one it is. The groups inside the urls are renamed to names unique to the url
+and level with the help of GroupSpanIndex, and mapped back to args and kwargs the way the resolvers do.
+
+The pattern of an include is matched atomically, `(?=(?P<i0>...))(?P=i0)`, so that like the resolvers, which
+`search()` it once, the combined regex never backtracks into it to try another match of it for the urls after.
+Urls whose patterns cannot be combined (backreferences, conditional groups, inline flags, and lookbehinds, word
+boundaries and beginning anchors past the start of a pattern, which would see the text of the levels before) are
+matched on their own, level by level, in their place in the urlconf.
+
+Use MasterRegexURLResolver directly, or `install()` it for every resolver Django creates
+(see the URL_MASTER_REGEX setting).
+"""
+from collections import namedtuple
+import re
+from sre_constants import ASSERT, ASSERT_NOT, AT, AT_BEGINNING, AT_BEGINNING_STRING, AT_BOUNDARY, AT_NON_BOUNDARY, \
+    GROUPREF
+import sys
+
+from django.core.urlresolvers import RegexURLResolver, Resolver404, ResolverMatch
+from django.utils.encoding import force_text
+from django.utils.translation import get_language
+
+from .better_regex_parser import iter_clauses
+from .group_index import BACKREFERENCE, CAPTURING, CONDITIONAL, FLAGS, NAMED, GroupSpanIndex
+
+STOCK_RESOLVE = RegexURLResolver.resolve
+
+# `re` only supports 100 named groups before Python 3.5, and matching slows down as the number of groups of
+# a regex grows (sre saves and restores the group marks while backtracking), so large urlconfs are split
+MAX_GROUPS = 100 if sys.version_info < (3, 5) else 1000
+
+MasterRoute = namedtuple('MasterRoute', ('url_pattern', 'resolvers', 'levels'))
+MasterRoute.__doc__ = """
+A url of the urlconf. `resolvers` are the includes it is reached through, `levels` holds the (renamed, original)
+named groups of each include and of the url itself, and the renamed unnamed groups of the url, or None when
+the url is matched on its own.
+"""
+
+Level = namedtuple('Level', ('named', 'unnamed'))
+
+# anchors whose match depends on the text before the level
+_CONTEXT_ANCHORS = (AT_BEGINNING, AT_BEGINNING_STRING, AT_BOUNDARY, AT_NON_BOUNDARY)
+
+
+def rewrite_groups(pattern, prefix, unnamed=False):
+    """
+    Returns the text of `pattern` with its named groups renamed to `prefix` followed by their name, and the Level
+    listing the renamed groups. With `unnamed`, the unnamed groups are named `prefix` followed by their number.
+
+    Returns None for patterns that cannot be part of a combined regex.
+
+    >>> rewrite_groups(r'^(?P<year>\\d+)/(\\w+)/$', 'r0_1_', True)
+    ('^(?P<r0_1_year>\\\\d+)/(?P<r0_1_2>\\\\w+)/$', Level(named=[('r0_1_year', 'year')], unnamed=['r0_1_2']))
+    """
+    index = GroupSpanIndex(pattern)
+    if index.unbalanced or any(span.kind in (BACKREFERENCE, CONDITIONAL, FLAGS) for span in index):
+        return None
+    # the leading `^` is dropped from the combined regex (see _level_text), where the path does not start at
+    # the beginning of the level, and word boundaries see the last character of the level before
+    for clause_type, clause_value, _ in iter_clauses(re.sre_parse.parse(_level_text(pattern, ''))):
+        if clause_type == GROUPREF or clause_type == AT and clause_value in _CONTEXT_ANCHORS:
+            return None
+        if (clause_type == ASSERT or clause_type == ASSERT_NOT) and clause_value[0] < 0:
+            # lookbehind
+            return None
+    has_named = bool(index.by_name)
+    level = Level([], [])
+    chunks = []
+    position = 0
+    for span in index:
+        if span.kind == NAMED:
+            name = prefix + span.name
+            level.named.append((name, span.name))
+        elif span.kind == CAPTURING and unnamed and not has_named:
+            name = '%s%d' % (prefix, span.number)
+            level.unnamed.append(name)
+        else:
+            continue
+        chunks.append(pattern[position:span.start])
+        chunks.append('(?P<%s>' % name)
+        position = span.body_start
+    chunks.append(pattern[position:])
+    return ''.join(chunks), level
+
+
+def _level_text(text, unanchored=r'[\s\S]*?'):
+    # the resolvers search their patterns in the rest of the path
+    return text[1:] if text.startswith('^') else unanchored + text
+
+
+def _group_count(text):
+    return sum(1 for span in GroupSpanIndex(text) if span.number is not None)
+
+
+# alternatives of a combined regex and the (wrapper group name, MasterRoute) they match, in urlconf order
+Alternative = namedtuple('Alternative', ('text', 'groups', 'routes'))
+
+
+class MasterRegex:
+    """
+    The urls of `url_patterns` compiled to as few regexes as possible, for the active language.
+
+    The urls of an include stay grouped under the pattern of the include, `group/(?:(?P<r0>...)|(?P<r1>...))`,
+    so that the include is skipped at once when its pattern does not match, as the resolvers do.
+    """
+
+    def __init__(self, url_patterns, max_groups=MAX_GROUPS):
+        self.max_groups = max_groups
+        self.route_count = 0
+        self.include_count = 0
+        # the includes and url of every route in urlconf order, as the `tried` of Resolver404
+        self.tried = []
+        # regexes and their routes keyed by wrapper group name, or single routes matched on their own
+        self.chunks = []
+        for run in self._runs(self._items(url_patterns, [])):
+            if isinstance(run, MasterRoute):
+                self.chunks.append(run)
+            else:
+                self._compile(run)
+
+    def _runs(self, items, groups=0):
+        """
+        Yields the single MasterRoutes of `items` and lists of the Alternatives between them, each list with at
+        most `max_groups` groups together with the `groups` of the pattern they are wrapped in.
+        """
+        run = []
+        run_groups = groups
+        for item in items:
+            if isinstance(item, Alternative) and \
+                    (self.max_groups is None or run_groups + item.groups <= self.max_groups):
+                run.append(item)
+                run_groups += item.groups
+                continue
+            if run:
+                yield run
+            run = []
+            run_groups = groups
+            if isinstance(item, MasterRoute):
+                yield item
+            elif groups + item.groups <= self.max_groups:
+                run.append(item)
+                run_groups += item.groups
+            else:
+                yield from _isolated(item)
+        if run:
+            yield run
+
+    def _items(self, url_patterns, resolvers):
+        """
+        Returns the Alternatives and the single MasterRoutes of `url_patterns`.
+        """
+        items = []
+        for url_pattern in url_patterns:
+            if isinstance(url_pattern, RegexURLResolver):
+                items.extend(self._include(url_pattern, resolvers))
+            else:
+                items.append(self._route(url_pattern, resolvers))
+        return items
+
+    def _route(self, url_pattern, resolvers):
+        wrapper = 'r%d' % self.route_count
+        self.route_count += 1
+        route = MasterRoute(url_pattern, resolvers, None)
+        self.tried.append(resolvers + [url_pattern])
+        rewritten = rewrite_groups(url_pattern.regex.pattern, wrapper + '_', True)
+        if rewritten is None:
+            return route
+        text, level = rewritten
+        text = '(?P<%s>%s)' % (wrapper, _level_text(text))
+        return Alternative(text, _group_count(text), [(wrapper, route._replace(levels=[level]))])
+
+    def _include(self, resolver, resolvers):
+        items = self._items(resolver.url_patterns, resolvers + [resolver])
+        rewritten = rewrite_groups(resolver.regex.pattern, '')
+        if rewritten is None:
+            return [route for item in items for route in _isolated(item)]
+        return [run if isinstance(run, MasterRoute) else self._wrap(resolver, run)
+                for run in self._runs(items, _group_count(rewritten[0]) + 1)]
+
+    def _wrap(self, resolver, run):
+        # the groups of every copy of the include pattern need names of their own
+        name = 'i%d' % self.include_count
+        text, level = rewrite_groups(resolver.regex.pattern, name + '_')
+        self.include_count += 1
+        # the lookahead keeps the first match of the pattern, as search() does, the backreference consumes it
+        text = '(?=(?P<%s>%s))(?P=%s)' % (name, _level_text(text), name)
+        groups = _group_count(text) + sum(item.groups for item in run)
+        text = '%s(?:%s)' % (text, '|'.join(item.text for item in run))
+        routes = [(wrapper, route._replace(levels=[level] + route.levels))
+                  for item in run for wrapper, route in item.routes]
+        return Alternative(text, groups, routes)
+
+    def _compile(self, run):
+        try:
+            regex = re.compile('|'.join(item.text for item in run), re.UNICODE)
+        except re.error:
+            # e.g. a pattern that does not compile, left to fail as it does with the stock resolver
+            self.chunks.extend(route for item in run for route in _isolated(item))
+        else:
+            self.chunks.append((regex, {wrapper: route for item in run for wrapper, route in item.routes}))
+
+    def resolve(self, path):
+        """
+        Returns the ResolverMatch of the first url matching `path`, or None.
+        """
+        for chunk in self.chunks:
+            if isinstance(chunk, MasterRoute):
+                resolver_match = resolve_route(chunk, path)
+                if resolver_match is not None:
+                    return resolver_match
+                continue
+            regex, routes = chunk
+            match = regex.match(path)
+            if match is not None:
+                route = routes[match.lastgroup]
+                group = match.group
+                level_kwargs = [{name: group(renamed) for renamed, name in level.named} for level in route.levels]
+                leaf = route.levels[-1]
+                return _resolver_match(route, level_kwargs, tuple(group(name) for name in leaf.unnamed))
+        return None
+
+
+def _isolated(item):
+    if isinstance(item, MasterRoute):
+        return [item]
+    return [route._replace(levels=None) for _, route in item.routes]
+
+
+def resolve_route(route, path):
+    """
+    Matches a single route level by level, like the resolvers do.
+    """
+    level_kwargs = []
+    for resolver in route.resolvers:
+        match = resolver.regex.search(path)
+        if match is None:
+            return None
+        level_kwargs.append(match.groupdict())
+        path = path[match.end():]
+    match = route.url_pattern.regex.search(path)
+    if match is None:
+        return None
+    kwargs = match.groupdict()
+    level_kwargs.append(kwargs)
+    return _resolver_match(route, level_kwargs, () if kwargs else match.groups())
+
+
+def _resolver_match(route, level_kwargs, args):
+    kwargs = {}
+    for resolver, resolver_kwargs in zip(route.resolvers, level_kwargs):
+        kwargs.update(resolver_kwargs)
+        kwargs.update(resolver.default_kwargs)
+    url_pattern = route.url_pattern
+    kwargs.update(level_kwargs[-1])
+    kwargs.update(url_pattern.default_args)
+    app_name = None
+    for resolver in route.resolvers:
+        app_name = app_name or resolver.app_name
+    return ResolverMatch(url_pattern.callback, args, kwargs, url_pattern.name, app_name,
+                         [resolver.namespace for resolver in route.resolvers])
+
+
+def master_regex(resolver):
+    """
+    The MasterRegex of the urls of `resolver`, built once per language.
+    """
+    language_code = get_language()
+    regexes = resolver.__dict__.setdefault('_master_regex_dict', {})
+    if language_code not in regexes:
+        regexes[language_code] = MasterRegex(resolver.url_patterns)
+    return regexes[language_code]
+
+
+class MasterRegexURLResolver(RegexURLResolver):
+    """
+    RegexURLResolver resolving paths with the MasterRegex of its urls.
+    """
+
+    def resolve(self, path):
+        path = force_text(path)  # path may be a reverse_lazy object
+        match = self.regex.search(path)
+        if match:
+            new_path = path[match.end():]
+            master = master_regex(self)
+            sub_match = master.resolve(new_path)
+            if sub_match is None:
+                raise Resolver404({'tried': list(master.tried), 'path': new_path})
+            sub_match_dict = dict(match.groupdict(), **self.default_kwargs)
+            sub_match_dict.update(sub_match.kwargs)
+            return ResolverMatch(
+                sub_match.func,
+                sub_match.args,
+                sub_match_dict,
+                sub_match.url_name,
+                self.app_name or sub_match.app_name,
+                [self.namespace] + sub_match.namespaces
+            )
+        raise Resolver404({'path': path})
+
+
+def install(resolver_class=None):
+    """
+    Makes `resolver_class` (RegexURLResolver by default, so every resolver Django creates)
+    resolve paths with a MasterRegex.
+    """
+    if resolver_class is None:
+        resolver_class = RegexURLResolver
+    resolver_class.resolve = MasterRegexURLResolver.resolve
+
+
+def uninstall(resolver_class=None):
+    """
+    Restores the stock `resolve` of `resolver_class`.
+    """
+    if resolver_class is None:
+        resolver_class = RegexURLResolver
+    resolver_class.resolve = STOCK_RESOLVE
@@ -0,0 +1,227 @@
+"""
+Counters and histograms for url normalization and reversing.
+
+Events are recorded into a thread-local buffer without locking and merged into the process-wide
+`registry` in batches (every FLUSH_EVERY events, or when `flush()` is called at the end of a request).
+Cheap, frequent operations such as `reverse()` are timed only for one call out of REVERSE_SAMPLE_EVERY.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+import functools
+import threading
+import time
+
+from .better_regex_parser import normalize_list as _normalize_list
+
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0)
+COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+FLUSH_EVERY = 1024
+REVERSE_SAMPLE_EVERY = 16
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+        self.count += other.count
+
+
+def _format_labels(labels, extra=()):
+    labels = tuple(labels) + tuple(extra)
+    if not labels:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (key, str(value).replace('\\', '\\\\').replace('"', '\\"')
+                                          .replace('\n', '\\n'))
+                             for key, value in labels)
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """
+    Process-wide metric values, keyed by (metric name, labels) where labels is a tuple of (key, value) pairs.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.help = {}
+        self.counters = defaultdict(int)
+        self.histograms = {}
+
+    def describe(self, name, help_text):
+        self.help[name] = help_text
+
+    def merge(self, counters, histograms):
+        with self.lock:
+            for key, value in counters.items():
+                self.counters[key] += value
+            for key, histogram in histograms.items():
+                if key not in self.histograms:
+                    self.histograms[key] = Histogram(histogram.buckets)
+                self.histograms[key].merge(histogram)
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def render(self):
+        """
+        Returns all metrics in the Prometheus text exposition format.
+        """
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+            lines = []
+            described = set()
+
+            def header(name, metric_type):
+                if name not in described:
+                    described.add(name)
+                    if name in self.help:
+                        lines.append('# HELP %s %s' % (name, self.help[name]))
+                    lines.append('# TYPE %s %s' % (name, metric_type))
+
+            for (name, labels), value in counters:
+                header(name, 'counter')
+                lines.append('%s%s %s' % (name, _format_labels(labels), _format_value(value)))
+            for (name, labels), histogram in histograms:
+                header(name, 'histogram')
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append('%s_bucket%s %d' % (name, _format_labels(labels, (('le', bound),)), cumulative))
+                lines.append('%s_sum%s %s' % (name, _format_labels(labels), _format_value(histogram.sum)))
+                lines.append('%s_count%s %d' % (name, _format_labels(labels), histogram.count))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+registry.describe('url_normalize_calls_total', 'Patterns normalized.')
+registry.describe('url_normalize_candidates_total', 'Candidates produced by normalization.')
+registry.describe('url_normalize_seconds', 'Time spent normalizing a single pattern.')
+registry.describe('url_normalize_candidates', 'Candidates produced per normalized pattern.')
+registry.describe('url_cache_hits_total', 'Lookups answered from a cache.')
+registry.describe('url_cache_misses_total', 'Lookups that missed a cache.')
+registry.describe('url_reverse_calls_total', 'reverse() calls per url name.')
+registry.describe('url_reverse_seconds', 'Sampled reverse() latency per url name.')
+
+
+class _Buffer(threading.local):
+    def __init__(self):
+        self.counters = defaultdict(int)
+        self.histograms = {}
+        self.pending = 0
+        self.reverse_calls = 0
+
+
+_buffer = _Buffer()
+
+
+def flush():
+    """
+    Merges the current thread's buffer into the registry.
+    """
+    if _buffer.pending:
+        counters, histograms = _buffer.counters, _buffer.histograms
+        _buffer.counters, _buffer.histograms, _buffer.pending = defaultdict(int), {}, 0
+        registry.merge(counters, histograms)
+
+
+def _recorded():
+    _buffer.pending += 1
+    if _buffer.pending >= FLUSH_EVERY:
+        flush()
+
+
+def increment(name, value=1, labels=()):
+    _buffer.counters[name, labels] += value
+    _recorded()
+
+
+def observe(name, value, labels=(), buckets=LATENCY_BUCKETS):
+    key = name, labels
+    try:
+        histogram = _buffer.histograms[key]
+    except KeyError:
+        histogram = _buffer.histograms[key] = Histogram(buckets)
+    histogram.observe(value)
+    _recorded()
+
+
+def record_cache(cache, hit):
+    increment('url_cache_hits_total' if hit else 'url_cache_misses_total', labels=(('cache', cache),))
+
+
+def normalize_list(pattern):
+    """
+    `better_regex_parser.normalize_list` recording calls, candidates and duration.
+    """
+    started = time.perf_counter()
+    candidates = _normalize_list(pattern)
+    observe('url_normalize_seconds', time.perf_counter() - started)
+    observe('url_normalize_candidates', len(candidates), buckets=COUNT_BUCKETS)
+    increment('url_normalize_calls_total')
+    increment('url_normalize_candidates_total', len(candidates))
+    return candidates
+
+
+def url_name(lookup_view):
+    """
+    Label for a reversed view: the url name, or the dotted path of a view callable.
+    """
+    if callable(lookup_view):
+        return '%s.%s' % (getattr(lookup_view, '__module__', '?'), getattr(lookup_view, '__name__', '?'))
+    return str(lookup_view)
+
+
+def timed_reverse(reverse_with_prefix):
+    """
+    Wraps a `RegexURLResolver._reverse_with_prefix` style method, counting calls per url name
+    and timing a sample of them.
+    """
+
+    @functools.wraps(reverse_with_prefix)
+    def _reverse_with_prefix(resolver, lookup_view, _prefix, *args, **kwargs):
+        labels = (('name', url_name(lookup_view)),)
+        increment('url_reverse_calls_total', labels=labels)
+        _buffer.reverse_calls += 1
+        if _buffer.reverse_calls % REVERSE_SAMPLE_EVERY:
+            return reverse_with_prefix(resolver, lookup_view, _prefix, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return reverse_with_prefix(resolver, lookup_view, _prefix, *args, **kwargs)
+        finally:
+            observe('url_reverse_seconds', time.perf_counter() - started, labels)
+
+    _reverse_with_prefix.timed = True
+    return _reverse_with_prefix
+
+
+def instrument_reverse(resolver_class=None):
+    """
+    Times `reverse()` by wrapping `_reverse_with_prefix` of `resolver_class` (RegexURLResolver by default),
+    which every reverse goes through, including the `{% url %}` tag.
+    """
+    if resolver_class is None:
+        from django.core.urlresolvers import RegexURLResolver as resolver_class
+    method = resolver_class.__dict__.get('_reverse_with_prefix')
+    if method is None:
+        method = resolver_class._reverse_with_prefix
+    if not getattr(method, 'timed', False):
+        resolver_class._reverse_with_prefix = timed_reverse(method)
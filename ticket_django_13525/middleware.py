@@ -0,0 +1,33 @@
+from . import metrics, reverse_cache
+
+
+class URLMetricsMiddleware(object):
+    """
+    Times `reverse()` calls and flushes the url metrics recorded while handling a request in one batch.
+    """
+
+    def __init__(self):
+        metrics.instrument_reverse()
+
+    def process_response(self, request, response):
+        metrics.flush()
+        return response
+
+    def process_exception(self, request, exception):
+        metrics.flush()
+
+
+class ReverseCacheMiddleware(object):
+    """
+    Keeps the results of `reverse()` for the duration of a request.
+    """
+
+    def process_request(self, request):
+        reverse_cache.start_request()
+
+    def process_response(self, request, response):
+        reverse_cache.end_request()
+        return response
+
+    def process_exception(self, request, exception):
+        reverse_cache.end_request()
@@ -0,0 +1,110 @@
+"""
+Bounded cache of `reverse()` calls that cannot match.
+
+A NoReverseMatch is only cached when no candidate of the url takes the given argument names (or number of
+positional arguments), which does not depend on the argument values. Failures caused by values the pattern does not
+match are not cached, the same names with other values may well reverse.
+
+The cache is kept on the resolver, so it goes away with the resolver when the urlconf changes
+(`clear_url_caches()` and the ROOT_URLCONF setting_changed signal drop the resolvers).
+"""
+import functools
+
+from django.core.urlresolvers import NoReverseMatch, get_callable
+from django.utils.http import urlquote
+from django.utils.regex_helper import normalize
+from django.utils.translation import get_language
+
+from .lru import LRUCache
+from .metrics import record_cache
+
+DEFAULT_NEGATIVE_CACHE_SIZE = 1024
+
+
+class NegativeCache(LRUCache):
+    """
+    Messages of the NoReverseMatch raised for keys.
+    """
+
+    def __init__(self, size=DEFAULT_NEGATIVE_CACHE_SIZE):
+        super().__init__(size)
+
+
+def has_candidate(resolver, lookup_view, _prefix, args, kwargs):
+    """
+    Whether a candidate of `lookup_view` takes the argument names of `kwargs` or as many arguments as `args`,
+    following the checks of `RegexURLResolver._reverse_with_prefix`.
+    """
+    try:
+        if resolver._is_callback(lookup_view):
+            lookup_view = get_callable(lookup_view, True)
+    except (ImportError, AttributeError):
+        # failed import, not cached in case the module imports later
+        return True
+    _, prefix_args = normalize(urlquote(_prefix))[0]
+    keys = set(kwargs)
+    for possibility, pattern, defaults in resolver.reverse_dict.getlist(lookup_view):
+        for result, params in possibility:
+            if args:
+                if len(args) == len(params) + len(prefix_args):
+                    return True
+            elif keys | set(defaults) == set(params) | set(defaults) | set(prefix_args):
+                return True
+    return False
+
+
+def negative_cached_reverse(reverse_with_prefix, size=DEFAULT_NEGATIVE_CACHE_SIZE):
+    """
+    Wraps a `RegexURLResolver._reverse_with_prefix` style method, failing repeated impossible reverses
+    from a NegativeCache of the resolver.
+    """
+
+    @functools.wraps(reverse_with_prefix)
+    def _reverse_with_prefix(resolver, lookup_view, _prefix, *args, **kwargs):
+        cache = resolver.__dict__.get('_negative_cache')
+        if cache is None:
+            cache = resolver._negative_cache = NegativeCache(size)
+        key = get_language(), lookup_view, _prefix, frozenset(kwargs), len(args)
+        try:
+            message = cache.get(key)
+        except TypeError:
+            # unhashable lookup
+            return reverse_with_prefix(resolver, lookup_view, _prefix, *args, **kwargs)
+        if message is not None:
+            record_cache('negative_reverse', True)
+            raise NoReverseMatch(message)
+        try:
+            return reverse_with_prefix(resolver, lookup_view, _prefix, *args, **kwargs)
+        except NoReverseMatch as e:
+            if not (args and kwargs) and not has_candidate(resolver, lookup_view, _prefix, args, kwargs):
+                record_cache('negative_reverse', False)
+                cache.add(key, str(e))
+            raise
+
+    _reverse_with_prefix.negative_cached = True
+    return _reverse_with_prefix
+
+
+def install(resolver_class=None, size=DEFAULT_NEGATIVE_CACHE_SIZE):
+    """
+    Caches the impossible reverses of `resolver_class` (RegexURLResolver by default).
+    """
+    if resolver_class is None:
+        from django.core.urlresolvers import RegexURLResolver as resolver_class
+    method = resolver_class.__dict__.get('_reverse_with_prefix')
+    if method is None:
+        method = resolver_class._reverse_with_prefix
+    if not getattr(method, 'negative_cached', False):
+        resolver_class._reverse_with_prefix = negative_cached_reverse(method, size)
+
+
+def uninstall(resolver_class=None):
+    """
+    Removes the negative cache of `resolver_class` (RegexURLResolver by default), when it is the last wrapper installed
+    around `_reverse_with_prefix`.
+    """
+    if resolver_class is None:
+        from django.core.urlresolvers import RegexURLResolver as resolver_class
+    method = resolver_class.__dict__.get('_reverse_with_prefix')
+    if getattr(method, 'negative_cached', False):
+        resolver_class._reverse_with_prefix = method.__wrapped__
@@ -0,0 +1,253 @@
+"""
+Flat, memory-mapped table of normalized url patterns.
+
+The table is built once per urlconf and shared by every worker process on the host through `mmap`,
+so the format strings and argument names are not held as Python objects by each worker.
+
+File layout (native byte order, all integers are unsigned 32 bit):
+
+    header            HEADER struct
+    string offsets    string_count + 1 integers, offsets into the string pool
+    pattern records   pattern_count * (pattern string id, first candidate, candidate count)
+    hash slots        slot_count integers, pattern index + 1 (0 marks an empty slot)
+    candidate records candidate_count * (format string id, first arg, arg count)
+    args              arg_count string ids
+    string pool       utf-8 encoded strings, deduplicated
+"""
+from array import array
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+
+from .better_regex_parser import unique_list
+from .metrics import normalize_list, record_cache
+
+MAGIC = b'BRPT'
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct('=4sI20sIIIII')
+UINT = 'I'
+UINT_SIZE = 4
+PATTERN_RECORD_SIZE = 3
+CANDIDATE_RECORD_SIZE = 3
+
+assert array(UINT).itemsize == UINT_SIZE
+
+
+class StaleTableError(ValueError):
+    """
+    Raised when a table file has a different format version or was built for different patterns.
+    """
+
+
+def patterns_digest(patterns):
+    """
+    Identifies a set of patterns together with the table format they were built with.
+    """
+    digest = hashlib.sha1(('%d\0' % FORMAT_VERSION).encode('utf-8'))
+    for pattern in patterns:
+        digest.update(pattern.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.digest()
+
+
+def _slot_count(pattern_count):
+    slot_count = 1
+    while slot_count < pattern_count * 2:
+        slot_count *= 2
+    return slot_count
+
+
+def _hash(key):
+    return zlib.crc32(key) & 0xffffffff
+
+
+class _StringPool:
+    def __init__(self):
+        self.ids = {}
+        self.offsets = array(UINT, [0])
+        self.data = bytearray()
+
+    def intern(self, s):
+        try:
+            return self.ids[s]
+        except KeyError:
+            self.data += s.encode('utf-8')
+            self.offsets.append(len(self.data))
+            string_id = self.ids[s] = len(self.ids)
+            return string_id
+
+
+def build_table(path, patterns):
+    """
+    Normalizes `patterns` and atomically writes the table to `path`.
+
+    Patterns with constructs the parser does not support are left out of the table. The file is written
+    next to its destination and renamed over it, so readers never see a partially written table.
+    """
+    patterns = unique_list(patterns)
+    strings = _StringPool()
+    pattern_records = array(UINT)
+    candidate_records = array(UINT)
+    args = array(UINT)
+
+    normalized = []
+    for pattern in patterns:
+        try:
+            candidates = normalize_list(pattern)
+        except (KeyError, NotImplementedError, ValueError):
+            # left to the readers, e.g. to normalize them with Django's normalize
+            continue
+        normalized.append(pattern)
+        pattern_records.extend((strings.intern(pattern), len(candidate_records) // CANDIDATE_RECORD_SIZE,
+                                len(candidates)))
+        for format_string, candidate_args in candidates:
+            candidate_records.extend((strings.intern(format_string), len(args), len(candidate_args)))
+            args.extend(strings.intern(arg) for arg in candidate_args)
+
+    slot_count = _slot_count(len(normalized))
+    slots = array(UINT, [0]) * slot_count
+    for index, pattern in enumerate(normalized):
+        slot = _hash(pattern.encode('utf-8')) & (slot_count - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (slot_count - 1)
+        slots[slot] = index + 1
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, patterns_digest(patterns), len(strings.ids), len(normalized),
+                         len(candidate_records) // CANDIDATE_RECORD_SIZE, len(args), slot_count)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.%s.' % os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            for section in (strings.offsets, pattern_records, slots, candidate_records, args):
+                f.write(section.tobytes())
+            f.write(strings.data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class NormalizationTable:
+    """
+    Read-only view of a table file. Lookups go straight through the mapped memory.
+    """
+
+    def __init__(self, path, patterns=None):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+        try:
+            self._map_sections(patterns)
+        except BaseException:
+            self.close()
+            raise
+
+    def _map_sections(self, patterns):
+        if len(self._buffer) < HEADER.size:
+            raise StaleTableError('Table file is truncated.')
+        magic, version, digest, string_count, pattern_count, candidate_count, arg_count, slot_count = \
+            HEADER.unpack_from(self._buffer)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise StaleTableError('Unsupported table format %r version %d.' % (magic, version))
+        if patterns is not None and digest != patterns_digest(unique_list(patterns)):
+            raise StaleTableError('Table was built for a different set of patterns.')
+
+        offset = HEADER.size
+
+        def section(count):
+            nonlocal offset
+            start, offset = offset, offset + count * UINT_SIZE
+            return self._buffer[start:offset].cast(UINT)
+
+        self._offsets = section(string_count + 1)
+        self._patterns = section(pattern_count * PATTERN_RECORD_SIZE)
+        self._slots = section(slot_count)
+        self._candidates = section(candidate_count * CANDIDATE_RECORD_SIZE)
+        self._args = section(arg_count)
+        self._pool = self._buffer[offset:offset + self._offsets[string_count]]
+        self._mask = slot_count - 1
+
+    def close(self):
+        for name in ('_offsets', '_patterns', '_slots', '_candidates', '_args', '_pool', '_buffer'):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self._patterns) // PATTERN_RECORD_SIZE
+
+    def __contains__(self, pattern):
+        return self._find(pattern) is not None
+
+    def _string(self, string_id):
+        return self._pool[self._offsets[string_id]:self._offsets[string_id + 1]]
+
+    def _find(self, pattern):
+        key = pattern.encode('utf-8')
+        slot = _hash(key) & self._mask
+        while True:
+            index = self._slots[slot]
+            if not index:
+                return None
+            if self._string(self._patterns[(index - 1) * PATTERN_RECORD_SIZE]) == key:
+                return index - 1
+            slot = (slot + 1) & self._mask
+
+    def raw_candidates(self, pattern):
+        """
+        Yields (format_string, args) for `pattern` as memoryviews of the utf-8 encoded strings.
+        """
+        index = self._find(pattern)
+        if index is None:
+            raise KeyError(pattern)
+        _, first, count = self._patterns[index * PATTERN_RECORD_SIZE:(index + 1) * PATTERN_RECORD_SIZE]
+        for candidate in range(first, first + count):
+            format_id, first_arg, arg_count = \
+                self._candidates[candidate * CANDIDATE_RECORD_SIZE:(candidate + 1) * CANDIDATE_RECORD_SIZE]
+            yield self._string(format_id), [self._string(a) for a in self._args[first_arg:first_arg + arg_count]]
+
+    def candidates(self, pattern):
+        """
+        Returns the same list as `normalize_list(pattern)`, decoded from the table.
+        """
+        return [(str(format_string, 'utf-8'), [str(arg, 'utf-8') for arg in args])
+                for format_string, args in self.raw_candidates(pattern)]
+
+
+def load_table(path, patterns):
+    """
+    Maps the table at `path`, (re)building it first if it is missing or was built for other patterns.
+    """
+    patterns = unique_list(patterns)
+    try:
+        table = NormalizationTable(path, patterns)
+    except (FileNotFoundError, StaleTableError):
+        record_cache('normalization_table', False)
+        build_table(path, patterns)
+        return NormalizationTable(path, patterns)
+    record_cache('normalization_table', True)
+    return table
+
+
+def load_urlconf_table(path, urlconf=None):
+    """
+    Maps the table for every pattern of `urlconf` (ROOT_URLCONF by default).
+    """
+    from .urlconf import root_routes
+
+    return load_table(path, [route.pattern for route in root_routes(urlconf)])
@@ -0,0 +1,251 @@
+"""
+Pre-filtering of the urls a path can match, before any regex runs.
+
+The length of the strings a pattern matches is bounded by its parse tree, e.g. `^export1\\.(?P<format>\\w+)$`
+matches 9 characters or more and `^(?P<year>\\d{4})/$` exactly 5, and some literals, like `export1.`, are part
+of every match. PrefilterIndex keeps, for every path length, the urls whose bounds allow it, in urlconf order,
+so that resolving a path only runs the regexes of the urls of its length whose mandatory literals are all
+in the path. With DEBUG, a path that does not resolve is resolved again by the stock resolver, so that the
+404 page lists every url tried and not only the ones the index let through.
+
+Use PrefilterURLResolver directly, or `install()` it for every resolver Django creates
+(see the URL_PREFILTER setting).
+"""
+from collections import namedtuple
+import re
+from sre_constants import ANY, ASSERT, ASSERT_NOT, AT, AT_BEGINNING, AT_BEGINNING_STRING, AT_END, AT_END_STRING, \
+    BRANCH, IN, LITERAL, MAX_REPEAT, MAXREPEAT, MIN_REPEAT, NOT_LITERAL, SUBPATTERN
+
+from django.conf import settings
+from django.core.urlresolvers import RegexURLResolver, Resolver404, ResolverMatch
+from django.utils.encoding import force_text
+from django.utils.translation import get_language
+
+from .better_regex_parser import parse_pattern
+from .master_regex import STOCK_RESOLVE
+
+BEGINNING_ANCHORS = ((AT, AT_BEGINNING), (AT, AT_BEGINNING_STRING))
+END_ANCHORS = ((AT, AT_END), (AT, AT_END_STRING))
+
+RouteFilter = namedtuple('RouteFilter', ('min_length', 'max_length', 'literals'))
+RouteFilter.__doc__ = """
+Lengths of the paths a url can match, `max_length` is None when unbounded, and the literals all of them contain.
+"""
+
+
+def length_bounds(parse_tree):
+    """
+    Returns the (minimum, maximum) length of the strings matched by a parse tree, the maximum is None
+    when unbounded.
+
+    >>> length_bounds(parse_pattern(r'^a(?P<b>\\d{2,4})(c|de)?$'))
+    (3, 7)
+    """
+    min_length = max_length = 0
+    for clause_type, clause_value in parse_tree:
+        clause_min, clause_max = _clause_bounds(clause_type, clause_value)
+        min_length += clause_min
+        max_length = None if max_length is None or clause_max is None else max_length + clause_max
+    return min_length, max_length
+
+
+def _clause_bounds(clause_type, clause_value):
+    if clause_type in (LITERAL, NOT_LITERAL, IN, ANY):
+        return 1, 1
+    if clause_type in (AT, ASSERT, ASSERT_NOT):
+        return 0, 0
+    if clause_type == SUBPATTERN:
+        return length_bounds(clause_value[1])
+    if clause_type == BRANCH:
+        bounds = [length_bounds(subpattern) for subpattern in clause_value[1]]
+        max_lengths = [max_length for _, max_length in bounds]
+        return min(min_length for min_length, _ in bounds), None if None in max_lengths else max(max_lengths)
+    if clause_type == MAX_REPEAT or clause_type == MIN_REPEAT:
+        min_repeat, max_repeat, subpattern = clause_value
+        min_length, max_length = length_bounds(subpattern)
+        if max_length is not None and max_repeat != MAXREPEAT:
+            return min_length * min_repeat, max_length * max_repeat
+        return min_length * min_repeat, 0 if max_length == 0 else None
+    # backreferences and conditional groups
+    return 0, None
+
+
+def mandatory_literals(parse_tree):
+    """
+    Returns the runs of literals every string matched by a parse tree contains.
+
+    >>> mandatory_literals(parse_pattern(r'^export1\\.(?P<format>\\w+)(/(a|ba)/)?$'))
+    ['export1.']
+    """
+    literals = []
+    run = []
+    for clause_type, clause_value in parse_tree:
+        if clause_type == LITERAL:
+            run.append(chr(clause_value))
+            continue
+        if run:
+            literals.append(''.join(run))
+            run = []
+        if clause_type == SUBPATTERN:
+            literals.extend(mandatory_literals(clause_value[1]))
+        elif (clause_type == MAX_REPEAT or clause_type == MIN_REPEAT) and clause_value[0] > 0:
+            literals.extend(mandatory_literals(clause_value[2]))
+        elif clause_type == BRANCH:
+            common = set(mandatory_literals(clause_value[1][0]))
+            for subpattern in clause_value[1][1:]:
+                common &= set(mandatory_literals(subpattern))
+            literals.extend(sorted(common))
+    if run:
+        literals.append(''.join(run))
+    return _longest(literals)
+
+
+def _longest(literals):
+    # literals contained in another one are redundant
+    literals = sorted(set(literals), key=lambda literal: (-len(literal), literal))
+    return [literal for i, literal in enumerate(literals)
+            if not any(literal in other for other in literals[:i])]
+
+
+def _pattern_filter(pattern):
+    """
+    Returns the RouteFilter of a pattern searched in a path, the maximum length is the end of the match.
+    """
+    parse_tree = parse_pattern(pattern)
+    min_length, max_length = length_bounds(parse_tree)
+    if not parse_tree or parse_tree[0] not in BEGINNING_ANCHORS:
+        # the match can start anywhere in the path
+        max_length = None
+    literals = () if parse_tree.pattern.flags & re.IGNORECASE else tuple(mandatory_literals(parse_tree))
+    return RouteFilter(min_length, max_length, literals), parse_tree[-1] if parse_tree else None
+
+
+def route_filter(url_pattern):
+    """
+    Returns the RouteFilter of a url or an include, or None for an include that cannot match anything.
+    """
+    pattern_filter, last_clause = _pattern_filter(url_pattern.regex.pattern)
+    if not isinstance(url_pattern, RegexURLResolver):
+        max_length = pattern_filter.max_length
+        if last_clause not in END_ANCHORS:
+            max_length = None
+        elif max_length is not None and last_clause == (AT, AT_END):
+            # `$` also matches before a newline at the end
+            max_length += 1
+        return pattern_filter._replace(max_length=max_length)
+
+    filters = [route_filter(child) for child in url_pattern.url_patterns]
+    filters = [child_filter for child_filter in filters if child_filter is not None]
+    if not filters:
+        return None
+    max_lengths = [child_filter.max_length for child_filter in filters]
+    max_length = None if pattern_filter.max_length is None or None in max_lengths else \
+        pattern_filter.max_length + max(max_lengths)
+    common = set(filters[0].literals)
+    for child_filter in filters[1:]:
+        common &= set(child_filter.literals)
+    return RouteFilter(pattern_filter.min_length + min(child_filter.min_length for child_filter in filters),
+                       max_length, tuple(_longest(list(pattern_filter.literals) + sorted(common))))
+
+
+class PrefilterIndex:
+    """
+    The urls of `url_patterns` that can match a path of each length, with their mandatory literals.
+    """
+
+    def __init__(self, url_patterns):
+        filters = [(url_pattern, route_filter(url_pattern)) for url_pattern in url_patterns]
+        filters = [(url_pattern, pattern_filter) for url_pattern, pattern_filter in filters
+                   if pattern_filter is not None]
+        lengths = [length for _, pattern_filter in filters
+                   for length in (pattern_filter.min_length, pattern_filter.max_length) if length is not None]
+        # every path at least this long can match the same urls
+        self.overflow = max(lengths + [0]) + 1
+        self.buckets = []
+        for length in range(self.overflow + 1):
+            bucket = tuple((url_pattern, pattern_filter.literals) for url_pattern, pattern_filter in filters
+                           if pattern_filter.min_length <= length and
+                           (pattern_filter.max_length is None or length <= pattern_filter.max_length))
+            # consecutive lengths often allow the same urls, share their bucket
+            self.buckets.append(self.buckets[-1] if self.buckets and self.buckets[-1] == bucket else bucket)
+
+    def candidates(self, path):
+        """
+        Yields the urls that can match `path`, in urlconf order.
+        """
+        for url_pattern, literals in self.buckets[min(len(path), self.overflow)]:
+            for literal in literals:
+                if literal not in path:
+                    break
+            else:
+                yield url_pattern
+
+
+def prefilter_index(resolver):
+    """
+    The PrefilterIndex of the urls of `resolver`, built once per language.
+    """
+    language_code = get_language()
+    indexes = resolver.__dict__.setdefault('_prefilter_index_dict', {})
+    if language_code not in indexes:
+        indexes[language_code] = PrefilterIndex(resolver.url_patterns)
+    return indexes[language_code]
+
+
+class PrefilterURLResolver(RegexURLResolver):
+    """
+    RegexURLResolver only trying the urls its PrefilterIndex lets through.
+    """
+
+    def resolve(self, path):
+        path = force_text(path)  # path may be a reverse_lazy object
+        tried = []
+        match = self.regex.search(path)
+        if match:
+            new_path = path[match.end():]
+            for pattern in prefilter_index(self).candidates(new_path):
+                try:
+                    sub_match = pattern.resolve(new_path)
+                except Resolver404 as e:
+                    sub_tried = e.args[0].get('tried')
+                    if sub_tried is not None:
+                        tried.extend([pattern] + t for t in sub_tried)
+                    else:
+                        tried.append([pattern])
+                else:
+                    if sub_match:
+                        sub_match_dict = dict(match.groupdict(), **self.default_kwargs)
+                        sub_match_dict.update(sub_match.kwargs)
+                        return ResolverMatch(
+                            sub_match.func,
+                            sub_match.args,
+                            sub_match_dict,
+                            sub_match.url_name,
+                            self.app_name or sub_match.app_name,
+                            [self.namespace] + sub_match.namespaces
+                        )
+                    tried.append([pattern])
+            if settings.DEBUG:
+                # for the 404 page, `tried` lists the urls the index filtered out too
+                return STOCK_RESOLVE(self, path)
+            raise Resolver404({'tried': tried, 'path': new_path})
+        raise Resolver404({'path': path})
+
+
+def install(resolver_class=None):
+    """
+    Makes `resolver_class` (RegexURLResolver by default, so every resolver Django creates)
+    pre-filter the urls it tries.
+    """
+    if resolver_class is None:
+        resolver_class = RegexURLResolver
+    resolver_class.resolve = PrefilterURLResolver.resolve
+
+
+def uninstall(resolver_class=None):
+    """
+    Restores the stock `resolve` of `resolver_class`.
+    """
+    if resolver_class is None:
+        resolver_class = RegexURLResolver
+    resolver_class.resolve = STOCK_RESOLVE
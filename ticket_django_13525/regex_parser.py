@@ -1,5 +1,11 @@
 import unittest
 
+try:
+    from .group_index import GroupSpanIndex
+except (ImportError, SystemError):
+    # run as a script, python regex_parser.py
+    from group_index import GroupSpanIndex
+
 
 class Token:
     OPEN_PARENTHESIS = ord('(')
@@ -132,6 +138,10 @@ class GroupNode(Node):
                 break
             name.append(ch)
 
+        group_pattern = pi.skip_group()
+        if group_pattern is not None:
+            return ''.join(name), group_pattern
+
         group_pattern = []
         parenthesis_count = 1
 
@@ -173,32 +183,47 @@ class RegexLexer:
     }
 
     def __init__(self, pattern):
-        self.it = iter(pattern)
+        self.pattern = pattern
+        self.position = 0
+        self._index = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = GroupSpanIndex(self.pattern)
+        return self._index
+
+    def _read(self):
+        if self.position >= len(self.pattern):
+            raise StopIteration
+        ch = self.pattern[self.position]
+        self.position += 1
+        return ch
 
     def __iter__(self):
         def _next():
-            while True:
-                ch = next(self.it)
+            while self.position < len(self.pattern):
+                ch = self._read()
                 if ch == '\\':
-                    ch = next(self.it)
+                    ch = self._read()
                     yield self.ESCAPE_MAPPINGS.get(ch, ch)
                 elif ch == '(':
                     yield Token.OPEN_PARENTHESIS
                 elif ch == ')':
                     yield Token.CLOSE_PARENTHESIS
                 elif ch == '[':
-                    ch = next(self.it)
+                    ch = self._read()
                     if ch in '^[':
                         raise NotImplementedError('Negations and named character classes are not supported.')
                     elif ch == '\\':
-                        ch = next(self.it)
+                        ch = self._read()
                     first_found = ch
                     while True:
-                        ch = next(self.it)
+                        ch = self._read()
                         if ch == ']':
                             break
                         elif ch == '\\':
-                            next(self.it)
+                            self._read()
                     yield first_found
                 elif ch in '^$':
                     pass
@@ -207,6 +232,45 @@ class RegexLexer:
 
         return _next()
 
+    def skip_group(self):
+        """
+        Skips the rest of the group being read, up to and including its closing parenthesis,
+        and returns its pattern unescaped.
+        """
+        # the group end is looked up in the group index instead of re-collecting the tokens
+        start = self.position
+        end = self.index.closing(start)
+        if end is None:
+            end = len(self.pattern)
+        self.position = end + 1
+        return self.unescape(self.pattern[start:end])
+
+    def unescape(self, text):
+        """
+        Resolves escapes outside of character classes, character classes are kept verbatim.
+        """
+        result = []
+        i = 0
+        class_start = None
+        while i < len(text):
+            ch = text[i]
+            if ch == '\\' and class_start is None and i + 1 < len(text):
+                i += 1
+                result.append(self.ESCAPE_MAPPINGS.get(text[i], text[i]) or '')
+            elif ch == '\\':
+                result.append(text[i:i + 2])
+                i += 1
+            elif class_start is not None:
+                if ch == ']' and i > class_start:
+                    class_start = None
+                result.append(ch)
+            else:
+                if ch == '[':
+                    class_start = i + 2 if text.startswith('^', i + 1) else i + 1
+                result.append(ch)
+            i += 1
+        return ''.join(result)
+
 
 class PeekableIterator:
     """
@@ -216,6 +280,7 @@ class PeekableIterator:
     peeked = _sentinel
 
     def __init__(self, it):
+        self.source = it
         self.it = iter(it)
 
     def __iter__(self):
@@ -234,6 +299,14 @@ class PeekableIterator:
             self.peeked = next(self.it)
         return self.peeked
 
+    def skip_group(self):
+        """
+        Skips the rest of the group being read and returns its pattern when the source can do it, or None.
+        """
+        if self.peeked is not self._sentinel or not hasattr(self.source, 'skip_group'):
+            return None
+        return self.source.skip_group()
+
 
 class PeekableStringIterator(PeekableIterator):
     def peek(self):
@@ -335,6 +408,25 @@ class GroupNodeTestCase(unittest.TestCase):
         self.assertEqual(gn.name, 'name')
         self.assertEqual(gn.group_pattern, 'test[)]test2')
 
+    def test_skip_group(self):
+        pi = PeekableStringIterator(RegexLexer(r'name>\d(x))after group'))
+        gn = GroupNode(pi)
+        self.assertEqual(gn.group_pattern, '0(x)')
+        self.assertEqual(pi.next(), 'a')
+
+    def test_peeked(self):
+        pi = PeekableStringIterator(RegexLexer('name>test)after group'))
+        self.assertEqual(pi.peek(), 'n')
+        gn = GroupNode(pi)
+        self.assertEqual(gn.group_pattern, 'test')
+        self.assertEqual(pi.next(), 'a')
+
+    def test_plain_iterator(self):
+        pi = PeekableStringIterator(list('name>test') + [Token.CLOSE_PARENTHESIS] + list('after group'))
+        self.assertIsNone(pi.skip_group())
+        gn = GroupNode(pi)
+        self.assertEqual(gn.group_pattern, 'test')
+
 
 class RegexLexerTestCase(unittest.TestCase):
     def test_1(self):
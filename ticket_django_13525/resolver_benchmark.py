@@ -0,0 +1,175 @@
+"""
+Populate time and `reverse()` latency of the stock resolver against BetterRegexURLResolver, and `resolve()`
+latency of the stock resolver against MasterRegexURLResolver and PrefilterURLResolver, on synthetic urlconfs
+shaped like real ones (includes, named groups, optional groups). The caches and metrics wrapped around
+`_reverse_with_prefix` by the settings are left out, so that only the resolvers are compared.
+
+    python manage.py benchmark_resolver --routes 100,1000,10000
+    python manage.py benchmark_resolver --resolve
+"""
+from collections import namedtuple
+import inspect
+import time
+import types
+
+from django.conf.urls import include, url
+from django.core.urlresolvers import NoReverseMatch, RegexURLResolver, Resolver404
+
+from . import master_regex, prefilter, resolvers
+from .samples import group_samples
+
+ROUTE_TEMPLATES = (
+    r'^section%d/$',
+    r'^section%d/(?P<slug>[-\w]+)/$',
+    r'^section%d/(?P<year>\d{4})/(?:(?P<month>\d{2})/)?$',
+    r'^section%d/export(\.(?P<format>\w+))?$',
+)
+ROUTES_PER_INCLUDE = 50
+
+BenchmarkResult = namedtuple('BenchmarkResult', ('routes', 'populate_seconds', 'reverse_seconds', 'failures'))
+ResolveResult = namedtuple('ResolveResult', ('routes', 'first_pass_seconds', 'resolve_seconds', 'misses'))
+
+
+def _view(request, *args, **kwargs):
+    pass
+
+
+def synthetic_urlconf(route_count):
+    """
+    Returns a urlconf module with `route_count` named routes, ROUTES_PER_INCLUDE per include,
+    and the (name, kwargs) of a reverse for each of them.
+    """
+    includes = []
+    reverses = []
+    for start in range(0, route_count, ROUTES_PER_INCLUDE):
+        patterns = []
+        for i in range(start, min(start + ROUTES_PER_INCLUDE, route_count)):
+            pattern = ROUTE_TEMPLATES[i % len(ROUTE_TEMPLATES)] % i
+            name = 'route%d' % i
+            patterns.append(url(pattern, _view, name=name))
+            kwargs = {arg: value for arg, value in group_samples(pattern).items() if not arg.startswith('_')}
+            reverses.append((name, kwargs))
+        includes.append(url(r'^group%d/' % (start // ROUTES_PER_INCLUDE), include(patterns)))
+    urlconf = types.ModuleType('synthetic_urlconf_%d' % route_count)
+    urlconf.urlpatterns = includes
+    return urlconf, reverses
+
+
+def benchmark(resolver_class, urlconf, reverses, repeat=3):
+    """
+    Populates a new resolver of `resolver_class` for `urlconf` and reverses every (name, kwargs) of `reverses`
+    `repeat` times. Returns the BenchmarkResult.
+    """
+    resolvers.candidate_lists.clear()
+    resolver = resolver_class(r'^/', urlconf)
+    started = time.perf_counter()
+    resolver._populate()
+    populate_seconds = time.perf_counter() - started
+
+    failures = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for name, kwargs in reverses:
+            try:
+                resolver._reverse_with_prefix(name, '/', **kwargs)
+            except NoReverseMatch:
+                failures += 1
+    reverse_seconds = (time.perf_counter() - started) / (repeat * len(reverses))
+    return BenchmarkResult(len(reverses), populate_seconds, reverse_seconds, failures // repeat)
+
+
+def compare(route_counts, repeat=3):
+    """
+    Yields (stock result, better result) for urlconfs of every size in `route_counts`.
+    """
+    for route_count in route_counts:
+        urlconf, reverses = synthetic_urlconf(route_count)
+        results = []
+        installed_populate = RegexURLResolver._populate
+        installed_reverse = RegexURLResolver._reverse_with_prefix
+        try:
+            # the resolvers of the includes are RegexURLResolvers too
+            RegexURLResolver._reverse_with_prefix = inspect.unwrap(installed_reverse)
+            for populate in (resolvers.STOCK_POPULATE, resolvers.BetterRegexURLResolver._populate):
+                RegexURLResolver._populate = populate
+                results.append(benchmark(RegexURLResolver, urlconf, reverses, repeat))
+        finally:
+            RegexURLResolver._populate = installed_populate
+            RegexURLResolver._reverse_with_prefix = installed_reverse
+        yield tuple(results)
+
+
+def format_results(results):
+    lines = ['%8s  %18s  %19s  %16s  %17s  %16s' % ('routes', 'stock populate ms', 'better populate ms',
+                                                      'stock reverse us', 'better reverse us', 'stock failures')]
+    for stock, better in results:
+        lines.append('%8d  %18.1f  %19.1f  %16.1f  %17.1f  %14d' % (
+            stock.routes, stock.populate_seconds * 1000, better.populate_seconds * 1000,
+            stock.reverse_seconds * 10 ** 6, better.reverse_seconds * 10 ** 6, stock.failures))
+    return '\n'.join(lines)
+
+
+def resolve_paths(urlconf, reverses):
+    """
+    Returns the path of every (name, kwargs) of `reverses`.
+    """
+    resolver = resolvers.BetterRegexURLResolver(r'^/', urlconf)
+    return [resolver._reverse_with_prefix(name, '/', **kwargs) for name, kwargs in reverses]
+
+
+def _resolve_all(resolver, paths):
+    misses = 0
+    for path in paths:
+        try:
+            resolver.resolve(path)
+        except Resolver404:
+            misses += 1
+    return misses
+
+
+def benchmark_resolve(resolver_class, urlconf, paths, repeat=3):
+    """
+    Resolves every path of `paths` once with a new resolver of `resolver_class` for `urlconf`, which compiles
+    the regexes and builds the MasterRegexes or PrefilterIndexes, then `repeat` more times. Returns the
+    ResolveResult.
+    """
+    resolver = resolver_class(r'^/', urlconf)
+    started = time.perf_counter()
+    _resolve_all(resolver, paths)
+    first_pass_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    misses = sum(_resolve_all(resolver, paths) for _ in range(repeat))
+    resolve_seconds = (time.perf_counter() - started) / (repeat * len(paths))
+    return ResolveResult(len(paths), first_pass_seconds, resolve_seconds, misses // repeat)
+
+
+def compare_resolve(route_counts, repeat=3):
+    """
+    Yields (stock result, master regex result, prefilter result) for urlconfs of every size in `route_counts`.
+    """
+    for route_count in route_counts:
+        urlconf, reverses = synthetic_urlconf(route_count)
+        paths = resolve_paths(urlconf, reverses)
+        results = []
+        installed = RegexURLResolver.resolve
+        try:
+            # the resolvers of the includes are RegexURLResolvers too
+            for resolve in (master_regex.STOCK_RESOLVE, master_regex.MasterRegexURLResolver.resolve,
+                            prefilter.PrefilterURLResolver.resolve):
+                RegexURLResolver.resolve = resolve
+                results.append(benchmark_resolve(RegexURLResolver, urlconf, paths, repeat))
+        finally:
+            RegexURLResolver.resolve = installed
+        yield tuple(results)
+
+
+def format_resolve_results(results):
+    lines = ['%8s  %8s  %16s  %16s  %16s  %16s  %16s  %16s' % (
+        'routes', 'misses', 'stock first ms', 'master first ms', 'prefilt first ms',
+        'stock us', 'master us', 'prefilter us')]
+    for results_row in results:
+        lines.append('%8d  %8d  ' % (results_row[0].routes, sum(result.misses for result in results_row)) +
+                     '  '.join('%16.1f' % (result.first_pass_seconds * 1000) for result in results_row) + '  ' +
+                     '  '.join('%16.1f' % (result.resolve_seconds * 10 ** 6) for result in results_row))
+    return '\n'.join(lines)
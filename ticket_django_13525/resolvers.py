@@ -0,0 +1,225 @@
+"""
+Reverse data of url resolvers built with `better_regex_parser.normalize`.
+
+`RegexURLResolver._populate` normalizes patterns with Django's `regex_helper.normalize`, which drops candidates
+of optional groups (e.g. the `export2` and `qq` urls), and populates every included resolver on its own before
+normalizing its patterns again with the include prefix. Here the whole tree of includes is walked once, every
+distinct pattern is normalized once into a candidate list shared by all the names and callbacks it is reversed
+by, and the resolvers of namespaces get their own reverse data from the same walk.
+
+Use BetterRegexURLResolver directly, or `install()` it for every resolver Django creates
+(see the URL_BETTER_RESOLVER setting). `populate()` builds the reverse data of the root urlconf right away,
+e.g. at startup, instead of on the first `reverse()`.
+
+Given the `normalization_table` file of `install()` (see the URL_NORMALIZATION_TABLE setting), the candidate
+lists of the patterns of the root urlconf are read from that table, shared by the processes of the host and built
+by the first process that populates a resolver when it is missing or stale, instead of normalizing the patterns
+in every process.
+"""
+import functools
+import threading
+
+from django.core.urlresolvers import RegexURLResolver, get_resolver
+from django.utils.datastructures import MultiValueDict
+from django.utils.regex_helper import normalize
+from django.utils.translation import get_language
+
+from .metrics import normalize_list, record_cache
+from .normalization_table import load_table
+
+STOCK_POPULATE = RegexURLResolver._populate
+
+# candidate lists by pattern, a pattern always normalizes to the same candidates
+candidate_lists = {}
+
+# normalization table file of the root urlconf, mapped by the first populate
+table_path = None
+table = None
+
+# resolvers being populated by the current thread, reversing while populating must not populate them again
+_local = threading.local()
+
+
+def pattern_candidates(pattern):
+    try:
+        candidates = candidate_lists[pattern]
+    except KeyError:
+        record_cache('resolver_candidates', False)
+        if table is not None and pattern in table:
+            candidates = table.candidates(pattern)
+        else:
+            try:
+                candidates = normalize_list(pattern)
+            except (KeyError, NotImplementedError):
+                # constructs the parser does not support are left to Django's normalize, as the stock resolver does
+                candidates = normalize(pattern)
+        candidate_lists[pattern] = candidates
+        return candidates
+    record_cache('resolver_candidates', True)
+    return candidates
+
+
+def _lookup_str(pattern):
+    if hasattr(pattern, '_callback_str'):
+        return pattern._callback_str
+    if hasattr(pattern, '_callback'):
+        callback = pattern._callback
+        if isinstance(callback, functools.partial):
+            callback = callback.func
+        if not hasattr(callback, '__name__'):
+            return callback.__module__ + "." + callback.__class__.__name__
+        return callback.__module__ + "." + callback.__name__
+    return None
+
+
+class _ReverseData:
+    """
+    Reverse data of one resolver, as `RegexURLResolver._populate` builds it.
+    """
+
+    def __init__(self):
+        # (lookup keys, pattern, defaults) in the order the lookups are appended
+        self.entries = []
+        self.namespaces = {}
+        self.apps = {}
+        self.callback_strs = set()
+
+    def walk(self, resolver, prefix='', default_kwargs=None):
+        """
+        Collects the reverse data of `resolver`, following the includes without a namespace.
+        `prefix` is the pattern of the includes the resolver was reached through.
+        """
+        for pattern in reversed(resolver.url_patterns):
+            lookup_str = _lookup_str(pattern)
+            if lookup_str is not None:
+                self.callback_strs.add(lookup_str)
+            p_pattern = pattern.regex.pattern
+            if p_pattern.startswith('^'):
+                p_pattern = p_pattern[1:]
+            p_pattern = prefix + p_pattern
+            if isinstance(pattern, RegexURLResolver):
+                if pattern.namespace:
+                    self.namespaces[pattern.namespace] = (p_pattern, pattern)
+                    if pattern.app_name:
+                        self.apps.setdefault(pattern.app_name, []).append(pattern.namespace)
+                else:
+                    # the kwargs of outer includes win, as when each resolver is populated on its own
+                    self.walk(pattern, p_pattern, dict(pattern.default_kwargs, **(default_kwargs or {})))
+            else:
+                defaults = pattern.default_args if default_kwargs is None else \
+                    dict(pattern.default_args, **default_kwargs)
+                keys = [pattern.callback] if pattern.name is None else [pattern.callback, pattern.name]
+                self.entries.append((keys, p_pattern, defaults))
+
+    def lookups(self):
+        lookups = MultiValueDict()
+        for keys, pattern, defaults in self.entries:
+            candidates = pattern_candidates(pattern)
+            for key in keys:
+                lookups.appendlist(key, (candidates, pattern, defaults))
+        return lookups
+
+
+def reverse_patterns(resolver, prefix=''):
+    """
+    Yields the patterns `resolver` and the resolvers of its namespaces are reversed with, the latter both on
+    their own and with the prefix of their namespace, as `reverse()` reaches them.
+    """
+    data = _ReverseData()
+    data.walk(resolver, prefix)
+    for _, pattern, _ in data.entries:
+        yield pattern
+    for namespace_prefix, namespace_resolver in data.namespaces.values():
+        yield from reverse_patterns(namespace_resolver)
+        yield from reverse_patterns(namespace_resolver, namespace_prefix)
+
+
+def load_normalization_table(path, urlconf=None):
+    """
+    Maps the normalization table at `path` of the patterns `urlconf` (ROOT_URLCONF by default) is reversed with,
+    (re)building it first if needed, and reads their candidate lists from it from now on.
+    """
+    global table
+    close_normalization_table()
+    table = load_table(path, reverse_patterns(get_resolver(urlconf)))
+    candidate_lists.clear()
+    return table
+
+
+def close_normalization_table():
+    global table
+    if table is not None:
+        table.close()
+        table = None
+
+
+def populate_resolver(resolver):
+    """
+    Builds the reverse data of `resolver` for the active language, and of the resolvers of its namespaces.
+    Does nothing when `resolver` is already being populated by the current thread, e.g. when a url pattern
+    reverses a url while it is loaded.
+    """
+    populating = _local.__dict__.setdefault('populating', set())
+    if id(resolver) in populating:
+        return
+    populating.add(id(resolver))
+    try:
+        if table_path is not None and table is None:
+            load_normalization_table(table_path)
+        language_code = get_language()
+        data = _ReverseData()
+        data.walk(resolver)
+        resolver._reverse_dict[language_code] = data.lookups()
+        resolver._namespace_dict[language_code] = data.namespaces
+        resolver._app_dict[language_code] = data.apps
+        resolver._callback_strs.update(data.callback_strs)
+        resolver._populated = True
+    finally:
+        populating.discard(id(resolver))
+    for _, namespace_resolver in data.namespaces.values():
+        if not namespace_resolver._populated:
+            populate_resolver(namespace_resolver)
+
+
+class BetterRegexURLResolver(RegexURLResolver):
+    """
+    RegexURLResolver whose reverse data is built by `populate_resolver`.
+    """
+
+    def _populate(self):
+        populate_resolver(self)
+
+
+def install(resolver_class=None, normalization_table=None):
+    """
+    Makes `resolver_class` (RegexURLResolver by default, so every resolver Django creates)
+    build its reverse data with `populate_resolver`, reading the candidate lists from the
+    `normalization_table` file when given.
+    """
+    global table_path
+    if resolver_class is None:
+        resolver_class = RegexURLResolver
+    resolver_class._populate = BetterRegexURLResolver._populate
+    table_path = normalization_table
+
+
+def uninstall(resolver_class=None):
+    """
+    Restores the stock `_populate` of `resolver_class`, and stops reading the normalization table.
+    """
+    global table_path
+    if resolver_class is None:
+        resolver_class = RegexURLResolver
+    resolver_class._populate = STOCK_POPULATE
+    table_path = None
+    close_normalization_table()
+
+
+def populate(urlconf=None):
+    """
+    Builds the reverse data of `urlconf` (ROOT_URLCONF by default) now rather than on the first `reverse()`.
+    """
+    resolver = get_resolver(urlconf)
+    if not resolver._populated:
+        resolver._populate()
+    return resolver
@@ -0,0 +1,146 @@
+"""
+Memoization of `reverse()` results.
+
+Two layers sit in front of `RegexURLResolver._reverse_with_prefix`:
+
+- a per-request cache, active between `start_request()` and `end_request()` (see ReverseCacheMiddleware),
+  for the pagination links and menus a page reverses over and over,
+- a bounded process-wide LRU kept on the resolver, which only admits the results of urls that were reversed
+  with at most `max_values` distinct arguments (urls without arguments, or with a few possible values), so that
+  e.g. the url of every article does not push out the urls of the menus.
+
+Results are keyed by language, url name or view, script prefix and the text of the arguments, the arguments are
+quoted and the prefix is added by the resolver before a result is stored. Hits and misses are recorded as
+`url_cache_*_total{cache="reverse_request"}` and `{cache="reverse_process"}`.
+"""
+import functools
+import threading
+
+from django.utils.encoding import force_text
+from django.utils.translation import get_language
+
+from .lru import LRUCache
+from .metrics import record_cache
+
+DEFAULT_REVERSE_CACHE_SIZE = 4096
+DEFAULT_MAX_VALUES = 16
+
+_request = threading.local()
+
+
+def start_request():
+    _request.results = {}
+
+
+def end_request():
+    _request.results = None
+
+
+class ReverseCache(LRUCache):
+    """
+    Process-wide results of one resolver.
+    """
+
+    def __init__(self, size=DEFAULT_REVERSE_CACHE_SIZE, max_values=DEFAULT_MAX_VALUES):
+        super().__init__(size)
+        self.max_values = max_values
+        # distinct arguments seen for every url, up to max_values
+        self.arguments = {}
+        self.hits = 0
+        self.misses = 0
+
+    def admits(self, lookup_view, arguments):
+        """
+        Whether results of `lookup_view` are cached, i.e. it was reversed with few distinct `arguments` so far.
+        """
+        seen = self.arguments.setdefault(lookup_view, set())
+        if arguments in seen:
+            return True
+        if len(seen) >= self.max_values:
+            return False
+        seen.add(arguments)
+        return True
+
+    def stats(self):
+        """
+        Numbers to size the cache with.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self),
+            'capacity': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'uncached_urls': sum(1 for seen in self.arguments.values() if len(seen) >= self.max_values),
+        }
+
+
+def memoized_reverse(reverse_with_prefix, size=DEFAULT_REVERSE_CACHE_SIZE, max_values=DEFAULT_MAX_VALUES):
+    """
+    Wraps a `RegexURLResolver._reverse_with_prefix` style method, answering from the request
+    and process caches when possible.
+    """
+
+    @functools.wraps(reverse_with_prefix)
+    def _reverse_with_prefix(resolver, lookup_view, _prefix, *args, **kwargs):
+        arguments = (tuple(force_text(arg) for arg in args),
+                     frozenset((key, force_text(value)) for key, value in kwargs.items()))
+        key = get_language(), lookup_view, _prefix, arguments
+        try:
+            hash(key)
+        except TypeError:
+            # unhashable lookup
+            return reverse_with_prefix(resolver, lookup_view, _prefix, *args, **kwargs)
+
+        request_results = getattr(_request, 'results', None)
+        if request_results is not None:
+            url = request_results.get((resolver, key))
+            record_cache('reverse_request', url is not None)
+            if url is not None:
+                return url
+
+        cache = resolver.__dict__.get('_reverse_cache')
+        if cache is None:
+            cache = resolver._reverse_cache = ReverseCache(size, max_values)
+        url = cache.get(key)
+        record_cache('reverse_process', url is not None)
+        if url is None:
+            cache.misses += 1
+            url = reverse_with_prefix(resolver, lookup_view, _prefix, *args, **kwargs)
+            if cache.admits(lookup_view, arguments):
+                cache.add(key, url)
+        else:
+            cache.hits += 1
+
+        if request_results is not None:
+            request_results[resolver, key] = url
+        return url
+
+    _reverse_with_prefix.memoized = True
+    return _reverse_with_prefix
+
+
+def install(resolver_class=None, size=DEFAULT_REVERSE_CACHE_SIZE, max_values=DEFAULT_MAX_VALUES):
+    """
+    Memoizes the reverses of `resolver_class` (RegexURLResolver by default).
+    """
+    if resolver_class is None:
+        from django.core.urlresolvers import RegexURLResolver as resolver_class
+    method = resolver_class.__dict__.get('_reverse_with_prefix')
+    if method is None:
+        method = resolver_class._reverse_with_prefix
+    if not getattr(method, 'memoized', False):
+        resolver_class._reverse_with_prefix = memoized_reverse(method, size, max_values)
+
+
+def uninstall(resolver_class=None):
+    """
+    Removes the reverse cache of `resolver_class` (RegexURLResolver by default), when it is the last wrapper installed
+    around `_reverse_with_prefix`.
+    """
+    if resolver_class is None:
+        from django.core.urlresolvers import RegexURLResolver as resolver_class
+    method = resolver_class.__dict__.get('_reverse_with_prefix')
+    if getattr(method, 'memoized', False):
+        resolver_class._reverse_with_prefix = method.__wrapped__
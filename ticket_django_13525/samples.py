@@ -0,0 +1,187 @@
+"""
+Sample argument values derived from the subpattern of each group.
+
+Only the groups of the branches rendered get a value, `candidate_samples` renders the branches holding the
+groups of every candidate of a pattern.
+"""
+from random import Random
+from sre_constants import ANY, AT, BRANCH, GROUPREF, IN, LITERAL, MAX_REPEAT, MIN_REPEAT, NOT_LITERAL, SUBPATTERN, \
+    ASSERT, ASSERT_NOT, NEGATE
+
+from .better_regex_parser import ALLOWED_URL_CHARACTERS, DISPATCH_TABLE, in_char_class, iter_clauses, parse_pattern, \
+    reverse_groupdict
+
+
+def group_name(group_id, pattern_reverse_groupdict):
+    """
+    The argument name `normalize` uses for a group.
+    """
+    return pattern_reverse_groupdict.get(group_id, '_%d' % (group_id - 1))
+
+
+def has_group(parse_tree, group_ids):
+    """
+    Whether one of the groups `group_ids` is in the parse tree.
+    """
+    return any(clause_type == SUBPATTERN and clause_value[0] in group_ids
+               for clause_type, clause_value, _ in iter_clauses(parse_tree))
+
+
+class MinimalRenderer:
+    """
+    Renders the minimal string matched by a parse tree, making the same character choices as `normalize`.
+
+    Branches holding one of the `wanted` group ids are rendered rather than the first one.
+    """
+
+    def __init__(self):
+        self.wanted = frozenset()
+        self.handlers = {
+            ANY: self.render_char,
+            AT: self.render_nothing,
+            ASSERT: self.render_nothing,
+            ASSERT_NOT: self.render_nothing,
+            BRANCH: self.render_branch,
+            GROUPREF: self.render_groupref,
+            IN: self.render_char,
+            LITERAL: self.render_char,
+            MAX_REPEAT: self.render_repeat,
+            MIN_REPEAT: self.render_repeat,
+            NOT_LITERAL: self.render_char,
+            SUBPATTERN: self.render_subpattern,
+        }
+
+    def render(self, parse_tree, values):
+        """
+        Renders `parse_tree`, storing the string rendered for every group in `values` (by group id).
+        """
+        return ''.join(self.handlers[clause_type](clause_type, clause_value, values)
+                       for clause_type, clause_value in parse_tree)
+
+    def render_nothing(self, clause_type, clause_value, values):
+        return ''
+
+    def render_char(self, clause_type, clause_value, values):
+        format_string, _, _ = next(DISPATCH_TABLE[clause_type](clause_value, None))
+        return format_string
+
+    def render_branch(self, clause_type, clause_value, values):
+        _, subpatterns = clause_value
+        return self.render(self.choose_branch(subpatterns), values)
+
+    def render_groupref(self, clause_type, clause_value, values):
+        return values.get(clause_value, '')
+
+    def render_repeat(self, clause_type, clause_value, values):
+        min_repeat, max_repeat, subpattern = clause_value
+        return ''.join(self.render(subpattern, values) for _ in range(self.choose_repeat(min_repeat, max_repeat)))
+
+    def render_subpattern(self, clause_type, clause_value, values):
+        group_id, subpattern = clause_value
+        rendered = self.render(subpattern, values)
+        if group_id is not None:
+            values[group_id] = rendered
+        return rendered
+
+    def choose_branch(self, subpatterns):
+        if self.wanted:
+            for subpattern in subpatterns:
+                if has_group(subpattern, self.wanted):
+                    return subpattern
+        return subpatterns[0]
+
+    def choose_repeat(self, min_repeat, max_repeat):
+        # empty values are rarely what a url argument looks like, repeat at least once when allowed
+        return max(min_repeat, min(1, max_repeat))
+
+
+class RandomRenderer(MinimalRenderer):
+    """
+    Renders a random string matched by a parse tree, with characters picked from ALLOWED_URL_CHARACTERS
+    whenever the clause allows one of them.
+    """
+
+    def __init__(self, random=None, max_extra_repeat=8):
+        super().__init__()
+        self.random = random if random is not None else Random()
+        self.max_extra_repeat = max_extra_repeat
+        self.chars = {}
+
+    def render_char(self, clause_type, clause_value, values):
+        if clause_type == LITERAL:
+            return chr(clause_value)
+        try:
+            chars = self.chars[clause_type, id(clause_value)][1]
+        except KeyError:
+            chars = ''.join(chr(code_point)
+                            for first, last in self.char_class(clause_type, clause_value).intervals
+                            for code_point in range(first, last + 1))
+            # the clause is kept in the cache so that its id cannot be reused
+            self.chars[clause_type, id(clause_value)] = clause_value, chars
+        if not chars:
+            return super().render_char(clause_type, clause_value, values)
+        return self.random.choice(chars)
+
+    def render_repeat(self, clause_type, clause_value, values):
+        min_repeat, max_repeat, subpattern = clause_value
+        if len(subpattern) != 1 or subpattern[0][0] not in (ANY, IN, LITERAL, NOT_LITERAL):
+            return super().render_repeat(clause_type, clause_value, values)
+        # e.g. `\w+`, pick the characters without rendering the subpattern for each of them
+        char_type, char_value = subpattern[0]
+        return ''.join([self.render_char(char_type, char_value, values)
+                        for _ in range(self.choose_repeat(min_repeat, max_repeat))])
+
+    def char_class(self, clause_type, clause_value):
+        if clause_type == ANY:
+            return ALLOWED_URL_CHARACTERS
+        if clause_type == NOT_LITERAL:
+            clause_value = [(NEGATE, None), (LITERAL, clause_value)]
+        return in_char_class(clause_value, ALLOWED_URL_CHARACTERS)
+
+    def choose_branch(self, subpatterns):
+        return self.random.choice(subpatterns)
+
+    def choose_repeat(self, min_repeat, max_repeat):
+        return self.random.randint(min_repeat, min(max_repeat, min_repeat + self.max_extra_repeat))
+
+
+def group_sampler(pattern, renderer=None, args=()):
+    """
+    Returns a function rendering new sample values for the groups of `pattern` on every call,
+    keyed by the argument names `normalize` uses, rendering the branches holding the groups of `args`.
+    The pattern is parsed only once.
+    """
+    if renderer is None:
+        renderer = MinimalRenderer()
+    pattern_parse_tree = parse_pattern(pattern)
+    pattern_reverse_groupdict = reverse_groupdict(pattern_parse_tree.pattern.groupdict)
+    group_ids = pattern_parse_tree.pattern.groupdict
+    wanted = frozenset(group_ids[arg] if arg in group_ids else int(arg[1:]) + 1 for arg in args)
+
+    def sample():
+        values = {}
+        renderer.wanted = wanted
+        renderer.render(pattern_parse_tree, values)
+        return {group_name(group_id, pattern_reverse_groupdict): value for group_id, value in values.items()}
+
+    return sample
+
+
+def group_samples(pattern, renderer=None, args=()):
+    """
+    Returns a sample value for every group of `pattern` rendered, keyed by the argument names `normalize` uses.
+    """
+    return group_sampler(pattern, renderer, args)()
+
+
+def candidate_samples(pattern, candidates, renderer=None):
+    """
+    Returns a sample value for every argument of the `candidates` of `pattern`, (format string, args) pairs as
+    `normalize` yields them. The value of a group matches its subpattern, so it fits every candidate taking it.
+    """
+    samples = group_samples(pattern, renderer)
+    for _, args in candidates:
+        if not all(arg in samples for arg in args):
+            for arg, value in group_samples(pattern, renderer, args).items():
+                samples.setdefault(arg, value)
+    return samples
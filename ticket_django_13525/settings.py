@@ -36,6 +36,7 @@ INSTALLED_APPS = (
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'ticket_django_13525',
 )
 
 MIDDLEWARE_CLASSES = (
@@ -45,10 +46,38 @@ MIDDLEWARE_CLASSES = (
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'ticket_django_13525.middleware.URLMetricsMiddleware',
+    'ticket_django_13525.middleware.ReverseCacheMiddleware',
 )
 
 ROOT_URLCONF = 'ticket_django_13525.urls'
 
+# build the reverse data of the resolvers with better_regex_parser
+URL_BETTER_RESOLVER = False
+
+# read the candidate lists of URL_BETTER_RESOLVER from this normalization table file, shared by the processes
+# of the host and built when missing or stale (see normalization_table), None normalizes in every process
+URL_NORMALIZATION_TABLE = None
+
+# remember up to this many reverse() calls that cannot match any url, 0 disables the cache
+URL_NEGATIVE_CACHE_SIZE = 0
+
+# only try the urls whose length bounds and literals fit the path (see prefilter)
+URL_PREFILTER = False
+
+# try the most matched urls of each resolver first, where that cannot change the url a path resolves to,
+# reordering them every this many resolves (see adaptive_order), instead of URL_PREFILTER, 0 disables it
+URL_ADAPTIVE_ORDER = 0
+
+# resolve paths with one combined regex per urlconf (see master_regex), instead of URL_PREFILTER
+# and URL_ADAPTIVE_ORDER
+URL_MASTER_REGEX = False
+
+# remember up to this many reverse() results across requests, for urls reversed with at most
+# URL_REVERSE_CACHE_MAX_VALUES distinct arguments, 0 disables the cache
+URL_REVERSE_CACHE_SIZE = 0
+URL_REVERSE_CACHE_MAX_VALUES = 16
+
 WSGI_APPLICATION = 'ticket_django_13525.wsgi.application'
 
 
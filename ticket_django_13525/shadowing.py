@@ -0,0 +1,325 @@
+"""
+Urls that can never match because every path they match is matched by an earlier url.
+
+The resolvers try the urls in urlconf order and stop at the first match, so a url whose language is contained in
+the language of an earlier url is dead, yet its regex still runs on every request that reaches it. The languages
+are compared on their parse trees, as sequences of runs, a character class repeated a bounded or unbounded number
+of times: `^blog/(?P<slug>[-\\w]+)/$` is `b`, `l`, `o`, `g`, `/`, `[-\\w]` 1 or more times, `/`, and an optional
+newline for the `$`. An earlier url covers a later one when each of its runs takes a consecutive group of runs of
+the later url whose characters are all in its class and whose lengths fit its repetitions. Urls are only compared
+with the earlier urls whose literal prefix starts their own.
+
+The check only proves containment, patterns with alternatives, optional groups of several characters, lookarounds,
+backreferences or case-insensitive matching are never reported.
+
+    python manage.py shadowed_urls
+"""
+from collections import namedtuple
+import re
+from sre_constants import ANY, AT, AT_END, AT_END_STRING, IN, LITERAL, MAX_REPEAT, MAXREPEAT, MIN_REPEAT, \
+    NOT_LITERAL, SUBPATTERN
+import time
+
+from .better_regex_parser import ALL_CHARACTERS, CharClass, in_char_class, parse_pattern
+from .prefilter import BEGINNING_ANCHORS, length_bounds
+from .url_corpus import generate_urls, route_plans
+from .urlconf import Route, join_patterns
+
+# fixed repeats expanded to single characters, so that they can be split between the runs of another url
+MAX_EXPANDED_REPEAT = 16
+DEFAULT_REPEAT = 100
+
+Run = namedtuple('Run', ('char_class', 'min_repeat', 'max_repeat'))
+Run.__doc__ = """
+A character class repeated `min_repeat` to `max_repeat` times, `max_repeat` is None when unbounded.
+"""
+
+RouteRuns = namedtuple('RouteRuns', ('route', 'resolvers', 'url_pattern', 'runs', 'exact'))
+RouteRuns.__doc__ = """
+The runs of the paths a url matches, from the root of the urlconf. The runs are `exact` when the url matches every
+path they describe, and only contain the paths it matches otherwise (includes whose pattern can match prefixes of
+different lengths).
+"""
+
+ShadowedRoute = namedtuple('ShadowedRoute', ('route', 'shadowed_by', 'wasted_seconds'))
+ShadowedRoute.__doc__ = """
+A dead url, the earlier url matching all its paths, and the estimated time its regex takes on every request
+reaching it.
+"""
+
+ANY_BUT_NEWLINE = ~CharClass.from_chars('\n')
+NEWLINE = CharClass.from_chars('\n')
+
+# CharClasses of `in` clauses and runs of include patterns, shared by the many urls using the same ones
+_char_classes = {}
+_level_runs_cache = {}
+
+
+def _in_char_class(clause, ascii):
+    key = tuple(clause), ascii
+    try:
+        return _char_classes[key]
+    except KeyError:
+        char_class = _char_classes[key] = in_char_class(clause, ascii=ascii)
+        return char_class
+
+
+def pattern_runs(parse_tree, flags=0):
+    """
+    Returns the runs of the strings matched by a parse tree without anchors, or None when they cannot be told.
+
+    >>> pattern_runs(parse_pattern(r'a[0-9]{2,}'))
+    [Run(char_class=CharClass(((97, 97),)), min_repeat=1, max_repeat=1), \
+Run(char_class=CharClass(((48, 57),)), min_repeat=2, max_repeat=None)]
+    """
+    runs = []
+    for clause_type, clause_value in parse_tree:
+        if clause_type == LITERAL:
+            runs.append(Run(CharClass([(clause_value, clause_value)]), 1, 1))
+        elif clause_type == NOT_LITERAL:
+            runs.append(Run(~CharClass([(clause_value, clause_value)]), 1, 1))
+        elif clause_type == IN:
+            runs.append(Run(_in_char_class(clause_value, bool(flags & re.ASCII)), 1, 1))
+        elif clause_type == ANY:
+            runs.append(Run(ALL_CHARACTERS if flags & re.DOTALL else ANY_BUT_NEWLINE, 1, 1))
+        elif clause_type == SUBPATTERN:
+            subpattern_runs = pattern_runs(clause_value[1], flags)
+            if subpattern_runs is None:
+                return None
+            runs.extend(subpattern_runs)
+        elif clause_type == MAX_REPEAT or clause_type == MIN_REPEAT:
+            min_repeat, max_repeat, subpattern = clause_value
+            subpattern_runs = pattern_runs(subpattern, flags)
+            if subpattern_runs is None:
+                return None
+            if len(subpattern_runs) == 1 and subpattern_runs[0][1:] == (1, 1):
+                runs.append(Run(subpattern_runs[0].char_class, min_repeat,
+                                None if max_repeat == MAXREPEAT else max_repeat))
+            elif min_repeat == max_repeat and \
+                    all(run.max_repeat is not None for run in subpattern_runs) and \
+                    len(subpattern_runs) * min_repeat <= MAX_EXPANDED_REPEAT:
+                runs.extend(subpattern_runs * min_repeat)
+            else:
+                return None
+        else:
+            # alternatives, anchors inside the pattern, lookarounds, backreferences
+            return None
+    return runs
+
+
+def _merged(runs):
+    # consecutive runs of the same class are one run
+    merged = []
+    for run in runs:
+        if merged and merged[-1].char_class == run.char_class:
+            last = merged[-1]
+            merged[-1] = Run(run.char_class, last.min_repeat + run.min_repeat,
+                             None if last.max_repeat is None or run.max_repeat is None else
+                             last.max_repeat + run.max_repeat)
+        else:
+            merged.append(run)
+    return merged
+
+
+def _level_runs(pattern, leaf):
+    """
+    Returns the runs of the part of the path matched by the pattern of a url or an include, searched in the rest of
+    the path, and whether the pattern is anchored at the start.
+    """
+    parse_tree = parse_pattern(pattern)
+    flags = parse_tree.pattern.flags
+    if flags & (re.IGNORECASE | re.LOCALE | re.MULTILINE):
+        return None, False
+    clauses = list(parse_tree)
+    anchored = bool(clauses) and clauses[0] in BEGINNING_ANCHORS
+    runs = [] if anchored else [Run(ALL_CHARACTERS, 0, None)]
+    end = []
+    if anchored:
+        clauses = clauses[1:]
+    if leaf:
+        if clauses and clauses[-1] == (AT, AT_END):
+            # `$` also matches before a newline at the end
+            end = [Run(NEWLINE, 0, 1)]
+            clauses = clauses[:-1]
+        elif clauses and clauses[-1] == (AT, AT_END_STRING):
+            clauses = clauses[:-1]
+        else:
+            end = [Run(ALL_CHARACTERS, 0, None)]
+    body = pattern_runs(clauses, flags)
+    if body is None:
+        return None, False
+    return runs + body + end, anchored
+
+
+def _route(resolvers, url_pattern):
+    prefix = ''
+    for resolver in resolvers:
+        prefix = join_patterns(prefix, resolver.regex.pattern)
+    return Route(url_pattern.name, join_patterns(prefix, url_pattern.regex.pattern), url_pattern.callback,
+                 url_pattern.default_args)
+
+
+def route_runs(resolvers, url_pattern):
+    """
+    Returns the RouteRuns of `url_pattern` reached through the includes `resolvers`, or None.
+    """
+    runs = []
+    exact = True
+    for resolver in resolvers:
+        pattern = resolver.regex.pattern
+        if pattern not in _level_runs_cache:
+            level_runs, anchored = _level_runs(pattern, False)
+            min_length, max_length = length_bounds(parse_pattern(pattern))
+            # the rest of the path only follows a unique match when it is anchored and of fixed length
+            _level_runs_cache[pattern] = level_runs, anchored and min_length == max_length
+        level_runs, unique = _level_runs_cache[pattern]
+        if level_runs is None:
+            return None
+        exact = exact and unique
+        runs.extend(level_runs)
+    level_runs, _ = _level_runs(url_pattern.regex.pattern, True)
+    if level_runs is None:
+        return None
+    runs.extend(level_runs)
+    return RouteRuns(_route(resolvers, url_pattern), resolvers, url_pattern, _merged(runs), exact)
+
+
+def _expanded(runs):
+    expanded = []
+    for run in runs:
+        if run.min_repeat == run.max_repeat and run.min_repeat <= MAX_EXPANDED_REPEAT:
+            expanded.extend([Run(run.char_class, 1, 1)] * run.min_repeat)
+        else:
+            expanded.append(run)
+    return expanded
+
+
+def covers(runs, other_runs):
+    """
+    Whether every string described by `other_runs` is described by `runs`.
+    """
+    other_runs = _expanded(other_runs)
+    # reachable[j]: the runs so far can take the first j runs of other_runs
+    reachable = {0}
+    for run in runs:
+        next_reachable = set()
+        for start in reachable:
+            min_length = max_length = 0
+            end = start
+            while True:
+                if min_length >= run.min_repeat and \
+                        (run.max_repeat is None or max_length is not None and max_length <= run.max_repeat):
+                    next_reachable.add(end)
+                if end == len(other_runs):
+                    break
+                other = other_runs[end]
+                if other.char_class - run.char_class:
+                    break
+                min_length += other.min_repeat
+                max_length = None if max_length is None or other.max_repeat is None else \
+                    max_length + other.max_repeat
+                if run.max_repeat is not None and (max_length is None or max_length > run.max_repeat):
+                    break
+                end += 1
+        reachable = next_reachable
+        if not reachable:
+            return False
+    return len(other_runs) in reachable
+
+
+def literal_prefix(runs):
+    """
+    The characters every string described by `runs` starts with.
+    """
+    chars = []
+    for run in runs:
+        intervals = run.char_class.intervals
+        if len(intervals) != 1 or intervals[0][0] != intervals[0][1] or not run.min_repeat:
+            break
+        chars.append(chr(intervals[0][0]) * run.min_repeat)
+        if run.max_repeat != run.min_repeat:
+            break
+    return ''.join(chars)
+
+
+def _leaves(url_patterns, resolvers=()):
+    for url_pattern in url_patterns:
+        if hasattr(url_pattern, 'url_patterns'):
+            yield from _leaves(url_pattern.url_patterns, resolvers + (url_pattern,))
+        else:
+            yield resolvers, url_pattern
+
+
+def find_shadowed(url_patterns):
+    """
+    Yields (RouteRuns of a dead url, RouteRuns of the first earlier url covering it) for the urls of
+    `url_patterns`, in urlconf order.
+    """
+    # (position, RouteRuns) of the urls seen so far, by literal prefix
+    by_prefix = {}
+    for position, (resolvers, url_pattern) in enumerate(_leaves(url_patterns)):
+        try:
+            shape = route_runs(resolvers, url_pattern)
+        except (re.error, NotImplementedError):
+            # invalid patterns are reported by Django itself
+            continue
+        if shape is None:
+            continue
+        prefix = literal_prefix(shape.runs)
+        candidates = sorted((earlier for length in range(len(prefix) + 1)
+                             for earlier in by_prefix.get(prefix[:length], ())), key=lambda earlier: earlier[0])
+        for _, earlier in candidates:
+            if covers(earlier.runs, shape.runs):
+                yield shape, earlier
+                break
+        else:
+            if shape.exact:
+                by_prefix.setdefault(prefix, []).append((position, shape))
+
+
+def _remainder(resolvers, path):
+    # the part of `path` the url is searched in, or None when the includes do not let it through
+    for resolver in resolvers:
+        match = resolver.regex.search(path)
+        if match is None:
+            return None
+        path = path[match.end():]
+    return path
+
+
+def wasted_seconds(dead, paths, repeat=DEFAULT_REPEAT):
+    """
+    Estimates the time the regex of a dead url takes on every request reaching it, searching it in `paths`, example
+    paths of the urls after it, or in an empty path (like an unmatched request) when none of them reach it.
+    """
+    paths = [_remainder(dead.resolvers, path) for path in paths]
+    paths = [path for path in paths if path is not None] or ['']
+    search = dead.url_pattern.regex.search
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for path in paths:
+            search(path)
+    return (time.perf_counter() - started) / (repeat * len(paths))
+
+
+def shadowed_routes(urlconf=None, repeat=DEFAULT_REPEAT):
+    """
+    Returns the ShadowedRoutes of `urlconf` (ROOT_URLCONF by default).
+    """
+    from django.core.urlresolvers import get_resolver
+
+    url_patterns = get_resolver(urlconf).url_patterns
+    shadowed = list(find_shadowed(url_patterns))
+    if not shadowed:
+        return []
+    leaves = list(_leaves(url_patterns))
+    routes = [_route(resolvers, url_pattern) for resolvers, url_pattern in leaves]
+    plans, _ = route_plans(routes)
+    # one example path per url, None for the urls no path can be generated for
+    example_paths = dict(zip((id(plan.route) for plan in plans), generate_urls(plans, len(plans), '')))
+    paths = [example_paths.get(id(route)) for route in routes]
+    positions = {id(url_pattern): position for position, (_, url_pattern) in enumerate(leaves)}
+    return [ShadowedRoute(dead.route, earlier.route,
+                          wasted_seconds(dead, [path for path in paths[positions[id(dead.url_pattern)] + 1:]
+                                                if path is not None], repeat))
+            for dead, earlier in shadowed]
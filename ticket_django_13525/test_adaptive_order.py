@@ -0,0 +1,101 @@
+import types
+
+from django.conf.urls import include, url
+from django.core.urlresolvers import RegexURLResolver, Resolver404
+from django.test import SimpleTestCase
+
+from ticket_django_13525.adaptive_order import AdaptiveURLResolver, RouteShape, ScanOrder, disjoint, \
+    position_classes, reorder, route_shape, scan_order
+from ticket_django_13525.better_regex_parser import CharClass, parse_pattern
+
+
+def view(request, *args, **kwargs):
+    pass
+
+
+urlconf = types.ModuleType('adaptive_order_urlconf')
+urlconf.urlpatterns = [
+    url(r'^export/(?P<format>\w+)$', view, name='export'),
+    url(r'^(?P<year>\d{4})/$', view, name='year'),
+    url(r'^blog/', include([
+        url(r'^(?P<slug>[-\w]+)/$', view, name='post'),
+    ])),
+    url(r'^(?P<slug>[-\w]+)/$', view, name='page'),
+    url(r'^about/$', view, name='about'),
+    url(r'^api/v1/(?P<id>\d+)/$', view, name='api'),
+]
+
+PATHS = ['/export/json', '/2014/', '/blog/a-b/', '/about/', '/api/v1/2/', '/api/v1/x/', '/x/y/', '/']
+
+
+class AnalysisTestCase(SimpleTestCase):
+    def test_position_classes(self):
+        a, b = CharClass.from_chars('a'), CharClass.from_chars('b')
+        digits = CharClass([(ord('0'), ord('9'))])
+        self.assertEqual(position_classes(parse_pattern(r'^a(?:b){2}[0-9]$')), ([a, b, b, digits], True))
+        self.assertEqual(position_classes(parse_pattern(r'^ab?a')), ([a], False))
+        self.assertEqual(position_classes(parse_pattern(r'^(ab|c)a')), ([], False))
+        self.assertEqual(position_classes(parse_pattern(r'^ab+')), ([a, b], False))
+        self.assertEqual(len(position_classes(parse_pattern(r'^a{100}'), limit=3)[0]), 3)
+
+    def test_route_shape(self):
+        resolver = RegexURLResolver(r'^/', urlconf)
+        shapes = [route_shape(url_pattern) for url_pattern in resolver.url_patterns]
+        self.assertEqual(shapes[1][:2], (5, 6))
+        self.assertEqual(len(shapes[1].classes), 5)
+        # only the pattern of the include is known
+        self.assertEqual(len(shapes[2].classes), 5)
+        self.assertEqual(route_shape(url(r'(?i)^help/$', view)).classes, [])
+        self.assertEqual(route_shape(url(r'help/$', view)).classes, [])
+
+    def test_disjoint(self):
+        resolver = RegexURLResolver(r'^/', urlconf)
+        export, year, blog, page, about, api = [route_shape(url_pattern) for url_pattern in resolver.url_patterns]
+        self.assertTrue(disjoint(api, export))
+        self.assertTrue(disjoint(api, year))
+        self.assertTrue(disjoint(about, year))
+        self.assertTrue(disjoint(about, blog))
+        self.assertTrue(disjoint(about, api))
+        self.assertFalse(disjoint(about, page))
+        self.assertFalse(disjoint(blog, page))
+        self.assertTrue(disjoint(RouteShape(1, 2, []), RouteShape(3, None, [])))
+        self.assertFalse(disjoint(RouteShape(1, None, []), RouteShape(3, None, [])))
+
+
+class ReorderTestCase(SimpleTestCase):
+    def test_reorder(self):
+        shapes = [route_shape(url_pattern) for url_pattern in RegexURLResolver(r'^/', urlconf).url_patterns]
+        self.assertEqual(reorder(range(6), [0, 3, 0, 0, 0, 0], shapes), [1, 0, 2, 3, 4, 5])
+        self.assertEqual(reorder(range(6), [0, 0, 3, 0, 0, 0], shapes), [2, 0, 1, 3, 4, 5])
+        # api and about could both match a path page matches first
+        self.assertEqual(reorder(range(6), [0, 0, 0, 0, 0, 9], shapes), [0, 1, 2, 3, 5, 4])
+        self.assertEqual(reorder(range(6), [0, 0, 0, 0, 9, 0], shapes), [0, 1, 2, 3, 4, 5])
+        # a url does not move past more matched urls
+        self.assertEqual(reorder(range(6), [7, 0, 3, 0, 0, 0], shapes), [0, 2, 1, 3, 4, 5])
+        self.assertEqual(reorder(range(6), [0, 0, 0, 0, 9, 5], shapes), [0, 1, 2, 3, 4, 5])
+
+    def test_scan_order(self):
+        order = ScanOrder(RegexURLResolver(r'^/', urlconf).url_patterns, reorder_every=4)
+        for _ in range(4):
+            order.record(2)
+        self.assertEqual([index for index, _ in order.patterns()], [2, 0, 1, 3, 4, 5])
+        self.assertEqual(order.counts, [0, 0, 2, 0, 0, 0])
+        self.assertEqual(order.resolves, 0)
+
+
+class AdaptiveResolverTestCase(SimpleTestCase):
+    def test_same_as_stock_resolver(self):
+        resolver = AdaptiveURLResolver(r'^/', urlconf)
+        resolver.reorder_every = 3
+        for path in PATHS * 5 + ['/blog/a/', '/2014/'] * 10 + PATHS:
+            try:
+                expected = RegexURLResolver(r'^/', urlconf).resolve(path)
+            except Resolver404:
+                with self.assertRaises(Resolver404):
+                    resolver.resolve(path)
+                continue
+            resolver_match = resolver.resolve(path)
+            self.assertEqual((resolver_match.url_name, resolver_match.args, resolver_match.kwargs),
+                             (expected.url_name, expected.args, expected.kwargs), path)
+        self.assertEqual([url_pattern.name for url_pattern in resolver.url_patterns[:2]], ['export', 'year'])
+        self.assertEqual(scan_order(resolver).order[2:], [0, 3, 5, 4])
@@ -1,6 +1,12 @@
+import re
+import sre_constants
+from sre_constants import AT, AT_BEGINNING, AT_END, BRANCH, LITERAL, NOT_LITERAL, SUBPATTERN
+import sys
 import unittest
 
-from better_regex_parser import normalize, reverse_groupdict, unique_list
+from better_regex_parser import normalize, reverse_groupdict, unique_list, CharClass, CATEGORY_MAP, WORD, \
+    normalize_segments, flatten, Concat, Repeat, Slot, simplify, _normalize, Context, matched_char_class, \
+    quote_free_args, URL_SAFE_CHARACTERS
 
 
 class RegexParserTestCase(unittest.TestCase):
@@ -247,6 +253,141 @@ class RegexParserTestCase(unittest.TestCase):
                              ('!', []),
                          ])
 
+    def test_normalize_negated_categories(self):
+        self.assertEqual(list(normalize(r'[^\W\d]')),
+                         [
+                             ('A', []),
+                         ])
+
+    def test_normalize_non_ascii_class(self):
+        self.assertEqual(list(normalize(r'[ą-ż](group)')),
+                         [
+                             ('ą%(_0)s', ['_0']),
+                         ])
+
+    def test_normalize_negated_ascii(self):
+        self.assertEqual(list(normalize(r'[^\x00-\x7f]')),
+                         [
+                             ('\x80', []),
+                         ])
+
+
+class CharClassTestCase(unittest.TestCase):
+    def test_merge(self):
+        self.assertEqual(CharClass([(5, 7), (1, 2), (3, 3), (6, 9)]).intervals, ((1, 3), (5, 9)))
+
+    def test_complement(self):
+        self.assertEqual((~CharClass([(0, 9), (20, 29)])).intervals, ((10, 19), (30, sys.maxunicode)))
+        self.assertEqual(~~CharClass.from_chars('abc'), CharClass.from_chars('abc'))
+
+    def test_intersection(self):
+        self.assertEqual((CharClass([(0, 10), (20, 30)]) & CharClass([(5, 25)])).intervals, ((5, 10), (20, 25)))
+
+    def test_difference(self):
+        self.assertEqual(CharClass.from_chars('abcd') - CharClass.from_chars('bc'), CharClass.from_chars('ad'))
+
+    def test_contains(self):
+        char_class = CharClass.from_chars('ace')
+        self.assertIn('c', char_class)
+        self.assertNotIn('b', char_class)
+        self.assertNotIn('f', char_class)
+
+    def test_min(self):
+        self.assertEqual(CharClass.from_chars('zyx').min(), 'x')
+        self.assertRaises(ValueError, CharClass().min)
+
+    def test_unicode_categories(self):
+        self.assertIn('ż', WORD)
+        self.assertIn('٣', CATEGORY_MAP[sre_constants.CATEGORY_DIGIT].char_class)
+        self.assertNotIn('ż', CATEGORY_MAP[sre_constants.CATEGORY_NOT_WORD].char_class)
+        self.assertIn('\u2003', CATEGORY_MAP[sre_constants.CATEGORY_SPACE].char_class)
+        self.assertEqual(len(CATEGORY_MAP[sre_constants.CATEGORY_NOT_DIGIT].char_class) + len(
+            CATEGORY_MAP[sre_constants.CATEGORY_DIGIT].char_class), sys.maxunicode + 1)
+
+
+class QuoteFreeTestCase(unittest.TestCase):
+    def test_matched_char_class(self):
+        self.assertEqual(matched_char_class(re.sre_parse.parse('a[b-c]+|d')), CharClass.from_chars('abcd'))
+        self.assertIsNone(matched_char_class(re.sre_parse.parse('(a)\\1')))
+        self.assertIsNone(matched_char_class(re.sre_parse.parse('a'), re.IGNORECASE))
+
+    def test_quote_free_args(self):
+        self.assertEqual(quote_free_args(r'^(?P<a>[a-z0-9-]+)/(?P<b>\d+)/(?P<c>[^/]+)/(\w+)/(?P<d>[+~]?)$'),
+                         {'a', 'd'})
+        self.assertEqual(quote_free_args(r'(?a)^(?P<b>\d+)/(\w+)/(?P<c>\W)$'), {'b', '_1'})
+
+    def test_safe_characters(self):
+        from urllib.parse import quote
+
+        for code_point in range(128):
+            self.assertEqual(chr(code_point) in URL_SAFE_CHARACTERS,
+                             quote(chr(code_point), "!$&'()*+,;=" + '/~:@') == chr(code_point))
+
+
+class SegmentTestCase(unittest.TestCase):
+    def test_flatten(self):
+        segment = Concat(('a', Repeat(Concat(('b', Slot('x'))), 3), 'c'))
+        self.assertEqual(flatten(segment), 'ab%(x)sb%(x)sb%(x)sc')
+
+    def test_long_repeats_are_not_built(self):
+        (segment, args), = normalize_segments(r'(?:ab{2000}){100}(?P<x>a)')
+        self.assertIsInstance(segment, Concat)
+        self.assertEqual(segment.parts[0].count, 100)
+        self.assertEqual(args, ['x'])
+        self.assertEqual(flatten(segment), ('a' + 'b' * 2000) * 100 + '%(x)s')
+
+    def test_shared_repeats_are_flattened_once(self):
+        cache = {}
+        candidates = [flatten(segment, cache) for segment, args in normalize_segments(r'(?:a{5000})(?P<x>b)?')]
+        self.assertEqual(candidates, ['a' * 5000, 'a' * 5000 + '%(x)s'])
+        self.assertEqual(len(cache), 1)
+
+
+def tree_data(parse_tree):
+    """
+    Parse tree as nested lists and tuples, subpatterns do not compare equal.
+    """
+    if isinstance(parse_tree, (list, tuple)) or hasattr(parse_tree, 'data'):
+        return type(parse_tree)(tree_data(item) for item in parse_tree) if isinstance(parse_tree, tuple) \
+            else [tree_data(item) for item in parse_tree]
+    return parse_tree
+
+
+class SimplifyTestCase(unittest.TestCase):
+    def assertSimplified(self, pattern, parse_tree, removed):
+        simplified, removed_nodes = simplify(re.sre_parse.parse(pattern))
+        self.assertEqual(tree_data(simplified), parse_tree)
+        self.assertEqual(removed_nodes, removed)
+
+    def test_non_capturing_groups(self):
+        self.assertSimplified('(?:(?:a)b)(c)', [(LITERAL, 97), (LITERAL, 98), (SUBPATTERN, (1, [(LITERAL, 99)]))], 2)
+
+    def test_single_repeat(self):
+        self.assertSimplified('a{1}(?:bc){1}', [(LITERAL, 97), (LITERAL, 98), (LITERAL, 99)], 3)
+
+    def test_single_character_classes(self):
+        self.assertSimplified('[a-a][^b]', [(LITERAL, 97), (NOT_LITERAL, 98)], 1)
+
+    def test_repeated_anchors(self):
+        self.assertSimplified('^(?:^a)$$', [(AT, AT_BEGINNING), (LITERAL, 97), (AT, AT_END)], 3)
+
+    def test_common_prefix(self):
+        self.assertSimplified('(?:a)b|(?:a)c',
+                              [(LITERAL, 97), (BRANCH, (None, [[(LITERAL, 98)], [(LITERAL, 99)]]))], 3)
+
+    def test_branch_order_is_kept(self):
+        # the shared alternatives yield several candidates, factoring them out would reorder the candidates
+        simplified, _ = simplify(re.sre_parse.parse('(?:(x)|y)a|(?:(x)|y)b'))
+        self.assertEqual([clause_type for clause_type, clause_value in simplified], [BRANCH])
+
+    def test_candidates_are_kept(self):
+        for pattern in ('^(?:a|(?P<b>[b]))(?:[.](?P<c>x)|[.]y){1}$$', '(?:(x)|y)a|(?:(x)|y)b', '^(?:(?:a)(b)?){1}c$'):
+            parse_tree = re.sre_parse.parse(pattern)
+            context = Context(reverse_groupdict(parse_tree.pattern.groupdict), False)
+            simplified, _ = simplify(parse_tree)
+            self.assertEqual([(flatten(segment), args) for segment, args, refs in _normalize(simplified, context)],
+                             [(flatten(segment), args) for segment, args, refs in _normalize(parse_tree, context)])
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,116 @@
+import io
+import json
+import os
+import tempfile
+
+from django.conf.urls import include, url
+from django.core.management import call_command
+from django.core.urlresolvers import RegexURLResolver, Resolver404, get_resolver
+from django.test import SimpleTestCase
+
+from ticket_django_13525.bulk_resolve import BulkResolver, PrefixTable, Resolution, RouteCounts, read_paths
+
+
+def view(request, *args, **kwargs):
+    pass
+
+
+urlpatterns = [
+    url(r'^export1\.(?P<format>\w+)$', view, name='export'),
+    url(r'^(?P<year>\d{4})/$', view, name='year'),
+    url(r'^blog/', include([
+        url(r'^(?P<slug>[-\w]+)/$', view, name='post'),
+        url(r'^archive/(\d+)/$', view, name='archive'),
+    ], namespace='blog'), {'section': 'blog'}),
+    url(r'^[a-z]+/', include([
+        url(r'^x$', view, name='nested'),
+    ])),
+    url(r'(?i)help/$', view, name='help'),
+    url(r'^about/$', view, {'page': 1}, name='about'),
+]
+
+URLCONF = 'ticket_django_13525.test_bulk_resolve'
+PATHS = ['/export1.json', '/2014/', '/blog/a-b/', '/blog/archive/2/', '/blog/archive/x/', '/blog/x', '/ab/x',
+         '/a/HELP/', '/about/', '/abouts/', '/', '']
+
+
+class PrefixTableTestCase(SimpleTestCase):
+    def test_candidates(self):
+        table = PrefixTable(RegexURLResolver(r'^/', URLCONF))
+        self.assertEqual([table.routes[position].url_pattern.name for position in table.candidates('/blog/x/')],
+                         ['year', 'post', 'nested', 'help'])
+        self.assertEqual([table.routes[position].url_pattern.name for position in table.candidates('/2014/')],
+                         ['year', 'nested', 'help'])
+
+    def test_same_as_stock_resolver(self):
+        table = PrefixTable(RegexURLResolver(r'^/', URLCONF))
+        for path in PATHS:
+            try:
+                expected = RegexURLResolver(r'^/', URLCONF).resolve(path)
+            except Resolver404:
+                self.assertIsNone(table.resolve(path), path)
+                continue
+            resolver_match = table.resolve(path)
+            self.assertEqual((resolver_match.view_name, resolver_match.args, resolver_match.kwargs),
+                             (expected.view_name, expected.args, expected.kwargs), path)
+
+
+class BulkResolverTestCase(SimpleTestCase):
+    def test_read_paths(self):
+        self.assertEqual(list(read_paths(['/a%20b/?q=1\n', '\n', ' /c/ \n'])), ['/a b/', '/c/'])
+
+    def expected(self, path):
+        try:
+            resolver_match = get_resolver(URLCONF).resolve(path)
+        except Resolver404:
+            return None
+        return Resolution(resolver_match.view_name, resolver_match.args, resolver_match.kwargs)
+
+    def test_resolve_paths(self):
+        paths = [path for path in PATHS for _ in range(3)]
+        resolver = BulkResolver(URLCONF, processes=1, cache_size=4, chunk_size=5)
+        self.assertEqual(list(resolver.resolve_paths(paths)), [(path, self.expected(path)) for path in paths])
+        self.assertEqual(resolver.hits + resolver.misses, len(paths))
+        self.assertEqual(resolver.misses, len(PATHS))
+
+    def test_pool(self):
+        paths = PATHS * 3
+        resolver = BulkResolver(URLCONF, processes=2, chunk_size=4)
+        self.assertEqual(list(resolver.resolve_paths(paths)), [(path, self.expected(path)) for path in paths])
+
+    def test_route_counts(self):
+        counts = RouteCounts(max_values=1)
+        for resolution in [Resolution('post', (), {'slug': 'a'}), Resolution('post', (), {'slug': 'b'}),
+                           Resolution('post', (), {'slug': 'a'}), None, Resolution('about', (), {'page': 1})]:
+            counts.add(resolution)
+        self.assertEqual(list(counts.records()), [
+            {'route': 'post', 'count': 3, 'kwargs': {'slug': {'a': 2}}, 'dropped': {'slug': 1}},
+            {'route': None, 'count': 1, 'kwargs': {}, 'dropped': {}},
+            {'route': 'about', 'count': 1, 'kwargs': {'page': {'1': 1}}, 'dropped': {}},
+        ])
+
+
+class BulkResolveCommandTestCase(SimpleTestCase):
+    def call(self, **options):
+        fd, path = tempfile.mkstemp()
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(PATHS))
+        stdout = io.StringIO()
+        try:
+            call_command('bulk_resolve', path, urlconf=URLCONF, processes=1, stdout=stdout, stderr=io.StringIO(),
+                         **options)
+        finally:
+            os.unlink(path)
+        return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+    def test_counts(self):
+        records = self.call()
+        self.assertEqual(records[0], {'route': None, 'count': 3, 'kwargs': {}, 'dropped': {}})
+        self.assertIn({'route': 'blog:post', 'count': 1, 'kwargs': {'slug': {'a-b': 1}, 'section': {'blog': 1}},
+                       'dropped': {}}, records)
+
+    def test_paths(self):
+        records = self.call(paths=True)
+        self.assertEqual([record['path'] for record in records], [path for path in PATHS if path])
+        self.assertEqual(records[3], {'path': '/blog/archive/2/', 'route': 'blog:archive', 'args': ['2'],
+                                      'kwargs': {'section': 'blog'}})
@@ -0,0 +1,94 @@
+import io
+
+from django.core.urlresolvers import NoReverseMatch, reverse
+from django.test import SimpleTestCase
+
+from ticket_django_13525.better_regex_parser import normalize_list
+from ticket_django_13525.bulk_reverse import BulkReverser, batches, write_urls
+
+
+class BulkReverseTestCase(SimpleTestCase):
+    def test_same_as_reverse(self):
+        reverser = BulkReverser.for_url_name('this')
+        kwargs_list = [{'format': 'json'}, {'format': 'é'}]
+        self.assertEqual(list(reverser.reverse_all(kwargs_list)), [reverse('this', kwargs=kwargs)
+                                                                  for kwargs in kwargs_list])
+
+    def test_optional_group(self):
+        reverser = BulkReverser.for_url_name('that')
+        self.assertEqual(list(reverser.reverse_all([{}, {'format': 'json'}, {'_0': '.x'}])),
+                         ['/export2', '/export2.json', '/export2.x'])
+
+    def test_candidates_are_selected_once_per_key_set(self):
+        reverser = BulkReverser(r'^(?P<qq1>\d+)(?P<qq2>\d+)?$')
+        urls = list(reverser.reverse_all({'qq1': i} if i % 2 else {'qq1': i, 'qq2': 7} for i in range(6)))
+        self.assertEqual(urls, ['/07', '/1', '/27', '/3', '/47', '/5'])
+        self.assertEqual(set(reverser.selections), {frozenset(['qq1']), frozenset(['qq1', 'qq2'])})
+
+    def test_columns(self):
+        reverser = BulkReverser(r'^(?P<year>\d{4})/(?P<slug>[^/]+)/$', prefix='/blog/')
+        self.assertEqual(list(reverser.reverse_columns({'year': [2014, 2015], 'slug': ['a', 'b c']})),
+                         ['/blog/2014/a/', '/blog/2015/b%20c/'])
+
+    def test_not_matched(self):
+        reverser = BulkReverser(r'^(?P<year>\d{4})/$')
+        with self.assertRaises(NoReverseMatch):
+            list(reverser.reverse_all([{'year': 2014}, {'year': 'x'}]))
+        with self.assertRaises(NoReverseMatch):
+            reverser.reverse({'month': 1})
+
+    def test_candidates_without_pattern(self):
+        reverser = BulkReverser(candidates=normalize_list(r'^(?P<year>\d{4})/$'))
+        self.assertEqual(reverser.reverse({'year': 'x'}), '/x/')
+
+    def test_defaults(self):
+        reverser = BulkReverser(r'^feed/(?P<kind>\w+)$', defaults={'format': 'rss'})
+        self.assertEqual(reverser.reverse({'kind': 'news', 'format': 'rss'}), '/feed/news')
+        with self.assertRaises(NoReverseMatch):
+            reverser.reverse({'kind': 'news', 'format': 'atom'})
+
+    def test_scheme_relative(self):
+        self.assertEqual(BulkReverser(r'^(?P<path>.+)$').reverse({'path': '/example.com'}), '/%2Fexample.com')
+
+    def test_batches_and_write(self):
+        reverser = BulkReverser(r'^(?P<id>\d+)$')
+        self.assertEqual(list(batches(reverser.reverse_columns({'id': range(5)}), 2)),
+                         [['/0', '/1'], ['/2', '/3'], ['/4']])
+        f = io.StringIO()
+        self.assertEqual(write_urls(f, reverser.reverse_columns({'id': range(3)})), 3)
+        self.assertEqual(f.getvalue(), '/0\n/1\n/2\n')
+
+    def test_validated_arguments(self):
+        reverser = BulkReverser(r'^(?P<year>\d{4})/(?P<slug>[^/]+)/$')
+        [(_, checks, _, _, _)] = reverser.select(frozenset(['year', 'slug'])).candidates
+        self.assertEqual([(arg, stop) for arg, _, stop in checks], [('year', '/'), ('slug', '/')])
+        with self.assertRaises(NoReverseMatch):
+            reverser.reverse({'year': 2014, 'slug': 'a/b'})
+        with self.assertRaises(NoReverseMatch):
+            reverser.reverse({'year': 201, 'slug': 'a'})
+        # like reverse(), a pattern not anchored at its end only has to match the start of the url
+        self.assertEqual(BulkReverser(r'^(?P<id>\d+)').reverse({'id': '12x'}), '/12x')
+
+    def test_same_as_full_match(self):
+        # like reverse(), lookarounds and the bounds of adjacent groups are only told by matching the whole url
+        with self.assertRaises(NoReverseMatch):
+            BulkReverser(r'^(?!admin)(?P<slug>\w+)$').reverse({'slug': 'admin'})
+        with self.assertRaises(NoReverseMatch):
+            BulkReverser(r'^(?P<a>\w+)(?<!x)$').reverse({'a': 'abx'})
+        self.assertEqual(BulkReverser(r'^(?P<a>\d+)(?P<b>[a-z]+)$').reverse({'a': '1x', 'b': 'y'}), '/1xy')
+        self.assertEqual(BulkReverser(r'^(?P<a>[^/]+)/(?P<b>.+)$').reverse({'a': 'x/y', 'b': 'z'}), '/x/y/z')
+        self.assertEqual(BulkReverser(r'^(?P<a>\d+)/(?P<b>[\d/]+)/$').reverse({'a': '1/2', 'b': 3}), '/1/2/3/')
+
+    def test_quote_free_arguments(self):
+        reverser = BulkReverser(r'^(?P<year>[0-9]{4})/(?P<slug>[-a-z]+)/(?P<title>.+)/$')
+        [(_, _, quoted, _, _)] = reverser.select(frozenset(['year', 'slug', 'title'])).candidates
+        self.assertEqual(quoted, ('title',))
+        self.assertEqual(reverser.reverse({'year': '2014', 'slug': 'a-b', 'title': 'é ?'}), '/2014/a-b/%C3%A9%20%3F/')
+        self.assertEqual(BulkReverser(r'^(?P<id>-?\d+)$').reverse({'id': -12}), '/-12')
+
+    def test_quoted_literals(self):
+        # like reverse(), the text of the pattern is quoted too
+        self.assertEqual(BulkReverser(r'^a b/(?P<x>\d+)$').reverse({'x': 12}), '/a%20b/12')
+        self.assertEqual(BulkReverser(r'^zażółć/(?P<x>\d+)$').reverse({'x': 12}),
+                         '/za%C5%BC%C3%B3%C5%82%C4%87/12')
+        self.assertEqual(BulkReverser(r'^a b/(?P<x>.+)$').reverse({'x': 'c d'}), '/a%20b/c%20d')
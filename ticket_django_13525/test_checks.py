@@ -0,0 +1,54 @@
+from django.conf.urls import url
+from django.core import checks
+from django.test import SimpleTestCase, override_settings
+
+from ticket_django_13525.checks import check_normalization_cost
+from ticket_django_13525.estimate import estimate
+from ticket_django_13525.better_regex_parser import normalize_list
+
+
+def view(request):
+    pass
+
+
+urlpatterns = [
+    url(r'^cheap/(?P<slug>[^/]+)$', view, name='cheap'),
+    url(r'^letters/' + ''.join('(%s)?' % letter for letter in 'abcdefghijkl') + '$', view, name='letters'),
+    url(r'^invalid/(?!x)$', view, name='invalid'),
+]
+
+
+class EstimateTestCase(SimpleTestCase):
+    def test_upper_bound(self):
+        for pattern in (r'^export2(\.(?P<format>\w+))?$', r'^(?:x|y|(a)|(b))(?:(c)|d)$', r'^(a(b)(c))?$',
+                        r'^(?P<q>' + '(a)?' * 6 + ')$', r'^(?P<a>x)/(?P=a)$'):
+            self.assertGreaterEqual(estimate(pattern).candidates, len(normalize_list(pattern)), pattern)
+
+    def test_optional_groups(self):
+        pattern_estimate = estimate('^' + '(a)?' * 20 + '$')
+        self.assertEqual(pattern_estimate.candidates, 2 ** 20)
+        self.assertEqual(pattern_estimate.offender, '`(a)?`')
+        self.assertEqual(pattern_estimate.factors, 20)
+
+    def test_offender_inside_group(self):
+        self.assertEqual(estimate(r'^(?P<a>x(?:(b)|(c)))$').offender, 'alternation of 2 branches containing `(b)`')
+
+
+@override_settings(ROOT_URLCONF='ticket_django_13525.test_checks')
+class NormalizationCostCheckTestCase(SimpleTestCase):
+    def test_registered(self):
+        self.assertIn(check_normalization_cost, checks.registry.registry.get_checks())
+
+    def test_warning(self):
+        messages = check_normalization_cost()
+        self.assertEqual([message.id for message in messages], ['ticket_django_13525.W001'])
+        self.assertIn('4096 candidates', messages[0].msg)
+        self.assertIn('`(a)?`', messages[0].hint)
+
+    @override_settings(URL_NORMALIZATION_WARNING=(16, 10 ** 5), URL_NORMALIZATION_ERROR=(1000, 10 ** 7))
+    def test_error(self):
+        self.assertEqual([message.id for message in check_normalization_cost()], ['ticket_django_13525.E001'])
+
+    @override_settings(URL_NORMALIZATION_WARNING=(10 ** 6, 10 ** 9))
+    def test_thresholds(self):
+        self.assertEqual(check_normalization_cost(), [])
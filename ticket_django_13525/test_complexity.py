@@ -0,0 +1,108 @@
+"""
+Complexity regression guard for `better_regex_parser.normalize`.
+
+Each family of patterns is normalized at increasing sizes and a growth curve is fitted to the work done.
+Work is counted rather than timed (every clause handler call, every proposition a handler yields and every
+candidate `_normalize` combines), which makes the fit deterministic while following the time spent.
+"""
+import math
+import unittest
+from unittest import mock
+
+from ticket_django_13525 import better_regex_parser
+
+POLYNOMIAL_SIZES = (4, 8, 16, 32, 64)
+EXPONENTIAL_SIZES = (4, 6, 8, 10, 12)
+TOLERANCE = 0.25
+
+
+def work(pattern):
+    """
+    Normalizes `pattern` and returns the amount of work it took.
+    """
+    counter = [0]
+
+    def counting(generator_function):
+        def wrapper(*args):
+            counter[0] += 1
+            for item in generator_function(*args):
+                counter[0] += 1
+                yield item
+
+        return wrapper
+
+    dispatch_table = {clause_type: counting(handler)
+                      for clause_type, handler in better_regex_parser.DISPATCH_TABLE.items()}
+    with mock.patch.dict(better_regex_parser.DISPATCH_TABLE, dispatch_table), \
+            mock.patch.object(better_regex_parser, '_normalize', counting(better_regex_parser._normalize)):
+        better_regex_parser.normalize_list(pattern)
+    return counter[0]
+
+
+def _slope(xs, ys):
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sum((x - mean_x) ** 2 for x in xs)
+
+
+def polynomial_degree(sizes, costs):
+    """
+    Fits cost = a * n ** k and returns k.
+    """
+    return _slope([math.log(n) for n in sizes], [math.log(cost) for cost in costs])
+
+
+def exponential_base(sizes, costs):
+    """
+    Fits cost = a * b ** n and returns log2(b).
+    """
+    return _slope(sizes, [math.log2(cost) for cost in costs])
+
+
+class ComplexityTestCase(unittest.TestCase):
+    def assertPolynomial(self, family, degree):
+        costs = [work(family(n)) for n in POLYNOMIAL_SIZES]
+        observed = polynomial_degree(POLYNOMIAL_SIZES, costs)
+        self.assertLessEqual(observed, degree + TOLERANCE,
+                             'work grows as n ** %.2f, expected n ** %d (work: %s)' % (observed, degree, costs))
+
+    def assertExponential(self, family, log2_base):
+        costs = [work(family(n)) for n in EXPONENTIAL_SIZES]
+        observed = exponential_base(EXPONENTIAL_SIZES, costs)
+        self.assertLessEqual(observed, log2_base + TOLERANCE,
+                             'work grows as %.2f ** n, expected %.2f ** n (work: %s)'
+                             % (2 ** observed, 2 ** log2_base, costs))
+
+    def test_fit(self):
+        self.assertAlmostEqual(polynomial_degree(POLYNOMIAL_SIZES, [3 * n ** 2 for n in POLYNOMIAL_SIZES]), 2)
+        self.assertAlmostEqual(exponential_base(EXPONENTIAL_SIZES, [5 * 2 ** n for n in EXPONENTIAL_SIZES]), 1)
+
+    def test_sequential_groups(self):
+        self.assertPolynomial(lambda n: '(a)' * n, 1)
+
+    def test_sequential_named_groups(self):
+        self.assertPolynomial(lambda n: ''.join('(?P<g%d>a)' % i for i in range(n)), 1)
+
+    def test_nested_groups(self):
+        self.assertPolynomial(lambda n: '(' * n + 'a' + ')' * n, 1)
+
+    def test_nested_named_groups(self):
+        # n candidates, the i-th of them made of i arguments
+        self.assertPolynomial(lambda n: ''.join('(?P<g%d>a' % i for i in range(n)) + ')' * n, 2)
+
+    def test_alternatives(self):
+        self.assertPolynomial(lambda n: '|'.join('(a%d)' % i for i in range(n)), 1)
+
+    def test_repeats(self):
+        self.assertPolynomial(lambda n: '(?:a{2,5})' * n, 1)
+
+    def test_optional_groups(self):
+        # 2 ** n candidates
+        self.assertExponential(lambda n: '(a)?' * n, 1)
+
+    def test_optional_non_capturing_groups(self):
+        self.assertPolynomial(lambda n: '(?:a)?' * n, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from ticket_django_13525.group_index import GroupSpanIndex, GroupSpan, CAPTURING, NAMED, NON_CAPTURING, \
+    BACKREFERENCE, COMMENT, CONDITIONAL
+
+
+class GroupSpanIndexTestCase(unittest.TestCase):
+    def test_nested_groups(self):
+        index = GroupSpanIndex('(A(A1)(A2))(B)')
+        self.assertEqual(list(index), [
+            GroupSpan(0, 1, 10, 0, None, None, CAPTURING, 1),
+            GroupSpan(2, 3, 5, 1, 0, None, CAPTURING, 2),
+            GroupSpan(6, 7, 9, 1, 0, None, CAPTURING, 3),
+            GroupSpan(11, 12, 13, 0, None, None, CAPTURING, 4),
+        ])
+        self.assertEqual(index.roots, [0, 3])
+        self.assertEqual(index.children[0], [1, 2])
+        self.assertEqual(index.body(0), 'A(A1)(A2)')
+        self.assertEqual(index.text(1), '(A1)')
+
+    def test_named_groups(self):
+        index = GroupSpanIndex(r'^(?P<q>\.(?P<qq1>\d+)\.(?P<qq2>\d+))$')
+        self.assertEqual([span.name for span in index], ['q', 'qq1', 'qq2'])
+        self.assertEqual([span.kind for span in index], [NAMED] * 3)
+        self.assertEqual(index.body(index.by_name['qq1']), r'\d+')
+        self.assertEqual(index.by_number, {1: 0, 2: 1, 3: 2})
+
+    def test_group_kinds(self):
+        index = GroupSpanIndex(r'(?:a)(?P<b>b)(?P=b)(?#comment)(?(b)c|d)')
+        self.assertEqual([span.kind for span in index], [NON_CAPTURING, NAMED, BACKREFERENCE, COMMENT, CONDITIONAL])
+        self.assertEqual([span.number for span in index], [None, 1, None, None, None])
+        self.assertEqual(index.body(4), 'c|d')
+
+    def test_escaped_parentheses(self):
+        index = GroupSpanIndex(r'(a\)b)\(')
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.body(0), r'a\)b')
+        self.assertEqual(index.unbalanced, [])
+
+    def test_parentheses_in_class(self):
+        index = GroupSpanIndex(r'(a[)(]b[]()]c[^)]d)')
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.body(0), r'a[)(]b[]()]c[^)]d')
+
+    def test_closing(self):
+        index = GroupSpanIndex('name>test(test1)test2)after group')
+        self.assertEqual(index.unbalanced, [21])
+        self.assertEqual(index.closing(5), 21)
+        self.assertEqual(index.closing(11), 15)
+        self.assertEqual(index.innermost(11), 0)
+        self.assertIsNone(index.innermost(5))
+
+    def test_unterminated(self):
+        index = GroupSpanIndex('(a(b)')
+        self.assertEqual(index[0].end, 5)
+        self.assertIsNone(index.closing(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import types
+
+from django.conf.urls import include, url
+from django.core.urlresolvers import RegexURLResolver, Resolver404
+from django.test import SimpleTestCase
+
+from ticket_django_13525.master_regex import MasterRegex, MasterRegexURLResolver, MasterRoute, rewrite_groups
+
+
+def view(request, *args, **kwargs):
+    pass
+
+
+def other_view(request, *args, **kwargs):
+    pass
+
+
+urlconf = types.ModuleType('master_regex_urlconf')
+urlconf.urlpatterns = [
+    url(r'^export1\.(?P<format>\w+)$', view, name='this'),
+    url(r'^export2(\.(?P<format>\w+))?$', view, name='that'),
+    url(r'^(\d+)/(\w+)/$', view, name='positional'),
+    url(r'^(?P<a>\w)(?P=a)/$', view, name='backreference'),
+    url(r'^blog/(?P<year>\d{4})/', include([
+        url(r'^$', view, name='year'),
+        url(r'^(?P<slug>[-\w]+)/$', view, {'page': 1}, name='post'),
+        url(r'^(?P<year>\d{2})/$', view, name='override'),
+    ], namespace='blog', app_name='blogs'), {'section': 'blog'}),
+    url(r'^blog/', include([url(r'^archive/$', other_view, name='archive')])),
+    url(r'^blog/2014/archive/$', other_view, name='shadowed'),
+    url(r'(?i)^Case/$', other_view, name='flags'),
+    url(r'suffix/$', other_view, name='unanchored'),
+]
+
+# with the stock resolver, beginning anchors, word boundaries and lookbehinds inside an include only see the
+# rest of the path, and the pattern of an include is searched once
+levels_urlconf = types.ModuleType('master_regex_levels_urlconf')
+levels_urlconf.urlpatterns = [
+    url(r'^inc/', include([
+        url(r'^a$|^b$', view, name='branch'),
+        url(r'\Af$', view, name='beginning'),
+        url(r'(?<=/)c$', view, name='lookbehind'),
+    ])),
+    url(r'^docs', include([url(r'^\b(?P<page>\w+)/$', view, name='boundary')])),
+    url(r'^shop/(?P<slug>[\w-]+)', include([url(r'^-(?P<page>\d+)/$', view, name='page')])),
+    url(r'^shop/(?P<slug>[\w-]+)/$', other_view, name='shop'),
+    url(r'^opt/a?', include([url(r'^a/$', view, name='optional')])),
+    url(r'^unanchored/', include([url(r'x', include([url(r'^y/$', view, name='after_x')]))])),
+    url(r'^.*$', other_view, name='catch_all'),
+]
+
+PATHS = ['/export1.json', '/export2', '/export2.xml', '/12/ab/', '/aa/', '/ab/', '/blog/2014/', '/blog/2014/a-b/',
+         '/blog/2014/14/', '/blog/archive/', '/blog/2014/archive/', '/CASE/', '/x/y/suffix/', '/nothing', '/']
+
+
+class MasterRegexTestCase(SimpleTestCase):
+    def assertSameMatch(self, resolver, path, urlconf=urlconf):
+        try:
+            expected = RegexURLResolver(r'^/', urlconf).resolve(path)
+        except Resolver404:
+            with self.assertRaises(Resolver404):
+                resolver.resolve(path)
+            return
+        resolver_match = resolver.resolve(path)
+        self.assertEqual((resolver_match.func, resolver_match.args, resolver_match.kwargs, resolver_match.url_name,
+                          resolver_match.app_name, resolver_match.namespaces),
+                         (expected.func, expected.args, expected.kwargs, expected.url_name,
+                          expected.app_name, expected.namespaces), path)
+
+    def test_same_as_stock_resolver(self):
+        resolver = MasterRegexURLResolver(r'^/', urlconf)
+        for path in PATHS:
+            self.assertSameMatch(resolver, path)
+
+    def test_levels(self):
+        resolver = MasterRegexURLResolver(r'^/', levels_urlconf)
+        for path in ['/inc/a', '/inc/b', '/inc/f', '/inc/c', '/c', '/docsintro/', '/docs/intro/',
+                     '/shop/summer-sale-2/', '/shop/summer-sale/', '/opt/aa/', '/opt/a/',
+                     '/unanchored/axy/', '/unanchored/xxy/', '/unanchored/xay/']:
+            self.assertSameMatch(resolver, path, levels_urlconf)
+        self.assertEqual(resolver.resolve('/inc/b').url_name, 'branch')
+        self.assertEqual(resolver.resolve('/inc/f').url_name, 'beginning')
+        self.assertEqual(resolver.resolve('/inc/c').url_name, 'catch_all')
+        self.assertEqual(resolver.resolve('/docsintro/').url_name, 'boundary')
+        self.assertEqual(resolver.resolve('/shop/summer-sale-2/').url_name, 'shop')
+        self.assertEqual(resolver.resolve('/opt/a/').url_name, 'catch_all')
+
+    def test_tried(self):
+        resolver = MasterRegexURLResolver(r'^/', urlconf)
+        with self.assertRaises(Resolver404) as cm:
+            resolver.resolve('/nothing')
+        tried = cm.exception.args[0]['tried']
+        self.assertEqual(len(tried), 11)
+        self.assertEqual([url_pattern.name for url_pattern in tried[0]], ['this'])
+        self.assertEqual([url_pattern.regex.pattern for url_pattern in tried[6]],
+                         [r'^blog/(?P<year>\d{4})/', r'^(?P<year>\d{2})/$'])
+
+    def test_chunks(self):
+        master = MasterRegex(RegexURLResolver(r'^/', urlconf).url_patterns, max_groups=None)
+        # the backreference and flags urls are matched on their own
+        self.assertEqual([chunk.url_pattern.name if isinstance(chunk, MasterRoute) else len(chunk[1])
+                          for chunk in master.chunks], [3, 'backreference', 5, 'flags', 1])
+
+    def test_max_groups(self):
+        resolver = MasterRegexURLResolver(r'^/', urlconf)
+        resolver._master_regex_dict = {'en-us': MasterRegex(resolver.url_patterns, max_groups=4)}
+        for path in PATHS:
+            self.assertSameMatch(resolver, path)
+
+    def test_rewrite_groups(self):
+        self.assertEqual(rewrite_groups(r'^(?P<a>x)(\d)$', 'r1_0_', True)[0], r'^(?P<r1_0_a>x)(\d)$')
+        self.assertEqual(rewrite_groups(r'^(x)(\d)$', 'r1_0_')[0], r'^(x)(\d)$')
+        self.assertIsNone(rewrite_groups(r'^(x)\1$', 'r1_0_'))
+        self.assertIsNone(rewrite_groups(r'^a$|^b$', 'r1_0_'))
+        self.assertIsNone(rewrite_groups(r'\Aa$', 'r1_0_'))
+        self.assertIsNone(rewrite_groups(r'(?<!a)b$', 'r1_0_'))
+        self.assertIsNone(rewrite_groups(r'^\b(?P<page>\w+)/$', 'r1_0_'))
+        self.assertIsNone(rewrite_groups(r'^a\B', 'r1_0_'))
+        self.assertEqual(rewrite_groups(r'^a(?=b)', 'r1_0_')[0], r'^a(?=b)')
@@ -0,0 +1,58 @@
+import unittest
+
+from django.core.urlresolvers import reverse
+from django.test import SimpleTestCase, RequestFactory
+
+from ticket_django_13525 import metrics
+
+
+class MetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        metrics.flush()
+        metrics.registry.reset()
+
+    def test_counters_are_buffered(self):
+        metrics.increment('url_test_total', 2)
+        self.assertEqual(metrics.registry.counters, {})
+        metrics.flush()
+        self.assertEqual(metrics.registry.counters, {('url_test_total', ()): 2})
+
+    def test_normalize_list(self):
+        candidates = metrics.normalize_list(r'^export2(\.(?P<format>\w+))?$')
+        metrics.flush()
+        self.assertEqual(metrics.registry.counters[('url_normalize_calls_total', ())], 1)
+        self.assertEqual(metrics.registry.counters[('url_normalize_candidates_total', ())], len(candidates))
+        self.assertEqual(metrics.registry.histograms[('url_normalize_seconds', ())].count, 1)
+
+    def test_render(self):
+        metrics.record_cache('table', True)
+        metrics.observe('url_reverse_seconds', 0.0003, (('name', 'th"is'),))
+        metrics.flush()
+        text = metrics.registry.render()
+        self.assertIn('# TYPE url_cache_hits_total counter\nurl_cache_hits_total{cache="table"} 1\n', text)
+        self.assertIn('# TYPE url_reverse_seconds histogram\n', text)
+        self.assertIn('url_reverse_seconds_bucket{name="th\\"is",le="0.00025"} 0\n', text)
+        self.assertIn('url_reverse_seconds_bucket{name="th\\"is",le="0.0005"} 1\n', text)
+        self.assertIn('url_reverse_seconds_bucket{name="th\\"is",le="+Inf"} 1\n', text)
+        self.assertIn('url_reverse_seconds_count{name="th\\"is"} 1\n', text)
+
+
+class MetricsViewTestCase(SimpleTestCase):
+    def setUp(self):
+        metrics.flush()
+        metrics.registry.reset()
+
+    def test_reverse_is_counted(self):
+        metrics.instrument_reverse()
+        for _ in range(metrics.REVERSE_SAMPLE_EVERY):
+            reverse('this', kwargs={'format': 'json'})
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'url_reverse_calls_total{name="this"} 16\n', response.content)
+        self.assertIn(b'url_reverse_seconds_count{name="this"} 1\n', response.content)
+
+    def test_remote_scrape_is_forbidden(self):
+        from ticket_django_13525.views import metrics_view
+
+        request = RequestFactory().get('/metrics', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(metrics_view(request).status_code, 403)
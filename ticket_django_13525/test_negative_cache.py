@@ -0,0 +1,76 @@
+import unittest
+
+from django.conf.urls import url
+from django.core.urlresolvers import NoReverseMatch, clear_url_caches, get_resolver, get_urlconf, reverse
+from django.test import SimpleTestCase, ignore_warnings, override_settings
+from django.utils.deprecation import RemovedInDjango110Warning
+
+from ticket_django_13525 import metrics, negative_cache
+from ticket_django_13525.negative_cache import NegativeCache
+
+
+def article(request, id):
+    pass
+
+
+urlpatterns = [
+    url(r'^article/(?P<id>\d+)/$', article),
+]
+
+
+class NegativeCacheTestCase(unittest.TestCase):
+    def test_least_recently_used_are_dropped(self):
+        cache = NegativeCache(2)
+        cache.add('a', 'A')
+        cache.add('b', 'B')
+        self.assertEqual(cache.get('a'), 'A')
+        cache.add('c', 'C')
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), ('A', None, 'C'))
+
+
+class NegativeCacheReverseTestCase(SimpleTestCase):
+    def setUp(self):
+        negative_cache.install()
+        self.addCleanup(negative_cache.uninstall)
+        clear_url_caches()
+        metrics.flush()
+        metrics.registry.reset()
+
+    def negative_cache(self):
+        return get_resolver(get_urlconf()).__dict__.get('_negative_cache', ())
+
+    def hits(self):
+        metrics.flush()
+        return metrics.registry.counters[('url_cache_hits_total', (('cache', 'negative_reverse'),))]
+
+    def test_impossible_arguments_are_cached(self):
+        for _ in range(3):
+            with self.assertRaises(NoReverseMatch):
+                reverse('this', kwargs={'page': 1})
+        self.assertEqual(len(self.negative_cache()), 1)
+        self.assertEqual(self.hits(), 2)
+        with self.assertRaises(NoReverseMatch):
+            reverse('this', args=[1, 2])
+        self.assertEqual(len(self.negative_cache()), 2)
+
+    def test_unmatched_values_are_not_cached(self):
+        with self.assertRaises(NoReverseMatch):
+            reverse('this', kwargs={'format': '!'})
+        self.assertEqual(len(self.negative_cache()), 0)
+        self.assertEqual(reverse('this', kwargs={'format': 'json'}), '/export1.json')
+
+    def test_urlconf_change(self):
+        with self.assertRaises(NoReverseMatch):
+            reverse('this', kwargs={'page': 1})
+        clear_url_caches()
+        self.assertEqual(len(self.negative_cache()), 0)
+
+    @ignore_warnings(category=RemovedInDjango110Warning)
+    @override_settings(ROOT_URLCONF='ticket_django_13525.test_negative_cache')
+    def test_dotted_path(self):
+        # the dotted path is looked up as the view it names, like _reverse_with_prefix does
+        with self.assertRaises(NoReverseMatch):
+            reverse('ticket_django_13525.test_negative_cache.article', kwargs={'id': 'x'})
+        self.assertEqual(reverse('ticket_django_13525.test_negative_cache.article', kwargs={'id': '1'}),
+                         '/article/1/')
+        self.assertEqual(len(self.negative_cache()), 0)
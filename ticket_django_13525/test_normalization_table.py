@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from ticket_django_13525.better_regex_parser import normalize_list
+from ticket_django_13525.normalization_table import build_table, load_table, NormalizationTable, StaleTableError
+
+PATTERNS = [
+    r'^export1\.(?P<format>\w+)$',
+    r'^export2(\.(?P<format>\w+))?$',
+    r'^(?P<qq1>\d+)(?P<qq2>\d+)?$',
+    r'^(?P<q>\.(?P<qq1>\d+)\.(?P<qq2>\d+))$',
+    r'^zażółć/(?P<gęś>\w+)$',
+]
+
+
+class NormalizationTableTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'urls.table')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_candidates(self):
+        build_table(self.path, PATTERNS)
+        with NormalizationTable(self.path, PATTERNS) as table:
+            self.assertEqual(len(table), len(PATTERNS))
+            for pattern in PATTERNS:
+                self.assertIn(pattern, table)
+                self.assertEqual(table.candidates(pattern), normalize_list(pattern))
+
+    def test_raw_candidates_are_memoryviews(self):
+        build_table(self.path, PATTERNS)
+        with NormalizationTable(self.path) as table:
+            format_string, args = next(table.raw_candidates(PATTERNS[0]))
+            self.assertIsInstance(format_string, memoryview)
+            self.assertEqual(format_string, b'export1.%(format)s')
+            self.assertEqual(args, [b'format'])
+            del format_string, args
+
+    def test_missing_pattern(self):
+        build_table(self.path, PATTERNS)
+        with NormalizationTable(self.path) as table:
+            self.assertNotIn('^missing$', table)
+            self.assertRaises(KeyError, table.candidates, '^missing$')
+
+    def test_stale_table(self):
+        build_table(self.path, PATTERNS[:2])
+        self.assertRaises(StaleTableError, NormalizationTable, self.path, PATTERNS)
+
+    def test_load_table_rebuilds_stale_table(self):
+        build_table(self.path, PATTERNS[:2])
+        with load_table(self.path, PATTERNS) as table:
+            self.assertEqual(len(table), len(PATTERNS))
+        self.assertEqual(os.listdir(self.directory), ['urls.table'])
+
+    def test_empty_table(self):
+        with load_table(self.path, []) as table:
+            self.assertEqual(len(table), 0)
+            self.assertNotIn('^$', table)
+
+    def test_unsupported_patterns(self):
+        patterns = PATTERNS + [r'^(a)?(?(1)b|c)$']
+        with load_table(self.path, patterns) as table:
+            self.assertEqual(len(table), len(PATTERNS))
+            self.assertNotIn(patterns[-1], table)
+        NormalizationTable(self.path, patterns).close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import types
+
+from django.conf.urls import include, url
+from django.core.urlresolvers import RegexURLResolver, Resolver404
+from django.test import SimpleTestCase, override_settings
+
+from ticket_django_13525.better_regex_parser import parse_pattern
+from ticket_django_13525.prefilter import PrefilterIndex, PrefilterURLResolver, RouteFilter, length_bounds, \
+    mandatory_literals, route_filter
+
+
+def view(request, *args, **kwargs):
+    pass
+
+
+urlconf = types.ModuleType('prefilter_urlconf')
+urlconf.urlpatterns = [
+    url(r'^export1\.(?P<format>\w+)$', view, name='this'),
+    url(r'^export2(\.(?P<format>\w+))?$', view, name='that'),
+    url(r'^(?P<year>\d{4})/$', view, name='year'),
+    url(r'^blog/', include([
+        url(r'^(?P<slug>[-\w]+)/$', view, name='post'),
+        url(r'^archive/(?P<page>\d+)$', view, name='archive'),
+    ])),
+    url(r'^empty/', include([])),
+    url(r'(?i)help/$', view, name='help'),
+]
+
+PATHS = ['/export1.json', '/export1.', '/export2', '/export2.xml', '/2014/', '/2014', '/2014\n', '/blog/a-b/',
+         '/blog/archive/2', '/blog/', '/x/HELP/', '/empty/', '/']
+
+
+class AnalysisTestCase(SimpleTestCase):
+    def test_length_bounds(self):
+        self.assertEqual(length_bounds(parse_pattern(r'^a{2}(b|cd)*(?=x)$')), (2, None))
+        self.assertEqual(length_bounds(parse_pattern(r'^(a|bcd)?e{1,3}$')), (1, 6))
+        self.assertEqual(length_bounds(parse_pattern(r'(?P<a>x)(?P=a)')), (1, None))
+
+    def test_mandatory_literals(self):
+        self.assertEqual(mandatory_literals(parse_pattern(r'^blog/(?P<slug>\w+)/(x|y)?comments/$')),
+                         ['comments/', 'blog/'])
+        self.assertEqual(mandatory_literals(parse_pattern(r'^(?:a-(?P<x>\d)-b|a-(?P<y>\w)-b)$')), ['-b', 'a-'])
+
+    def test_route_filter(self):
+        resolver = RegexURLResolver(r'^/', urlconf)
+        self.assertEqual([route_filter(url_pattern) for url_pattern in resolver.url_patterns], [
+            RouteFilter(9, None, ('export1.',)),
+            RouteFilter(7, None, ('export2',)),
+            RouteFilter(5, 6, ('/',)),
+            RouteFilter(7, None, ('blog/',)),
+            None,
+            RouteFilter(5, None, ()),
+        ])
+
+
+class PrefilterResolverTestCase(SimpleTestCase):
+    def test_candidates(self):
+        index = PrefilterIndex(RegexURLResolver(r'^/', urlconf).url_patterns)
+        self.assertEqual([url_pattern.name for url_pattern in index.candidates('export1.json')], ['this', 'help'])
+        self.assertEqual([getattr(url_pattern, 'name', None) for url_pattern in index.candidates('2014/')],
+                         ['year', 'help'])
+
+    def test_same_as_stock_resolver(self):
+        resolver = PrefilterURLResolver(r'^/', urlconf)
+        for path in PATHS:
+            try:
+                expected = RegexURLResolver(r'^/', urlconf).resolve(path)
+            except Resolver404:
+                with self.assertRaises(Resolver404):
+                    resolver.resolve(path)
+                continue
+            resolver_match = resolver.resolve(path)
+            self.assertEqual((resolver_match.url_name, resolver_match.args, resolver_match.kwargs),
+                             (expected.url_name, expected.args, expected.kwargs), path)
+
+    @override_settings(DEBUG=True)
+    def test_debug_tried(self):
+        with self.assertRaises(Resolver404) as expected:
+            RegexURLResolver(r'^/', urlconf).resolve('/blog/x')
+        with self.assertRaises(Resolver404) as cm:
+            PrefilterURLResolver(r'^/', urlconf).resolve('/blog/x')
+        self.assertEqual(cm.exception.args[0]['tried'], expected.exception.args[0]['tried'])
+        self.assertEqual(len(cm.exception.args[0]['tried']), 7)
@@ -0,0 +1,127 @@
+import os
+import shutil
+import tempfile
+import types
+from unittest import mock
+
+from django.conf.urls import include, url
+from django.core.urlresolvers import RegexURLResolver, clear_url_caches, reverse
+from django.test import SimpleTestCase, override_settings
+
+from ticket_django_13525 import resolvers
+from ticket_django_13525.resolver_benchmark import compare
+
+
+def view(request, **kwargs):
+    pass
+
+
+def other_view(request, **kwargs):
+    pass
+
+
+nested_patterns = [
+    url(r'^(?P<slug>[-\w]+)/$', view, {'nested': True}, name='nested'),
+    url(r'^$', other_view, name='index'),
+]
+
+urlpatterns = [
+    url(r'^$', view, name='index'),
+    url(r'^blog/', include(nested_patterns), {'kind': 'blog'}),
+    url(r'^news/', include(nested_patterns, namespace='news', app_name='articles')),
+    url(r'^outer/', include([url(r'^inner/', include(nested_patterns), {'kind': 'inner'})], ), {'kind': 'outer'}),
+]
+
+# Django's own normalize does not reverse lookarounds
+lookaround_urlconf = types.ModuleType('lookaround_urlconf')
+lookaround_urlconf.urlpatterns = [
+    url(r'^(?!admin)(?P<slug>\w+)$', view, name='not_admin'),
+    url(r'^x(?=y)y$', view, name='lookahead'),
+]
+
+
+class StockRegexURLResolver(RegexURLResolver):
+    _populate = resolvers.STOCK_POPULATE
+
+
+class ReentrantRegexURLResolver(resolvers.BetterRegexURLResolver):
+    @property
+    def url_patterns(self):
+        # like a urlconf reversing a url while it is loaded
+        self._populate()
+        return super().url_patterns
+
+
+def reverse_data(resolver):
+    resolver._populate()
+    lookups = {key: [(list(candidates), pattern, defaults) for candidates, pattern, defaults in
+                     resolver.reverse_dict.getlist(key)]
+               for key in resolver.reverse_dict}
+    namespaces = {namespace: prefix for namespace, (prefix, _) in resolver.namespace_dict.items()}
+    return lookups, namespaces, resolver.app_dict, resolver._callback_strs
+
+
+class ResolverTestCase(SimpleTestCase):
+    def test_same_reverse_data_as_stock(self):
+        self.assertEqual(reverse_data(resolvers.BetterRegexURLResolver(r'^/', 'ticket_django_13525.test_resolvers')),
+                         reverse_data(StockRegexURLResolver(r'^/', 'ticket_django_13525.test_resolvers')))
+
+    def test_namespace_is_populated(self):
+        resolver = resolvers.BetterRegexURLResolver(r'^/', 'ticket_django_13525.test_resolvers')
+        resolver._populate()
+        _, namespace_resolver = resolver.namespace_dict['news']
+        self.assertTrue(namespace_resolver._populated)
+
+    def test_candidates_are_shared(self):
+        resolver = resolvers.BetterRegexURLResolver(r'^/', 'ticket_django_13525.test_resolvers')
+        by_name, = [candidates for candidates, pattern, _ in resolver.reverse_dict.getlist('index') if pattern == '$']
+        by_view, = [candidates for candidates, pattern, _ in resolver.reverse_dict.getlist(view) if pattern == '$']
+        self.assertIs(by_name, by_view)
+
+    def test_populating_twice(self):
+        resolver = ReentrantRegexURLResolver(r'^/', 'ticket_django_13525.test_resolvers')
+        resolver._populate()
+        self.assertEqual(resolver.reverse('index'), 'outer/inner/')
+
+    def test_benchmark(self):
+        (stock, better), = compare([8], repeat=1)
+        self.assertEqual(better.routes, 8)
+        self.assertEqual(better.failures, 0)
+        self.assertEqual(stock.failures, 2)
+
+
+class InstalledResolverTestCase(SimpleTestCase):
+    def setUp(self):
+        resolvers.install()
+        self.addCleanup(resolvers.uninstall)
+        clear_url_caches()
+        self.addCleanup(clear_url_caches)
+
+    def test_optional_groups(self):
+        self.assertEqual(reverse('that', kwargs={'format': 'json'}), '/export2.json')
+        self.assertEqual(reverse('qq', kwargs={'qq1': 1, 'qq2': 2}), '/12')
+
+    def test_lookarounds(self):
+        self.assertEqual(reverse('not_admin', lookaround_urlconf, kwargs={'slug': 'x'}), '/x')
+        self.assertEqual(reverse('lookahead', lookaround_urlconf), '/xy')
+
+
+@override_settings(ROOT_URLCONF='ticket_django_13525.test_resolvers')
+class NormalizationTableTestCase(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'urls.table')
+        resolvers.install(normalization_table=self.path)
+        self.addCleanup(resolvers.uninstall)
+        resolvers.candidate_lists.clear()
+        self.addCleanup(resolvers.candidate_lists.clear)
+        clear_url_caches()
+        self.addCleanup(clear_url_caches)
+
+    def test_reverse_reads_table(self):
+        with mock.patch.object(resolvers, 'normalize_list', side_effect=AssertionError):
+            self.assertEqual(reverse('nested', kwargs={'slug': 'x'}), '/outer/inner/x/')
+            self.assertEqual(reverse('news:nested', kwargs={'slug': 'x'}), '/news/x/')
+        self.assertTrue(os.path.exists(self.path))
+        self.assertIn(r'blog/(?P<slug>[-\w]+)/$', resolvers.table)
@@ -0,0 +1,62 @@
+from django.core.urlresolvers import clear_url_caches, get_resolver, get_urlconf, reverse, set_script_prefix
+from django.test import SimpleTestCase
+from django.utils import translation
+
+from ticket_django_13525 import metrics, reverse_cache
+
+
+class ReverseCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        reverse_cache.install()
+        self.addCleanup(reverse_cache.uninstall)
+        clear_url_caches()
+        reverse_cache.end_request()
+        metrics.flush()
+        metrics.registry.reset()
+
+    def cache(self):
+        return get_resolver(get_urlconf()).__dict__.get('_reverse_cache')
+
+    def hits(self, cache):
+        metrics.flush()
+        return metrics.registry.counters[('url_cache_hits_total', (('cache', cache),))]
+
+    def test_results_are_cached(self):
+        for _ in range(3):
+            self.assertEqual(reverse('metrics'), '/metrics')
+            self.assertEqual(reverse('this', kwargs={'format': 'json'}), '/export1.json')
+        self.assertEqual(len(self.cache()), 2)
+        self.assertEqual(self.hits('reverse_process'), 4)
+        self.assertEqual(self.cache().stats()['hit_rate'], 4 / 6)
+
+    def test_many_values_are_not_cached(self):
+        for page in range(reverse_cache.DEFAULT_MAX_VALUES + 4):
+            self.assertEqual(reverse('qq', kwargs={'qq1': page}), '/%d' % page)
+        self.assertEqual(len(self.cache()), reverse_cache.DEFAULT_MAX_VALUES)
+        self.assertEqual(self.cache().stats()['uncached_urls'], 1)
+
+    def test_script_prefix_and_language(self):
+        self.assertEqual(reverse('metrics'), '/metrics')
+        set_script_prefix('/a b/')
+        try:
+            self.assertEqual(reverse('metrics'), '/a%20b/metrics')
+        finally:
+            set_script_prefix('/')
+        with translation.override('fr'):
+            reverse('metrics')
+        self.assertEqual(len(self.cache()), 3)
+
+    def test_quoted_values(self):
+        self.assertEqual(reverse('this', kwargs={'format': 'é'}), '/export1.%C3%A9')
+        self.assertEqual(reverse('this', kwargs={'format': 'é'}), '/export1.%C3%A9')
+
+    def test_request_cache(self):
+        reverse_cache.start_request()
+        try:
+            for page in range(reverse_cache.DEFAULT_MAX_VALUES + 1):
+                reverse('qq', kwargs={'qq1': page})
+            reverse('qq', kwargs={'qq1': reverse_cache.DEFAULT_MAX_VALUES})
+        finally:
+            reverse_cache.end_request()
+        self.assertEqual(self.hits('reverse_request'), 1)
+        self.assertEqual(self.hits('reverse_process'), 0)
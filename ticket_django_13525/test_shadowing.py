@@ -0,0 +1,104 @@
+import io
+import json
+
+from django.conf.urls import include, url
+from django.core import checks
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from ticket_django_13525.better_regex_parser import CharClass, parse_pattern
+from ticket_django_13525.checks import check_shadowed_routes
+from ticket_django_13525.shadowing import Run, covers, find_shadowed, literal_prefix, pattern_runs, shadowed_routes
+
+
+def view(request, *args, **kwargs):
+    pass
+
+
+urlpatterns = [
+    url(r'^(?P<slug>[-\w]+)/$', view, name='page'),
+    url(r'^about/$', view, name='about'),
+    url(r'^blog/', include([
+        url(r'^(?P<slug>[-\w]+)/$', view, name='post'),
+        url(r'^(?P<slug>[a-z]+)/$', view, name='lower_post'),
+    ])),
+    url(r'^blog/feed/\Z', view, name='feed'),
+    url(r'^api/', view, name='api'),
+    url(r'^api/v1/(?P<id>\d+)$', view, name='api_v1'),
+    url(r'^about', view, name='about_prefix'),
+    url(r'^export(\.(?P<format>\w+))?$', view, name='export'),
+    url(r'^export$', view, name='export_plain'),
+    url(r'^[a-z]+/', include([
+        url(r'^x$', view, name='nested'),
+    ])),
+    url(r'^a/x$', view, name='after_variable_include'),
+]
+
+
+def runs(pattern):
+    return pattern_runs(parse_pattern(pattern))
+
+
+class CoverageTestCase(SimpleTestCase):
+    def test_pattern_runs(self):
+        digits = CharClass([(ord('0'), ord('9'))])
+        self.assertEqual(runs(r'[0-9]{4}/'), [Run(digits, 4, 4), Run(CharClass.from_chars('/'), 1, 1)])
+        self.assertEqual(len(runs(r'(?:ab){3}')), 6)
+        self.assertIsNone(runs(r'(ab|c)'))
+        self.assertIsNone(runs(r'(ab)?'))
+        self.assertIsNone(runs(r'(?=a)'))
+
+    def test_covers(self):
+        self.assertTrue(covers(runs(r'[a-z]+/'), runs(r'about/')))
+        self.assertTrue(covers(runs(r'\d{4}'), runs(r'1\d\d2')))
+        self.assertTrue(covers(runs(r'\d\d\d\d'), runs(r'\d{4}')))
+        self.assertTrue(covers(runs(r'a*b?'), runs(r'a{2,5}')))
+        self.assertFalse(covers(runs(r'[a-z]+/'), runs(r'about-/')))
+        self.assertFalse(covers(runs(r'\d{4}'), runs(r'\d{3,4}')))
+        self.assertFalse(covers(runs(r'a{2,5}'), runs(r'a+')))
+        self.assertFalse(covers(runs(r'ab'), runs(r'a')))
+
+    def test_literal_prefix(self):
+        self.assertEqual(literal_prefix(runs(r'blog/(?P<slug>\w+)')), 'blog/')
+        self.assertEqual(literal_prefix(runs(r'a{2}b+c')), 'aab')
+        self.assertEqual(literal_prefix(runs(r'\w+')), '')
+
+    def test_find_shadowed(self):
+        shadowed = [(dead.route.name, earlier.route.name) for dead, earlier in find_shadowed(urlpatterns)]
+        self.assertEqual(shadowed, [('about', 'page'), ('lower_post', 'post'), ('feed', 'post'), ('api_v1', 'api')])
+
+    def test_shadowed_routes(self):
+        shadowed = shadowed_routes('ticket_django_13525.test_shadowing', repeat=1)
+        self.assertEqual([dead.route.pattern for dead in shadowed],
+                         [r'^about/$', r'^blog/(?P<slug>[a-z]+)/$', r'^blog/feed/\Z', r'^api/v1/(?P<id>\d+)$'])
+        self.assertTrue(all(dead.wasted_seconds > 0 for dead in shadowed))
+
+
+@override_settings(ROOT_URLCONF='ticket_django_13525.test_shadowing')
+class ShadowedRoutesCheckTestCase(SimpleTestCase):
+    def test_registered(self):
+        self.assertIn(check_shadowed_routes, checks.registry.registry.get_checks())
+
+    def test_warnings(self):
+        messages = check_shadowed_routes()
+        self.assertEqual([message.id for message in messages], ['ticket_django_13525.W002'] * 4)
+        self.assertIn("Url 'about' (pattern '^about/$') can never match", messages[0].msg)
+        self.assertIn("move it before 'page'", messages[0].hint)
+
+    @override_settings(ROOT_URLCONF='ticket_django_13525.urls')
+    def test_no_dead_urls(self):
+        self.assertEqual(check_shadowed_routes(), [])
+
+
+@override_settings(ROOT_URLCONF='ticket_django_13525.test_shadowing')
+class ShadowedURLsCommandTestCase(SimpleTestCase):
+    def test_table(self):
+        stdout = io.StringIO()
+        call_command('shadowed_urls', repeat=1, stdout=stdout)
+        self.assertIn('lower_post ^blog/(?P<slug>[a-z]+)/$', stdout.getvalue())
+
+    def test_json(self):
+        stdout = io.StringIO()
+        call_command('shadowed_urls', repeat=1, json=True, stdout=stdout)
+        self.assertEqual([dead['shadowed_by'] for dead in json.loads(stdout.getvalue())],
+                         ['page', 'post', 'post', 'api'])
@@ -0,0 +1,93 @@
+import io
+import os
+import re
+import tempfile
+import unittest
+from urllib.parse import unquote
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from ticket_django_13525.url_corpus import MinimalValues, RandomValues, SampleValues, generate_urls, group_regexes, \
+    route_plans, write_urls
+from ticket_django_13525.urlconf import Route
+
+ROUTES = [
+    Route('export', r'^export2(\.(?P<format>\w+))?$', None, {}),
+    Route('article', r'^(?P<year>[0-9]{4})/(?P<slug>[^/]+)/$', None, {}),
+    Route('kind', r'^(?P<kind>news|blog)/(?P<page>\d+)?$', None, {}),
+    Route('percent', r'^100%/(?P<id>\d+)$', None, {}),
+    Route('lookahead', r'^(?=a)a$', None, {}),
+]
+
+
+class URLCorpusTestCase(unittest.TestCase):
+    def assertMatched(self, urls):
+        for url in urls:
+            path = unquote(url[1:])
+            self.assertTrue(any(re.fullmatch(route.pattern, path) for route in ROUTES), url)
+
+    def test_skipped_routes(self):
+        plans, skipped = route_plans(ROUTES)
+        self.assertEqual([plan.route.name for plan in plans], ['export', 'article', 'kind', 'lookahead'])
+        self.assertEqual([route.name for route, error in skipped], ['percent', 'percent'])
+        self.assertTrue(skipped[0].error.startswith("candidate '100%/%(id)s': ValueError"))
+        self.assertEqual(skipped[1].error, 'no candidate can be formatted')
+
+    def test_later_branches(self):
+        routes = [
+            Route('slug', r'^(?:news|(?P<slug>[a-z]+))/$', None, {}),
+            Route('kind', r'^(?P<kind>news|blog/(?P<id>\d+))$', None, {}),
+        ]
+        for strategy in (MinimalValues(), RandomValues(seed=1)):
+            plans, skipped = route_plans(routes, strategy)
+            self.assertEqual(skipped, [])
+            self.assertEqual([len(plan.candidates) for plan in plans], [2, 2])
+            urls = list(generate_urls(plans, 40))
+            for url in urls:
+                self.assertTrue(any(re.fullmatch(route.pattern, url[1:]) for route in routes), url)
+        plans, _ = route_plans(routes)
+        self.assertEqual(list(generate_urls(plans, 4)),
+                         ['/news/', '/news', '/a/', '/blog/0'])
+
+    def test_minimal_values(self):
+        plans, _ = route_plans(ROUTES, MinimalValues())
+        self.assertEqual(list(generate_urls(plans, 7)),
+                         ['/export2', '/0000/!/', '/news/', '/a', '/export2.x', '/0000/!/', '/news/0'])
+
+    def test_random_values(self):
+        plans, _ = route_plans(ROUTES, RandomValues(seed=1))
+        urls = list(generate_urls(plans, 300))
+        self.assertMatched(urls)
+        self.assertGreater(len(set(urls)), 100)
+
+    def test_sample_values(self):
+        samples = SampleValues.from_file(io.StringIO('# samples\nslug\thello world\nslug\ta/b\narticle:year\t2014\n'
+                                                     'year\t1999\nyear\tnope\n'), seed=1)
+        plans, _ = route_plans(ROUTES[1:2], samples)
+        self.assertEqual(set(generate_urls(plans, 20)), {'/2014/hello%20world/'})
+
+    def test_group_regexes(self):
+        regexes = group_regexes(r'^(?P<a>\d+)/(x)/(?P<b>(?P=a))$')
+        self.assertEqual(sorted(regexes), ['_1', 'a'])
+        self.assertTrue(regexes['a'].fullmatch('42'))
+
+    def test_write_urls(self):
+        f = io.StringIO()
+        plans, _ = route_plans(ROUTES)
+        self.assertEqual(write_urls(f, generate_urls(plans, 5), batch=2), 5)
+        self.assertEqual(f.getvalue(), '/export2\n/0000/!/\n/news/\n/a\n/export2.x\n')
+
+
+class URLCorpusCommandTestCase(SimpleTestCase):
+    def test_command(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            call_command('url_corpus', path, count=1000, strategy='random', seed=1, stderr=io.StringIO())
+            with open(path, encoding='utf-8') as f:
+                urls = f.read().splitlines()
+        finally:
+            os.unlink(path)
+        self.assertEqual(len(urls), 1000)
+        self.assertIn('/metrics', urls)
@@ -0,0 +1,40 @@
+import io
+import json
+import unittest
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from ticket_django_13525.url_profile import format_table, pattern_shape, profile_routes
+from ticket_django_13525.urlconf import Route
+
+
+class URLProfileTestCase(unittest.TestCase):
+    def test_pattern_shape(self):
+        self.assertEqual(pattern_shape(r'^(?P<a>x(?:y(z)))/(?P=a)/\2$'), (2, 3))
+        self.assertEqual(pattern_shape(r'^metrics$'), (0, 0))
+
+    def test_profile_routes(self):
+        routes = [Route('cheap', r'^a$', None, {}), Route('costly', r'^' + '(a)?' * 8 + '$', None, {}),
+                  Route('broken', r'^a*?$', None, {})]
+        profiles = profile_routes(routes, compare_django=True)
+        self.assertEqual(profiles[0].name, 'costly')
+        self.assertEqual(profiles[0].candidates, 256)
+        self.assertEqual(profiles[0].max_length, 8 * len('%(_0)s'))
+        broken, = [profile for profile in profiles if profile.name == 'broken']
+        self.assertTrue(broken.error.startswith('KeyError'))
+        self.assertIn('costly', format_table(profiles, compare_django=True))
+
+
+class ProfileURLsCommandTestCase(SimpleTestCase):
+    def test_table(self):
+        stdout = io.StringIO()
+        call_command('profile_urls', repeat=1, stdout=stdout)
+        self.assertIn('^export2(\\.(?P<format>\\w+))?$', stdout.getvalue())
+
+    def test_json(self):
+        stdout = io.StringIO()
+        call_command('profile_urls', repeat=1, json=True, limit=2, stdout=stdout)
+        profiles = json.loads(stdout.getvalue())
+        self.assertEqual(len(profiles), 2)
+        self.assertGreaterEqual(profiles[0]['seconds'], profiles[1]['seconds'])
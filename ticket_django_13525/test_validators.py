@@ -0,0 +1,58 @@
+import re
+import unittest
+
+from ticket_django_13525.better_regex_parser import parse_pattern
+from ticket_django_13525.validators import argument_validators, delimited_groups, predicate
+
+SAMPLE_CHARS = [chr(code_point) for code_point in range(0x3000)] + ['٣', '𝟘', '_']
+
+
+class PredicateTestCase(unittest.TestCase):
+    def assertSameAsRegex(self, pattern):
+        validator = predicate(parse_pattern(pattern))
+        self.assertIsNotNone(validator, pattern)
+        regex = re.compile(r'(?:%s)\Z' % pattern)
+        for value in SAMPLE_CHARS + ['', 'ab', 'a/b', '12', '1a']:
+            self.assertEqual(bool(validator(value)), bool(regex.match(value)), (pattern, value))
+
+    def test_trivial_classes(self):
+        for pattern in (r'\d+', r'\d*', r'\w+', r'\w*', r'[^/]+', r'[^/]*', r'[^/.]+', r'\d{2}', r'\w{0,2}',
+                        r'[^/]{2,}'):
+            self.assertSameAsRegex(pattern)
+
+    def test_other_subpatterns(self):
+        for pattern in (r'[a-z]+', r'\d+\w', r'(?:\d)+?'):
+            self.assertIsNone(predicate(parse_pattern(pattern)), pattern)
+
+
+class ArgumentValidatorsTestCase(unittest.TestCase):
+    def test_validators(self):
+        validators = argument_validators(r'^(?P<year>\d{4})/(?P<slug>[^/]+)/(\d+)$')
+        self.assertEqual(sorted(validators), ['_2', 'slug', 'year'])
+        self.assertTrue(validators['year']('2014'))
+        self.assertFalse(validators['year']('20145'))
+        self.assertFalse(validators['slug']('a/b'))
+        self.assertTrue(validators['_2']('7'))
+
+    def test_flags(self):
+        validators = argument_validators(r'(?i)^(?P<slug>[^a]+)$')
+        self.assertFalse(validators['slug']('A'))
+
+    def test_backreference(self):
+        validators = argument_validators(r'^(?P<a>\w)(?P<b>(?P=a)x)$')
+        self.assertEqual(list(validators), ['a'])
+
+    def test_delimited_groups(self):
+        def groups(pattern):
+            return delimited_groups(parse_pattern(pattern))
+
+        self.assertEqual(groups(r'^a/(?P<b>\d+)$'), [('b', '\n')])
+        self.assertEqual(groups(r'(\d+)-(?P<b>\w+)\Z'), [('_0', '-'), ('b', None)])
+        self.assertEqual(groups(r'^(?P<a>[^/]+)/(?P<b>.+)/$'), [('a', '/')])
+        self.assertEqual(groups(r'^(?P<a>\d+)'), [])
+        self.assertEqual(groups(r'^a\b(?P<b>\w+)$'), [])
+        self.assertEqual(groups(r'^(?!admin)(?P<slug>\w+)$'), [])
+        self.assertEqual(groups(r'^(?P<a>\w+)(?<!x)$'), [])
+        self.assertEqual(groups(r'^(?P<a>\d+)(?P<b>[a-z]+)$'), [])
+        self.assertEqual(groups(r'^(?P<a>(?P<b>\d)+)/$'), [])
+        self.assertEqual(groups(r'(?i)^(?P<a>\d+)/$'), [])
@@ -0,0 +1,61 @@
+import unittest
+
+from ticket_django_13525.better_regex_parser import normalize_list
+from ticket_django_13525.samples import candidate_samples, group_samples
+from ticket_django_13525.verification import iter_corpus, verify_corpus, verify_pattern, Mismatch
+
+
+class GroupSamplesTestCase(unittest.TestCase):
+    def test_named_groups(self):
+        self.assertEqual(group_samples(r'^(?P<q>\.(?P<qq1>\d+)\.(?P<qq2>\d+))$'),
+                         {'q': '.0.0', 'qq1': '0', 'qq2': '0'})
+
+    def test_unnamed_groups(self):
+        self.assertEqual(group_samples(r'^export2(\.(?P<format>\w+))?$'),
+                         {'_0': '.x', 'format': 'x'})
+
+    def test_repeats_and_classes(self):
+        self.assertEqual(group_samples(r'^(?P<year>[0-9]{4})/(?P<slug>[^/]+)/(?P<any>.*)$'),
+                         {'year': '0000', 'slug': '!', 'any': '.'})
+
+    def test_branch(self):
+        self.assertEqual(group_samples(r'^(?P<kind>news|blog)$'), {'kind': 'news'})
+        self.assertEqual(group_samples(r'^(?:news|(?P<slug>[a-z]+))/$', args=['slug']), {'slug': 'a'})
+
+    def test_candidate_samples(self):
+        pattern = r'^(?P<kind>news|blog/(?P<id>\d+))$'
+        self.assertEqual(candidate_samples(pattern, normalize_list(pattern)), {'kind': 'news', 'id': '0'})
+
+
+class VerificationTestCase(unittest.TestCase):
+    def test_verify_pattern(self):
+        result = verify_pattern(r'^export2(\.(?P<format>\w+))?$', compare_django=False)
+        self.assertEqual(result.candidates, 3)
+        self.assertEqual(result.mismatches, [])
+        self.assertIsNone(result.error)
+
+    def test_later_branches(self):
+        for pattern in (r'^(?:news|(?P<slug>[a-z]+))/$', r'^(?P<kind>news|blog/(?P<id>\d+))$'):
+            result = verify_pattern(pattern, compare_django=False)
+            self.assertEqual(result.candidates, 2)
+            self.assertEqual(result.mismatches, [], pattern)
+
+    def test_mismatch(self):
+        result = verify_pattern(r'^100%/(?P<id>\d+)$', compare_django=False)
+        self.assertEqual(result.mismatches, [Mismatch('better_regex_parser', r'^100%/(?P<id>\d+)$', '100%/%(id)s',
+                                                      None)])
+
+    def test_invalid_pattern(self):
+        result = verify_pattern(r'^x(', compare_django=False)
+        self.assertTrue(result.error.startswith('re.error'))
+
+    def test_verify_corpus(self):
+        corpus = ['# comment', '', r'^export1\.(?P<format>\w+)$', r'^(?P<qq1>\d+)(?P<qq2>\d+)?$']
+        report = verify_corpus(iter_corpus(corpus), processes=1, compare_django=False)
+        self.assertEqual(report.patterns, 2)
+        self.assertEqual(report.candidates, 3)
+        self.assertEqual(report.mismatches, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,48 +1,30 @@
 from itertools import product
 
+from .group_index import GroupSpanIndex
+
 
 def group_normalize(pattern):
-    results = _group_normalize(None, pattern)
+    index = GroupSpanIndex(pattern)
+    results = _group_normalize(index, None, index.roots)
     return list(results)
 
-def _group_normalize(name, pattern):
+def _group_normalize(index, name, groups):
 
     if name is not None:
         yield name
-    groups = map(parse_group, _groups(pattern))
+    groups = [parse_group(index, group) for group in groups]
 
-    nested = [_group_normalize(g[0], g[1]) for g in groups]
+    nested = [_group_normalize(index, g[0], g[1]) for g in groups]
     if nested:
         yield from product(*nested)
 
 
 
-def _groups(pattern):
-    depth = 0
-    start = None
-    for i, c in enumerate(pattern):
-        if c == '(':
-            if depth == 0:
-                start = i
-            depth += 1
-        elif c == ')':
-            depth -= 1
-
-        if depth == 0:
-            yield pattern[start:i + 1]
-            start = None
-    assert depth == 0
-
-
-def parse_group(pattern):
-    assert pattern[0] == '('
-    assert pattern[-1] == ')'
-    name = ''
-    for i, c in enumerate(pattern[1:]):
-        if c not in '()':
-            name += c
-        else:
-            return name, pattern[i + 1:-1]
+def parse_group(index, group):
+    span = index[group]
+    nested = index.children[group]
+    name_end = index[nested[0]].start if nested else span.end
+    return index.pattern[span.body_start:name_end], nested
 
 
 inp = '(A(A1)(A2))(B(B1))(C)(A)'
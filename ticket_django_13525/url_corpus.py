@@ -0,0 +1,184 @@
+"""
+Example urls for every route of a urlconf, for load testing.
+
+Every route is normalized once and its candidates are filled with argument values from a strategy:
+
+    MinimalValues   the minimal values `candidate_samples` renders, the same for every url
+    RandomValues    random values matched by the subpatterns of the groups
+    SampleValues    values taken from a sample file
+
+Urls are generated lazily, round robin over the routes and over the candidates of each route,
+so a corpus of any size is streamed to its file in constant memory.
+
+    python manage.py url_corpus corpus.txt --count 10000000 --strategy random
+"""
+from collections import defaultdict, namedtuple
+from itertools import cycle, islice, repeat
+from random import Random
+import re
+from urllib.parse import quote
+
+from .group_index import NAMED, GroupSpanIndex
+from .metrics import normalize_list
+from .samples import RandomRenderer, candidate_samples, group_sampler
+
+# characters reverse() does not quote
+SAFE_CHARACTERS = "!$&'()*+,;=" + '/~:@'
+WRITE_BATCH = 8192
+
+RoutePlan = namedtuple('RoutePlan', ('route', 'candidates', 'values'))
+SkippedRoute = namedtuple('SkippedRoute', ('route', 'error'))
+
+
+class MinimalValues:
+    def values(self, route, candidates):
+        return repeat(candidate_samples(route.pattern, candidates))
+
+
+class RandomValues:
+    def __init__(self, seed=None, max_extra_repeat=8):
+        self.renderer = RandomRenderer(Random(seed), max_extra_repeat)
+
+    def values(self, route, candidates):
+        minimal = candidate_samples(route.pattern, candidates)
+        sample = group_sampler(route.pattern, self.renderer)
+        while True:
+            # groups left out by a random branch or repeat keep their minimal value
+            values = dict(minimal)
+            values.update(sample())
+            yield values
+
+
+class SampleValues:
+    """
+    Values picked at random from `samples`, a dict of lists keyed by argument name or by `url_name:argument_name`.
+
+    Samples not matched by the subpattern of their group are ignored, arguments without samples
+    keep their minimal value.
+    """
+
+    def __init__(self, samples, seed=None):
+        self.samples = samples
+        self.random = Random(seed)
+
+    @classmethod
+    def from_file(cls, f, seed=None):
+        """
+        Reads one `name<TAB>value` sample per line, skipping blank lines and `#` comments.
+        """
+        samples = defaultdict(list)
+        for line in f:
+            line = line.rstrip('\r\n')
+            if not line or line.startswith('#'):
+                continue
+            name, tab, value = line.partition('\t')
+            if tab:
+                samples[name].append(value)
+        return cls(dict(samples), seed)
+
+    def values(self, route, candidates):
+        minimal = candidate_samples(route.pattern, candidates)
+        regexes = group_regexes(route.pattern)
+        pools = {}
+        for arg in minimal:
+            pool = self.samples.get('%s:%s' % (route.name, arg)) if route.name else None
+            if pool is None:
+                pool = self.samples.get(arg, ())
+            if arg in regexes:
+                pool = [value for value in pool if regexes[arg].fullmatch(value)]
+            if pool:
+                pools[arg] = pool
+        choice = self.random.choice
+        while True:
+            values = dict(minimal)
+            for arg, pool in pools.items():
+                values[arg] = choice(pool)
+            yield values
+
+
+STRATEGIES = {
+    'minimal': MinimalValues,
+    'random': RandomValues,
+    'samples': SampleValues.from_file,
+}
+
+
+def group_regexes(pattern):
+    """
+    Compiled subpattern of every group of `pattern`, keyed by the argument names `normalize` uses.
+
+    Groups whose subpattern cannot be compiled on its own (e.g. because of a backreference) are left out.
+    """
+    index = GroupSpanIndex(pattern)
+    regexes = {}
+    for i, span in enumerate(index):
+        if span.number is None:
+            continue
+        name = span.name if span.kind == NAMED else '_%d' % (span.number - 1)
+        try:
+            regexes[name] = re.compile(index.body(i))
+        except re.error:
+            pass
+    return regexes
+
+
+def route_plans(routes, strategy=None):
+    """
+    Normalizes every route, returns the RoutePlans and a SkippedRoute for every candidate that cannot be
+    formatted and every route that has no usable candidate.
+    """
+    if strategy is None:
+        strategy = MinimalValues()
+    plans = []
+    skipped = []
+    for route in routes:
+        try:
+            normalized = normalize_list(route.pattern)
+            minimal = candidate_samples(route.pattern, normalized)
+        except Exception as e:
+            skipped.append(SkippedRoute(route, '%s: %s' % (e.__class__.__name__, e)))
+            continue
+        candidates = []
+        for format_string, args in normalized:
+            try:
+                format_string % minimal
+            except (KeyError, TypeError, ValueError) as e:
+                # e.g. a literal `%` in the pattern
+                skipped.append(SkippedRoute(route, 'candidate %r: %s: %s' % (format_string, e.__class__.__name__, e)))
+                continue
+            candidates.append((format_string, args))
+        if candidates:
+            plans.append(RoutePlan(route, [format_string for format_string, _ in candidates],
+                                   strategy.values(route, candidates)))
+        else:
+            skipped.append(SkippedRoute(route, 'no candidate can be formatted'))
+    return plans, skipped
+
+
+def _route_urls(plan, prefix):
+    for format_string, values in zip(cycle(plan.candidates), plan.values):
+        yield prefix + quote(format_string % values, SAFE_CHARACTERS)
+
+
+def generate_urls(plans, count, prefix='/'):
+    """
+    Yields `count` urls, round robin over `plans`.
+    """
+    if not plans:
+        return
+    for urls in islice(cycle([_route_urls(plan, prefix) for plan in plans]), count):
+        yield next(urls)
+
+
+def write_urls(f, urls, batch=WRITE_BATCH):
+    """
+    Writes one url per line to `f` and returns the number of urls written.
+    """
+    written = 0
+    while True:
+        lines = list(islice(urls, batch))
+        if not lines:
+            return written
+        lines.append('')
+        f.write('\n'.join(lines))
+        written += len(lines) - 1
@@ -0,0 +1,97 @@
+"""
+Normalization cost of every route of a urlconf, to see which routes dominate resolver population.
+"""
+from collections import namedtuple
+import re
+from sre_constants import GROUPREF, SUBPATTERN
+import time
+
+from .better_regex_parser import iter_clauses, normalize_list
+from .verification import django_normalize
+
+RouteProfile = namedtuple('RouteProfile', ('name', 'pattern', 'seconds', 'candidates', 'max_length', 'backreferences',
+                                           'depth', 'error', 'django_seconds', 'django_candidates', 'django_error'))
+
+
+def pattern_shape(pattern):
+    """
+    Returns (backreference count, group nesting depth) of `pattern`.
+    """
+    backreferences = 0
+    depth = 0
+    for clause_type, clause_value, clause_depth in iter_clauses(re.sre_parse.parse(pattern)):
+        if clause_type == GROUPREF:
+            backreferences += 1
+        elif clause_type == SUBPATTERN:
+            depth = max(depth, clause_depth + 1)
+    return backreferences, depth
+
+
+def _time(normalize, pattern, repeat):
+    """
+    Returns (best time, candidates, error) of `repeat` runs of `normalize(pattern)`.
+    """
+    best = None
+    candidates = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        try:
+            candidates = list(normalize(pattern))
+        except Exception as e:
+            return time.perf_counter() - started, [], '%s: %s' % (e.__class__.__name__, e)
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+    return best, candidates, None
+
+
+def profile_route(route, repeat=1, compare_django=False):
+    seconds, candidates, error = _time(normalize_list, route.pattern, repeat)
+    try:
+        backreferences, depth = pattern_shape(route.pattern)
+    except re.error:
+        backreferences, depth = 0, 0
+    if compare_django and django_normalize is not None:
+        django_seconds, django_candidates, django_error = _time(django_normalize, route.pattern, repeat)
+    else:
+        django_seconds, django_candidates, django_error = None, [], None
+    return RouteProfile(route.name, route.pattern, seconds, len(candidates),
+                        max((len(format_string) for format_string, args in candidates), default=0),
+                        backreferences, depth, error, django_seconds, len(django_candidates), django_error)
+
+
+def profile_routes(routes, repeat=1, compare_django=False):
+    """
+    Returns a RouteProfile for every route, most expensive first.
+    """
+    profiles = [profile_route(route, repeat, compare_django) for route in routes]
+    profiles.sort(key=lambda profile: profile.seconds, reverse=True)
+    return profiles
+
+
+def format_table(profiles, compare_django=False):
+    """
+    Formats `profiles` as a fixed width text table.
+    """
+    header = ['ms', 'candidates', 'max len', 'backrefs', 'depth']
+    if compare_django:
+        header += ['django ms', 'django cand.']
+    header += ['name', 'pattern']
+    rows = []
+    for profile in profiles:
+        row = ['%.3f' % (profile.seconds * 1000), str(profile.candidates), str(profile.max_length),
+               str(profile.backreferences), str(profile.depth)]
+        if compare_django:
+            row += ['-' if profile.django_seconds is None else '%.3f' % (profile.django_seconds * 1000),
+                    'error' if profile.django_error else str(profile.django_candidates)]
+        row += [str(profile.name), profile.pattern + (' (%s)' % profile.error if profile.error else '')]
+        rows.append(row)
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header) - 1)]
+    lines = []
+    for row in [header] + rows:
+        lines.append('  '.join([cell.rjust(width) if i < len(widths) - 1 else cell.ljust(width)
+                                for i, (cell, width) in enumerate(zip(row, widths))] + [row[-1]]))
+    total = sum(profile.seconds for profile in profiles)
+    lines.append('%d patterns normalized in %.3f ms' % (len(profiles), total * 1000))
+    if compare_django:
+        lines.append('django: %.3f ms' % (sum(profile.django_seconds or 0 for profile in profiles) * 1000))
+    return '\n'.join(lines)
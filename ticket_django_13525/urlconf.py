@@ -0,0 +1,37 @@
+from collections import namedtuple
+
+Route = namedtuple('Route', ('name', 'pattern', 'callback', 'default_args'))
+
+
+def join_patterns(prefix, pattern):
+    """
+    Joins an include() prefix with the pattern of an included url, the same way
+    RegexURLResolver._populate does (the leading `^` of the included pattern is dropped).
+    """
+    if prefix and pattern.startswith('^'):
+        pattern = pattern[1:]
+    return prefix + pattern
+
+
+def walk_urlpatterns(url_patterns, prefix=''):
+    """
+    Yields a Route for every leaf url of the given urlpatterns, following includes.
+
+    Resolvers and patterns are duck-typed (anything with `url_patterns` is treated as an include),
+    so this works on the objects returned by `django.conf.urls.url` without importing Django.
+    """
+    for url_pattern in url_patterns:
+        pattern = join_patterns(prefix, url_pattern.regex.pattern)
+        if hasattr(url_pattern, 'url_patterns'):
+            yield from walk_urlpatterns(url_pattern.url_patterns, pattern)
+        else:
+            yield Route(url_pattern.name, pattern, url_pattern.callback, url_pattern.default_args)
+
+
+def root_routes(urlconf=None):
+    """
+    Yields a Route for every url reachable from `urlconf` (ROOT_URLCONF by default).
+    """
+    from django.core.urlresolvers import get_resolver
+
+    return walk_urlpatterns(get_resolver(urlconf).url_patterns)
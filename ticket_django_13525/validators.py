@@ -0,0 +1,148 @@
+"""
+Validators of the arguments of a pattern, derived from the subpatterns of its groups.
+
+`reverse()` checks a url by formatting a candidate and matching the whole pattern against it. When a group is
+followed by a character it cannot match (or ends the pattern), and only literals and such groups come before it,
+its match is exactly the value formatted in its place unless the value contains that character. A value its
+subpattern does not match then means the url does not match either, so the arguments can be rejected one by one,
+stopping at the first bad value, before the whole url is matched. Subpatterns that are a repeat of `\\d`, `\\w` or of a negated literal (e.g. `[^/]+`) are checked
+with str methods, the others with a regex compiled from the text of the group.
+"""
+import re
+from sre_constants import ASSERT, ASSERT_NOT, AT, AT_BEGINNING, AT_BEGINNING_STRING, AT_END, AT_END_STRING, \
+    CATEGORY, CATEGORY_DIGIT, CATEGORY_WORD, GROUPREF, IN, LITERAL, MAX_REPEAT, MAXREPEAT, NEGATE, NOT_LITERAL, \
+    SUBPATTERN
+
+from .better_regex_parser import iter_clauses, matched_char_class, parse_pattern, reverse_groupdict
+from .group_index import GroupSpanIndex
+
+# flags changing what the character classes of predicates match
+_PREDICATE_FLAGS = re.ASCII | re.IGNORECASE | re.LOCALE
+# flags changing what literals and anchors match
+_DELIMITER_FLAGS = re.IGNORECASE | re.LOCALE | re.MULTILINE
+_BEGINNING_ANCHORS = ((AT, AT_BEGINNING), (AT, AT_BEGINNING_STRING))
+# character a group ending the pattern cannot match for its match to be the whole value, `$` also matches
+# before a trailing newline
+_END_STOPS = {(AT, AT_END): '\n', (AT, AT_END_STRING): None}
+# clauses whose match depends on the text around a group
+_CONTEXT_CLAUSES = (AT, ASSERT, ASSERT_NOT, GROUPREF)
+
+
+def _is_word(value):
+    # `\w` is alphanumeric or `_`, as str.isalnum sees it
+    return value.replace('_', 'a').isalnum()
+
+
+def _char_test(clause_type, clause_value):
+    """
+    Returns a predicate of non-empty strings made of characters matched by the clause, or None.
+    """
+    if clause_type == IN and len(clause_value) == 1 and clause_value[0][0] == CATEGORY:
+        return {CATEGORY_DIGIT: str.isdecimal, CATEGORY_WORD: _is_word}.get(clause_value[0][1])
+    if clause_type == NOT_LITERAL:
+        char = chr(clause_value)
+        return lambda value: char not in value
+    if clause_type == IN and clause_value[0][0] == NEGATE and \
+            all(in_clause_type == LITERAL for in_clause_type, _ in clause_value[1:]):
+        chars = [chr(char) for _, char in clause_value[1:]]
+        return lambda value: not any(char in value for char in chars)
+    return None
+
+
+def predicate(subpattern):
+    """
+    Returns a str predicate equivalent to a group subpattern matching a whole value, or None
+    if the subpattern is not a greedy repeat of a character class handled without a regex.
+
+    The predicates assume the default flags of str patterns.
+    """
+    if len(subpattern) != 1 or subpattern[0][0] != MAX_REPEAT:
+        return None
+    min_repeat, max_repeat, repeated = subpattern[0][1]
+    if len(repeated) != 1:
+        return None
+    test = _char_test(*repeated[0])
+    if test is None:
+        return None
+    if max_repeat == MAXREPEAT:
+        if min_repeat == 1:
+            if test is str.isdecimal or test is _is_word:
+                # both are False for the empty string already
+                return test
+            return lambda value: value != '' and test(value)
+        if min_repeat == 0:
+            return lambda value: value == '' or test(value)
+        return lambda value: len(value) >= min_repeat and test(value)
+    if min_repeat == 0:
+        return lambda value: value == '' or len(value) <= max_repeat and test(value)
+    return lambda value: min_repeat <= len(value) <= max_repeat and test(value)
+
+
+def delimited_groups(pattern_parse_tree):
+    """
+    Returns the leading groups of a pattern matched at its start whose match is the value formatted in their place
+    as long as the value does not contain their stop character, as (name, stop character) in pattern order.
+    The stop character is the literal following the group, `\\n` before `$`, or None before `\\Z`.
+
+    Only literals and such groups can come before a delimited group, and the groups cannot contain lookarounds,
+    anchors, backreferences or other groups.
+
+    >>> delimited_groups(parse_pattern(r'^(?P<year>\\d{4})/(?P<slug>[^/]+)/(?P<rest>.+)$'))
+    [('year', '/'), ('slug', '/')]
+    """
+    flags = pattern_parse_tree.pattern.flags
+    if flags & _DELIMITER_FLAGS:
+        return []
+    names = reverse_groupdict(pattern_parse_tree.pattern.groupdict)
+    clauses = list(pattern_parse_tree)
+    if clauses and clauses[0] in _BEGINNING_ANCHORS:
+        clauses = clauses[1:]
+    groups = []
+    for position, (clause_type, clause_value) in enumerate(clauses):
+        if clause_type == LITERAL:
+            continue
+        if clause_type != SUBPATTERN or clause_value[0] is None:
+            break
+        group_id, subpattern = clause_value
+        if any(inner_type in _CONTEXT_CLAUSES or inner_type == SUBPATTERN and inner_value[0] is not None
+               for inner_type, inner_value, _ in iter_clauses(subpattern)):
+            break
+        following = clauses[position + 1] if position + 1 < len(clauses) else None
+        if following is not None and following[0] == LITERAL:
+            stop = chr(following[1])
+        elif following in _END_STOPS:
+            stop = _END_STOPS[following]
+        else:
+            break
+        char_class = matched_char_class(subpattern, flags)
+        if char_class is None or stop is not None and stop in char_class:
+            break
+        groups.append((names.get(group_id, '_%d' % (group_id - 1)), stop))
+    return groups
+
+
+def argument_validators(pattern):
+    """
+    Returns a predicate for every argument of `pattern`, keyed by the names `normalize` uses.
+
+    Arguments whose subpattern cannot be compiled on its own (e.g. because of a backreference) are left out.
+    """
+    pattern_parse_tree = parse_pattern(pattern)
+    flags = pattern_parse_tree.pattern.flags
+    names = reverse_groupdict(pattern_parse_tree.pattern.groupdict)
+    index = GroupSpanIndex(pattern)
+    validators = {}
+    for clause_type, clause_value, _ in iter_clauses(pattern_parse_tree):
+        if clause_type != SUBPATTERN or clause_value[0] is None:
+            continue
+        group_id, subpattern = clause_value
+        name = names.get(group_id, '_%d' % (group_id - 1))
+        validator = predicate(subpattern) if not flags & _PREDICATE_FLAGS else None
+        if validator is None and group_id in index.by_number:
+            try:
+                validator = re.compile(r'(?:%s)\Z' % index.body(index.by_number[group_id]), flags).match
+            except re.error:
+                continue
+        if validator is not None:
+            validators[name] = validator
+    return validators
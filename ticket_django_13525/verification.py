@@ -0,0 +1,179 @@
+"""
+Differential verification of `normalize()` against the patterns it was computed from.
+
+Every candidate is filled with sample values derived from the subpatterns of its groups and the resulting url
+is `fullmatch`ed against the compiled pattern. Django's own `regex_helper.normalize` goes through the same check,
+so both correctness and speed can be compared. Patterns are streamed from a corpus (one pattern per line) and
+spread over a process pool.
+
+    python -m ticket_django_13525.verification corpus.txt --processes 8
+"""
+import argparse
+from collections import namedtuple
+from multiprocessing import Pool
+import re
+import sys
+import time
+
+from .better_regex_parser import normalize_list
+from .samples import candidate_samples
+
+try:
+    from django.utils.regex_helper import normalize as django_normalize
+except ImportError:
+    django_normalize = None
+
+Mismatch = namedtuple('Mismatch', ('engine', 'pattern', 'format_string', 'url'))
+
+PatternResult = namedtuple('PatternResult', ('pattern', 'candidates', 'seconds', 'mismatches', 'error',
+                                             'django_candidates', 'django_seconds', 'django_mismatches',
+                                             'django_error'))
+
+
+def check_candidates(engine, pattern, compiled, candidates, samples):
+    """
+    Returns a Mismatch for every candidate that, filled with `samples`, is not matched by `compiled`.
+    """
+    mismatches = []
+    for format_string, args in candidates:
+        try:
+            url = format_string % {arg: samples.get(arg, '') for arg in args}
+        except (KeyError, TypeError, ValueError):
+            url = None
+        if url is None or not compiled.fullmatch(url):
+            mismatches.append(Mismatch(engine, pattern, format_string, url))
+    return mismatches
+
+
+def _run(engine, normalize, pattern, compiled):
+    started = time.perf_counter()
+    try:
+        candidates = list(normalize(pattern))
+    except Exception as e:
+        return 0, time.perf_counter() - started, [], '%s: %s' % (e.__class__.__name__, e)
+    seconds = time.perf_counter() - started
+    try:
+        samples = candidate_samples(pattern, candidates)
+    except Exception:
+        samples = {}
+    return len(candidates), seconds, check_candidates(engine, pattern, compiled, candidates, samples), None
+
+
+def verify_pattern(pattern, compare_django=True):
+    try:
+        compiled = re.compile(pattern, re.UNICODE)
+    except re.error as e:
+        return PatternResult(pattern, 0, 0.0, [], 're.error: %s' % e, 0, 0.0, [], None)
+    candidates, seconds, mismatches, error = _run('better_regex_parser', normalize_list, pattern, compiled)
+    if compare_django and django_normalize is not None:
+        django_result = _run('django', django_normalize, pattern, compiled)
+    else:
+        django_result = (0, 0.0, [], None)
+    return PatternResult(pattern, candidates, seconds, mismatches, error, *django_result)
+
+
+def _verify_pattern_with_django(pattern):
+    return verify_pattern(pattern, True)
+
+
+def _verify_pattern_without_django(pattern):
+    return verify_pattern(pattern, False)
+
+
+class Report:
+    def __init__(self):
+        self.patterns = 0
+        self.candidates = 0
+        self.seconds = 0.0
+        self.mismatches = []
+        self.errors = []
+        self.django_candidates = 0
+        self.django_seconds = 0.0
+        self.django_mismatches = []
+        self.django_errors = []
+        self.wall_seconds = 0.0
+
+    def add(self, result):
+        self.patterns += 1
+        self.candidates += result.candidates
+        self.seconds += result.seconds
+        self.mismatches.extend(result.mismatches)
+        if result.error:
+            self.errors.append((result.pattern, result.error))
+        self.django_candidates += result.django_candidates
+        self.django_seconds += result.django_seconds
+        self.django_mismatches.extend(result.django_mismatches)
+        if result.django_error:
+            self.django_errors.append((result.pattern, result.django_error))
+
+    @property
+    def throughput(self):
+        """
+        Patterns verified per second of wall time.
+        """
+        return self.patterns / self.wall_seconds if self.wall_seconds else 0.0
+
+    def summary(self):
+        lines = [
+            '%d patterns verified in %.2fs (%.0f patterns/s)' % (self.patterns, self.wall_seconds, self.throughput),
+            'better_regex_parser: %d candidates, %d mismatches, %d errors, %.3fs normalizing'
+            % (self.candidates, len(self.mismatches), len(self.errors), self.seconds),
+        ]
+        if django_normalize is not None:
+            lines.append('django: %d candidates, %d mismatches, %d errors, %.3fs normalizing'
+                         % (self.django_candidates, len(self.django_mismatches), len(self.django_errors),
+                            self.django_seconds))
+        return '\n'.join(lines)
+
+
+def iter_corpus(lines):
+    """
+    Yields the patterns of a corpus, skipping blank lines and `#` comments.
+    """
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line and not line.startswith('#'):
+            yield line
+
+
+def verify_corpus(patterns, processes=None, chunksize=64, compare_django=True, report=None):
+    """
+    Verifies `patterns` on a pool of `processes` workers and returns the Report.
+    """
+    if report is None:
+        report = Report()
+    worker = _verify_pattern_with_django if compare_django else _verify_pattern_without_django
+    started = time.perf_counter()
+    if processes == 1:
+        for result in map(worker, patterns):
+            report.add(result)
+    else:
+        with Pool(processes) as pool:
+            for result in pool.imap(worker, patterns, chunksize):
+                report.add(result)
+    report.wall_seconds = time.perf_counter() - started
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Verify normalize() candidates against re.fullmatch.')
+    parser.add_argument('corpus', type=argparse.FileType('r', encoding='utf-8'),
+                        help='file with one pattern per line, - for stdin')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--chunksize', type=int, default=64)
+    parser.add_argument('--no-django', action='store_true', help='skip the comparison with Django normalize()')
+    args = parser.parse_args(argv)
+
+    report = verify_corpus(iter_corpus(args.corpus), args.processes, args.chunksize, not args.no_django)
+    for mismatch in report.mismatches + report.django_mismatches:
+        print('MISMATCH %s %r: %r -> %r' % mismatch)
+    for pattern, error in report.errors:
+        print('ERROR better_regex_parser %r: %s' % (pattern, error))
+    for pattern, error in report.django_errors:
+        print('ERROR django %r: %s' % (pattern, error))
+    print(report.summary())
+    return 1 if report.mismatches or report.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from . import metrics
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def metrics_view(request):
+    """
+    Exposes the url metrics in the Prometheus text format, to local scrapers only
+    (see the URL_METRICS_ALLOWED_ADDRESSES setting).
+    """
+    allowed_addresses = getattr(settings, 'URL_METRICS_ALLOWED_ADDRESSES', ('127.0.0.1', '::1'))
+    if request.META.get('REMOTE_ADDR') not in allowed_addresses:
+        return HttpResponseForbidden()
+    metrics.flush()
+    return HttpResponse(metrics.registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -12,3 +12,7 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ticket_django_13525.settings")
 
 from django.core.wsgi import get_wsgi_application
 application = get_wsgi_application()
+
+# normalize the urlconf when the worker starts rather than on its first reverse()
+from ticket_django_13525.resolvers import populate
+populate()